@@ -10,7 +10,7 @@ import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from app.db.base_class import Base
-from app.models import user, subscription  # Remove payment model import
+from app.models import user, subscription, outbox, webhook, feature  # Remove payment model import
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
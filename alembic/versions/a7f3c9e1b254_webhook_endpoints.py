@@ -0,0 +1,39 @@
+"""Webhook endpoints
+
+Revision ID: a7f3c9e1b254
+Revises: 5e8a0b7c3d21
+Create Date: 2026-10-19 17:41:06.218394
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7f3c9e1b254'
+down_revision: Union[str, None] = '5e8a0b7c3d21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('webhook_endpoints',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('url', sa.String(), nullable=False),
+    sa.Column('secret', sa.String(), nullable=False),
+    sa.Column('event_types', sa.String(), nullable=True),
+    sa.Column('max_concurrency', sa.Integer(), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_webhook_endpoints_id'), 'webhook_endpoints', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_webhook_endpoints_id'), table_name='webhook_endpoints')
+    op.drop_table('webhook_endpoints')
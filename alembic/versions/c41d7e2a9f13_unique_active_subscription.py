@@ -0,0 +1,39 @@
+"""Unique active subscription per user
+
+Revision ID: c41d7e2a9f13
+Revises: 9b5f538f36f1
+Create Date: 2026-10-19 10:12:31.408115
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41d7e2a9f13'
+down_revision: Union[str, None] = '9b5f538f36f1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing duplicates would block the index: keep each user's newest
+    # ACTIVE subscription and cancel the rest.
+    op.execute(
+        "UPDATE subscriptions SET status = 'CANCELLED', cancelled_at = CURRENT_TIMESTAMP "
+        "WHERE status = 'ACTIVE' AND id NOT IN ("
+        "SELECT MAX(id) FROM subscriptions WHERE status = 'ACTIVE' GROUP BY user_id)"
+    )
+    op.create_index(
+        'uq_subscriptions_user_active', 'subscriptions', ['user_id'], unique=True,
+        postgresql_where=sa.text("status = 'ACTIVE'"),
+        sqlite_where=sa.text("status = 'ACTIVE'")
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_subscriptions_user_active', table_name='subscriptions')
@@ -0,0 +1,67 @@
+"""Feature registry and plan feature bitsets
+
+Revision ID: e3d9b1f6a8c2
+Revises: a7f3c9e1b254
+Create Date: 2026-10-19 18:12:47.530916
+
+"""
+import json
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3d9b1f6a8c2'
+down_revision: Union[str, None] = 'a7f3c9e1b254'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    features = op.create_table('features',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('key', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_features_id'), 'features', ['id'], unique=False)
+    op.create_index(op.f('ix_features_key'), 'features', ['key'], unique=True)
+    op.add_column('plans', sa.Column('feature_bits', sa.BigInteger(), server_default='0', nullable=False))
+
+    # Register the keys found in existing plans and precompute their bitsets.
+    # Plans whose features aren't a JSON list/object keep feature_bits = 0.
+    conn = op.get_bind()
+    plans = sa.table('plans', sa.column('id', sa.Integer), sa.column('feature_bits', sa.BigInteger))
+    ids = {}
+    for plan_id, raw in conn.execute(sa.text("SELECT id, features FROM plans WHERE features IS NOT NULL")).all():
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            continue
+        if isinstance(value, dict):
+            keys = [key for key, enabled in value.items() if enabled]
+        elif isinstance(value, list):
+            keys = [key for key in value if isinstance(key, str)]
+        else:
+            continue
+        bits = 0
+        for key in keys:
+            if key not in ids:
+                ids[key] = len(ids) + 1
+                conn.execute(features.insert().values(id=ids[key], key=key, created_at=datetime.utcnow()))
+            bits |= 1 << ids[key]
+        conn.execute(plans.update().where(plans.c.id == plan_id).values(feature_bits=bits))
+    if ids and conn.dialect.name == 'postgresql':
+        conn.execute(sa.text("SELECT setval('features_id_seq', (SELECT MAX(id) FROM features))"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('plans', 'feature_bits')
+    op.drop_index(op.f('ix_features_key'), table_name='features')
+    op.drop_index(op.f('ix_features_id'), table_name='features')
+    op.drop_table('features')
@@ -1,7 +1,6 @@
 from typing import Generator, Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import jwt, JWTError
 from pydantic import ValidationError
 from sqlalchemy.orm import Session
 from app.core import security
@@ -27,11 +26,9 @@ def get_current_user(
     token: str = Depends(reusable_oauth2)
 ) -> dict:
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
+        payload = security.decode_access_token(token)
         token_data = TokenPayload(**payload)
-    except (JWTError, ValidationError):
+    except (ValueError, ValidationError):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
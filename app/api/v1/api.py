@@ -1,8 +1,10 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import subscriptions, plans, auth
+from app.api.v1.endpoints import subscriptions, plans, auth, profiling, webhooks
 
 api_router = APIRouter()
  
 api_router.include_router(auth.router, prefix="/auth", tags=["authentication"])
 api_router.include_router(subscriptions.router, prefix="/subscriptions", tags=["subscriptions"])
-api_router.include_router(plans.router, prefix="/plans", tags=["plans"]) 
\ No newline at end of file
+api_router.include_router(plans.router, prefix="/plans", tags=["plans"])
+api_router.include_router(webhooks.router, prefix="/webhooks", tags=["webhooks"])
+api_router.include_router(profiling.router, prefix="/profiling", tags=["profiling"])
\ No newline at end of file
@@ -4,12 +4,13 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from app.api import deps
+from app.core.profiling import ProfiledRoute
 from app.core import security
 from app.core.config import settings
 from app.schemas.token import Token, TokenPayload
 from app.crud import user as crud_user
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
 @router.post("/token", response_model=Token)
 def login_access_token(
@@ -1,26 +1,54 @@
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 from app.api import deps
+from app.core import etag
+from app.core.config import settings
+from app.core.profiling import ProfiledRoute
 from app.models.subscription import Plan
-from app.schemas.subscription import PlanCreate, PlanUpdate, PlanInDB
+from app.schemas.subscription import FeatureInDB, PlanCreate, PlanUpdate, PlanInDB
+from app.crud import feature as crud_feature
 from app.crud import plan as crud_plan
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
 @router.get("/", response_model=List[PlanInDB])
 def get_plans(
+    request: Request,
+    response: Response,
     db: Session = Depends(deps.get_db),
     skip: int = 0,
     limit: int = 100,
     current_user: dict = Depends(deps.get_current_user)
 ) -> List[Plan]:
     """
-    Retrieve all available subscription plans.
+    Retrieve all available subscription plans. Supports If-None-Match; the
+    ETag follows the catalog version, so a 304 needs no plan query.
     """
+    headers = {
+        "Cache-Control": f"public, max-age={settings.PLANS_CACHE_MAX_AGE}, "
+                         f"stale-while-revalidate={settings.PLANS_STALE_WHILE_REVALIDATE}"
+    }
+    versions = etag.get_versions([etag.CATALOG_KEY])
+    if versions:
+        headers["ETag"] = etag.make_etag(versions[0], skip, limit)
+        if etag.matches(request, headers["ETag"]):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
     plans = crud_plan.get_multi(db, skip=skip, limit=limit)
     return plans
 
+@router.get("/features", response_model=List[FeatureInDB])
+def get_features(
+    db: Session = Depends(deps.get_db),
+    current_user: dict = Depends(deps.get_current_user)
+) -> list:
+    """
+    Feature registry: a plan has feature `key` when bit `id` of its
+    feature_bits is set.
+    """
+    return crud_feature.get_multi(db)
+
 @router.post("/", response_model=PlanInDB, status_code=status.HTTP_201_CREATED)
 def create_plan(
     *,
@@ -31,7 +59,10 @@ def create_plan(
     """
     Create a new subscription plan (admin only).
     """
-    plan = crud_plan.create(db, obj_in=plan_in)
+    try:
+        plan = crud_plan.create(db, obj_in=plan_in)
+    except crud_feature.FeatureRegistryFull as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     return plan
 
 @router.put("/{plan_id}", response_model=PlanInDB)
@@ -45,13 +76,15 @@ def update_plan(
     """
     Update a subscription plan (admin only).
     """
-    plan = crud_plan.get(db, id=plan_id)
+    try:
+        plan = crud_plan.update(db, id=plan_id, obj_in=plan_in)
+    except crud_feature.FeatureRegistryFull as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     if not plan:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Plan not found"
         )
-    plan = crud_plan.update(db, db_obj=plan, obj_in=plan_in)
     return plan
 
 @router.delete("/{plan_id}", response_model=PlanInDB)
@@ -64,11 +97,10 @@ def delete_plan(
     """
     Delete a subscription plan (admin only).
     """
-    plan = crud_plan.get(db, id=plan_id)
+    plan = crud_plan.remove(db, id=plan_id)
     if not plan:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Plan not found"
         )
-    plan = crud_plan.remove(db, id=plan_id)
     return plan 
\ No newline at end of file
@@ -0,0 +1,89 @@
+from typing import Any
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+from app.api import deps
+from app.core.config import settings
+from app.core.middleware import request_metrics
+from app.core.profiling import (
+    PROFILE_HEADER,
+    ProfiledRoute,
+    ProfilerBusyError,
+    SamplingProfiler,
+    create_profile_token,
+    format_collapsed,
+    get_request_profile,
+)
+
+router = APIRouter(route_class=ProfiledRoute)
+
+def _ensure_enabled() -> None:
+    if not settings.PROFILING_ENABLED:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profiling is disabled"
+        )
+
+@router.post("/sample", response_class=PlainTextResponse)
+def sample_profile(
+    seconds: float = Query(10.0, gt=0, le=settings.PROFILING_MAX_SECONDS),
+    interval_ms: float = Query(5.0, ge=1, le=1000),
+    current_user: dict = Depends(deps.get_current_admin_user)
+) -> Any:
+    """
+    Sample this worker's threads for N seconds (admin only).
+
+    Returns collapsed stacks, ready for flamegraph.pl or speedscope.
+    """
+    _ensure_enabled()
+    profiler = SamplingProfiler(interval=interval_ms / 1000)
+    try:
+        samples = profiler.run(seconds)
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    return format_collapsed(samples)
+
+@router.post("/token")
+def create_request_profile_token(
+    method: str = Query(..., min_length=1),
+    path: str = Query(..., min_length=1),
+    current_user: dict = Depends(deps.get_current_admin_user)
+) -> Any:
+    """
+    Create a signed token that enables cProfile for requests to `method path` (admin only).
+    """
+    _ensure_enabled()
+    return {
+        "header": PROFILE_HEADER,
+        "token": create_profile_token(method, path),
+        "expires_in": settings.PROFILING_TOKEN_EXPIRE_SECONDS,
+    }
+
+@router.get("/requests/{profile_id}", response_class=PlainTextResponse)
+def get_profile(
+    profile_id: str,
+    current_user: dict = Depends(deps.get_current_admin_user)
+) -> Any:
+    """
+    Get the cProfile stats of a profiled request (admin only).
+    """
+    _ensure_enabled()
+    profile = get_request_profile(profile_id)
+    if profile is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found"
+        )
+    return profile
+
+@router.get("/metrics")
+def get_request_metrics(
+    reset: bool = Query(False, description="Clear the counters after reading"),
+    current_user: dict = Depends(deps.get_current_admin_user)
+) -> Any:
+    """
+    Per-route request counts, error counts and latency of this worker (admin only).
+    """
+    snapshot = request_metrics.snapshot()
+    if reset:
+        request_metrics.reset()
+    return snapshot
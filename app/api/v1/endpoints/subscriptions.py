@@ -1,17 +1,26 @@
+import asyncio
 from datetime import datetime, timedelta
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import AsyncIterator, Dict, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from app.api import deps
+from app.core import etag
+from app.core.broadcast import broadcaster
+from app.core.config import settings
+from app.core.profiling import ProfiledRoute
 from app.models.subscription import Subscription, SubscriptionStatus
 from app.schemas.subscription import (
+    Entitlement,
     SubscriptionCreate,
+    SubscriptionLookup,
     SubscriptionUpdate,
     SubscriptionResponse
 )
 from app.crud import subscription as crud_subscription
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
 @router.post("/", response_model=SubscriptionResponse, status_code=status.HTTP_201_CREATED)
 def create_subscription(
@@ -23,35 +32,131 @@ def create_subscription(
     """
     Create a new subscription for a user.
     """
-    # Check if user already has an active subscription
-    existing_sub = crud_subscription.get_active_subscription(db, user_id=subscription_in.user_id)
-    if existing_sub:
+    # Single conditional insert; None means the user already has an active subscription
+    subscription = crud_subscription.create_subscription(db, obj_in=subscription_in)
+    if not subscription:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="User already has an active subscription"
         )
-    
-    # Create new subscription
-    subscription = crud_subscription.create_subscription(db, obj_in=subscription_in)
     return subscription
 
+@router.post("/lookup", response_model=Dict[int, Optional[Entitlement]])
+def lookup_subscriptions(
+    lookup: SubscriptionLookup,
+    db: Session = Depends(deps.get_db),
+    current_user: dict = Depends(deps.get_current_user)
+) -> Dict[int, Optional[dict]]:
+    """
+    Active plan of up to ENTITLEMENT_LOOKUP_MAX_USERS users in one call, keyed
+    by user id; null for users without an active subscription.
+    """
+    return crud_subscription.get_entitlements(db, lookup.user_ids)
+
 @router.get("/{user_id}", response_model=SubscriptionResponse)
 def get_subscription(
     user_id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(deps.get_db),
     current_user: dict = Depends(deps.get_current_user)
 ) -> Subscription:
     """
-    Get a user's current subscription.
+    Get a user's current subscription. Supports If-None-Match; the ETag
+    follows the user's subscription and plan catalog versions, so a 304
+    needs no subscription query.
     """
+    # Clients may keep a copy but must revalidate it on every use
+    headers = {"Cache-Control": "private, no-cache"}
+    versions = etag.get_versions([etag.subscription_key(user_id), etag.CATALOG_KEY])
+    if versions:
+        headers["ETag"] = etag.make_etag(*versions)
+        if etag.matches(request, headers["ETag"]):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
     subscription = crud_subscription.get_active_subscription(db, user_id=user_id)
     if not subscription:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="No active subscription found"
         )
+    response.headers.update(headers)
     return subscription
 
+@router.get("/{user_id}/entitlement", response_model=Entitlement)
+def get_entitlement(
+    user_id: int,
+    db: Session = Depends(deps.get_db),
+    current_user: dict = Depends(deps.get_current_user)
+) -> dict:
+    """
+    Compact form of a user's active subscription: plan id, status, end date
+    and the plan's feature bitset (see GET /plans/features).
+    """
+    entitlement = crud_subscription.get_entitlements(db, [user_id])[user_id]
+    if not entitlement:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No active subscription found"
+        )
+    return entitlement
+
+def _sse(event: str, data: str) -> str:
+    return f"event: {event}\ndata: {data}\n\n"
+
+def _snapshot(db: Session, user_id: int) -> Optional[str]:
+    """Current subscription as JSON, then release the session's connection"""
+    try:
+        subscription = crud_subscription.get_active_subscription(db, user_id=user_id)
+        if subscription is None:
+            return None
+        return SubscriptionResponse.model_validate(subscription).model_dump_json()
+    finally:
+        # The stream may stay open for hours; don't hold a pooled connection
+        db.close()
+
+async def _event_stream(user_id: int, queue: asyncio.Queue, snapshot: Optional[str]) -> AsyncIterator[str]:
+    try:
+        yield _sse("snapshot", snapshot or "null")
+        while True:
+            try:
+                item = await asyncio.wait_for(queue.get(), settings.SSE_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                # Comment line keeps proxies from closing an idle connection
+                yield ": keepalive\n\n"
+                continue
+            if item is None:
+                return
+            yield _sse(*item)
+    finally:
+        broadcaster.unsubscribe(user_id, queue)
+
+@router.get("/{user_id}/events")
+async def subscription_events(
+    user_id: int,
+    db: Session = Depends(deps.get_db),
+    current_user: dict = Depends(deps.get_current_user)
+) -> StreamingResponse:
+    """
+    Server-Sent Events stream of a user's subscription. Sends a `snapshot`
+    event with the current active subscription (or null), then one
+    `subscription.*` event carrying the new subscription on every change.
+    """
+    # Return the connection used for authentication now: holding it while
+    # awaiting a threadpool slot can starve the pool when many clients connect
+    db.close()
+    # Subscribe before reading the snapshot so no change falls in between
+    queue = await broadcaster.subscribe(user_id)
+    try:
+        snapshot = await run_in_threadpool(_snapshot, db, user_id)
+    except BaseException:
+        broadcaster.unsubscribe(user_id, queue)
+        raise
+    return StreamingResponse(
+        _event_stream(user_id, queue, snapshot),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.put("/{user_id}", response_model=SubscriptionResponse)
 def update_subscription(
     *,
@@ -63,16 +168,14 @@ def update_subscription(
     """
     Update a user's subscription (upgrade/downgrade plan).
     """
-    subscription = crud_subscription.get_active_subscription(db, user_id=user_id)
+    subscription = crud_subscription.update_subscription(
+        db, user_id=user_id, obj_in=subscription_in
+    )
     if not subscription:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="No active subscription found"
         )
-    
-    subscription = crud_subscription.update_subscription(
-        db, db_obj=subscription, obj_in=subscription_in
-    )
     return subscription
 
 @router.delete("/{user_id}", response_model=SubscriptionResponse)
@@ -85,12 +188,10 @@ def cancel_subscription(
     """
     Cancel a user's subscription.
     """
-    subscription = crud_subscription.get_active_subscription(db, user_id=user_id)
+    subscription = crud_subscription.cancel_subscription(db, user_id=user_id)
     if not subscription:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="No active subscription found"
         )
-    
-    subscription = crud_subscription.cancel_subscription(db, db_obj=subscription)
     return subscription 
\ No newline at end of file
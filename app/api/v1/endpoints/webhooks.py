@@ -0,0 +1,64 @@
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from app.api import deps
+from app.core import webhooks
+from app.core.profiling import ProfiledRoute
+from app.crud import webhook as crud_webhook
+from app.models.webhook import WebhookEndpoint
+from app.schemas.webhook import WebhookEndpointCreate, WebhookEndpointCreated, WebhookEndpointInDB
+
+router = APIRouter(route_class=ProfiledRoute)
+
+@router.post("/", response_model=WebhookEndpointCreated, status_code=status.HTTP_201_CREATED)
+def create_webhook(
+    *,
+    db: Session = Depends(deps.get_db),
+    webhook_in: WebhookEndpointCreate,
+    current_user: dict = Depends(deps.get_current_admin_user)
+) -> WebhookEndpoint:
+    """
+    Register a webhook endpoint (admin only). The signing secret is only
+    returned in this response.
+    """
+    return crud_webhook.create(db, obj_in=webhook_in)
+
+@router.get("/", response_model=List[WebhookEndpointInDB])
+def get_webhooks(
+    db: Session = Depends(deps.get_db),
+    skip: int = 0,
+    limit: int = 100,
+    current_user: dict = Depends(deps.get_current_admin_user)
+) -> List[WebhookEndpoint]:
+    """
+    List registered webhook endpoints (admin only).
+    """
+    return crud_webhook.get_multi(db, skip=skip, limit=limit)
+
+@router.get("/dead-letters")
+def get_dead_letters(
+    limit: int = 100,
+    current_user: dict = Depends(deps.get_current_admin_user)
+) -> List[dict]:
+    """
+    Most recent webhook batches that exhausted their retries (admin only).
+    """
+    return webhooks.get_dead_letters(limit)
+
+@router.delete("/{webhook_id}", response_model=WebhookEndpointInDB)
+def delete_webhook(
+    *,
+    db: Session = Depends(deps.get_db),
+    webhook_id: int,
+    current_user: dict = Depends(deps.get_current_admin_user)
+) -> WebhookEndpoint:
+    """
+    Delete a webhook endpoint (admin only).
+    """
+    webhook = crud_webhook.remove(db, id=webhook_id)
+    if not webhook:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Webhook not found"
+        )
+    return webhook
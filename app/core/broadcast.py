@@ -0,0 +1,140 @@
+import asyncio
+import json
+import logging
+import time
+from collections import defaultdict
+from typing import Callable, Dict, Optional, Set, Tuple
+import redis
+from app.core.cache import get_redis
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "subscription_changes"
+
+def publish_subscription_changes(event_type: str, subscriptions: list) -> None:
+    """
+    Announce committed subscription changes to every API worker. Best effort:
+    the change is already durable (and in the outbox), so a Redis failure
+    only delays live clients until they reconnect.
+    """
+    from app.crud.outbox import event_data
+
+    if not subscriptions:
+        return
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for subscription in subscriptions:
+            pipe.publish(CHANNEL, json.dumps({"type": event_type, "data": event_data(subscription)}))
+        pipe.execute()
+    except redis.RedisError as e:
+        logger.warning(f"Could not publish subscription changes: {e}")
+
+def _load_plan(plan_id: int) -> Optional[dict]:
+    from app.crud import plan as crud_plan
+    from app.db.session import SessionLocal
+    from app.schemas.subscription import PlanInDB
+
+    db = SessionLocal()
+    try:
+        plan = crud_plan.get(db, plan_id)
+        return PlanInDB.model_validate(plan).model_dump(mode="json") if plan else None
+    finally:
+        db.close()
+
+def _async_redis():
+    # Imported on the first SSE connection, not at startup
+    from redis import asyncio as aioredis
+    return aioredis.from_url(settings.REDIS_URL)
+
+class Broadcaster:
+    """
+    Per-process fan-out of subscription changes to connected SSE clients.
+    One Redis pub/sub connection and one reader task serve every client in
+    the worker; each client only holds a small asyncio.Queue, so idle
+    connections cost no threads and no Redis connections.
+    """
+
+    def __init__(self, client_factory: Optional[Callable] = None):
+        self._client_factory = client_factory or _async_redis
+        self._listeners: Dict[int, Set[asyncio.Queue]] = defaultdict(set)
+        self._plans: Dict[int, Tuple[float, Optional[dict]]] = {}
+        self._reader: Optional[asyncio.Task] = None
+        self._ready: Optional[asyncio.Event] = None
+
+    @property
+    def connections(self) -> int:
+        return sum(len(queues) for queues in self._listeners.values())
+
+    async def subscribe(self, user_id: int) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=settings.SSE_QUEUE_SIZE)
+        self._listeners[user_id].add(queue)
+        if (
+            self._reader is None
+            or self._reader.done()
+            or self._reader.get_loop() is not asyncio.get_running_loop()
+        ):
+            self._ready = asyncio.Event()
+            self._reader = asyncio.create_task(self._read())
+        await self._ready.wait()
+        return queue
+
+    def unsubscribe(self, user_id: int, queue: asyncio.Queue) -> None:
+        queues = self._listeners.get(user_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._listeners[user_id]
+
+    async def _plan(self, plan_id: int) -> Optional[dict]:
+        cached = self._plans.get(plan_id)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        plan = await asyncio.to_thread(_load_plan, plan_id)
+        self._plans[plan_id] = (time.monotonic() + settings.SSE_PLAN_CACHE_SECONDS, plan)
+        return plan
+
+    async def _dispatch(self, message: dict) -> None:
+        data = message["data"]
+        queues = self._listeners.get(data["user_id"])
+        if not queues:
+            return
+        # Built once per change, however many clients watch this user
+        subscription = {key: value for key, value in data.items() if key != "subscription_id"}
+        subscription["id"] = data["subscription_id"]
+        subscription["plan"] = await self._plan(data["plan_id"])
+        event = (message["type"], json.dumps(subscription))
+        for queue in list(queues):
+            if queue.full():
+                # Slow client: only the latest state matters
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    async def _read(self) -> None:
+        client = self._client_factory()
+        pubsub = client.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(CHANNEL)
+            self._ready.set()
+            while True:
+                message = await pubsub.get_message(timeout=1.0)
+                if message is None:
+                    continue
+                try:
+                    await self._dispatch(json.loads(message["data"]))
+                except Exception as e:
+                    logger.error(f"Dropping malformed subscription change: {e}")
+        except Exception as e:
+            logger.error(f"Subscription change listener failed: {e}")
+            # Close every stream; clients reconnect and restart the listener
+            for queues in self._listeners.values():
+                for queue in queues:
+                    if queue.full():
+                        queue.get_nowait()
+                    queue.put_nowait(None)
+        finally:
+            self._ready.set()
+            await pubsub.aclose()
+            await client.aclose()
+
+broadcaster = Broadcaster()
@@ -1,9 +1,38 @@
-from typing import Any, Optional
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Optional
 import json
 import redis
 from app.core.config import settings
 
-redis_client = redis.from_url(settings.REDIS_URL)
+@lru_cache(maxsize=None)
+def get_redis() -> redis.Redis:
+    """
+    The process-wide Redis client, created on first use. Cache, rate limiter,
+    circuit breaker and events all share its connection pool.
+    """
+    return redis.from_url(settings.REDIS_URL)
+
+def close_redis(close_connections: bool = True) -> None:
+    """
+    Drop the shared client; the next get_redis() creates a new one. A forked
+    child passes close_connections=False so it never closes sockets that
+    still belong to its parent.
+    """
+    if get_redis.cache_info().currsize:
+        if close_connections:
+            get_redis().close()
+        get_redis.cache_clear()
+
+# Keys per SCAN step and per UNLINK: each call stays short, so the shared
+# Redis (rate limiter, broker) is never blocked for long
+BATCH_SIZE = 1000
+
+def _tag_key(tag: str) -> str:
+    return f"cache-tag:{tag}"
+
+def _batches(keys: List[str]) -> Iterator[List[str]]:
+    for start in range(0, len(keys), BATCH_SIZE):
+        yield keys[start:start + BATCH_SIZE]
 
 class Cache:
     def __init__(self, default_timeout: int = 300):  # 5 minutes default
@@ -11,34 +40,109 @@ class Cache:
 
     def get(self, key: str) -> Optional[Any]:
         """Get value from cache"""
-        data = redis_client.get(key)
+        data = get_redis().get(key)
         if data:
             return json.loads(data)
         return None
 
-    def set(self, key: str, value: Any, timeout: Optional[int] = None) -> None:
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Cached values among `keys`, in one MGET; missing keys are left out"""
+        keys = list(keys)
+        if not keys:
+            return {}
+        values = get_redis().mget(keys)
+        return {key: json.loads(data) for key, data in zip(keys, values) if data}
+
+    def set(self, key: str, value: Any, timeout: Optional[int] = None,
+            tags: Iterable[str] = ()) -> None:
         """Set value in cache"""
+        if tags:
+            self.set_many({key: value}, timeout, tags)
+            return
         timeout = timeout or self.default_timeout
-        redis_client.setex(
+        get_redis().setex(
             key,
             timeout,
             json.dumps(value)
         )
 
+    def set_many(self, values: Dict[str, Any], timeout: Optional[int] = None,
+                 tags: Iterable[str] = ()) -> None:
+        """
+        Set several values in one pipelined round trip. Each key is added to
+        the sets of its `tags`, for invalidate_tags(). A tag set lives as
+        long as its longest-lived key (EXPIRE NX/GT, Redis 7+).
+        """
+        if not values:
+            return
+        timeout = timeout or self.default_timeout
+        pipe = get_redis().pipeline(transaction=False)
+        for key, value in values.items():
+            pipe.setex(key, timeout, json.dumps(value))
+        for tag in tags:
+            pipe.sadd(_tag_key(tag), *values)
+            pipe.expire(_tag_key(tag), timeout, nx=True)
+            pipe.expire(_tag_key(tag), timeout, gt=True)
+        pipe.execute()
+
     def delete(self, key: str) -> None:
         """Delete value from cache"""
-        redis_client.delete(key)
+        get_redis().delete(key)
+
+    def delete_many(self, keys: Iterable[str]) -> int:
+        """Delete keys in batches; UNLINK frees their memory off Redis' main thread"""
+        keys = list(keys)
+        if not keys:
+            return 0
+        pipe = get_redis().pipeline(transaction=False)
+        for batch in _batches(keys):
+            pipe.unlink(*batch)
+        return sum(pipe.execute())
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        """Delete every key cached under any of `tags`, and the tag sets"""
+        pipe = get_redis().pipeline(transaction=True)
+        for tag in tags:
+            pipe.smembers(_tag_key(tag))
+            pipe.delete(_tag_key(tag))
+        # Read and drop each set atomically: a key tagged meanwhile lands in a new set
+        results = pipe.execute()
+        keys = set().union(*results[::2])
+        return self.delete_many(keys)
+
+    def claim_refresh(self, keys: Iterable[str], timeout: int) -> List[str]:
+        """
+        The keys among `keys` this caller should recompute ahead of their
+        expiry: one SET NX lock per key, held for `timeout` seconds, so
+        concurrent readers of a hot key refresh it once, not all at once.
+        """
+        keys = list(keys)
+        if not keys:
+            return []
+        pipe = get_redis().pipeline(transaction=False)
+        for key in keys:
+            pipe.set(f"refresh-lock:{key}", 1, nx=True, ex=timeout)
+        return [key for key, claimed in zip(keys, pipe.execute()) if claimed]
 
-    def clear_pattern(self, pattern: str) -> None:
-        """Clear all keys matching pattern"""
-        keys = redis_client.keys(pattern)
-        if keys:
-            redis_client.delete(*keys)
+    def clear_pattern(self, pattern: str) -> int:
+        """
+        Clear all keys matching pattern. Walks the keyspace with SCAN rather
+        than KEYS, so it costs O(keyspace) overall but never blocks Redis.
+        Prefer tags when the keys to clear are known at write time.
+        """
+        deleted = 0
+        batch = []
+        for key in get_redis().scan_iter(match=pattern, count=BATCH_SIZE):
+            batch.append(key)
+            if len(batch) == BATCH_SIZE:
+                deleted += self.delete_many(batch)
+                batch = []
+        return deleted + self.delete_many(batch)
 
 cache = Cache()
 
 # Cache decorator
-def cached(timeout: Optional[int] = None):
+def cached(timeout: Optional[int] = None, tags: Iterable[str] = ()):
     def decorator(func):
         async def wrapper(*args, **kwargs):
             # Generate cache key from function name and arguments
@@ -53,7 +157,7 @@ def cached(timeout: Optional[int] = None):
             result = await func(*args, **kwargs)
             
             # Store in cache
-            cache.set(key, result, timeout)
+            cache.set(key, result, timeout, tags)
             return result
         return wrapper
     return decorator 
\ No newline at end of file
@@ -1,20 +1,83 @@
 from celery import Celery
+from celery.signals import worker_ready, worker_shutdown
+from kombu import Queue
 from app.core.config import settings
 
 celery_app = Celery(
     "subscription_service",
-    broker=settings.REDIS_URL,
-    backend=settings.REDIS_URL,
-    include=["app.tasks.subscription"]
+    # Broker on its own Redis DB/instance, away from the cache and rate limiter
+    broker=settings.CELERY_BROKER_URL or settings.REDIS_URL,
+    backend=settings.CELERY_RESULT_BACKEND or None,
+    # app.tasks.benchmark is left out: benchmarks/celery_throughput.py adds it
+    # to the workers it starts
+    include=["app.tasks.subscription", "app.tasks.outbox", "app.tasks.webhook", "app.tasks.cache"]
+)
+
+celery_app.conf.update(
+    task_serializer=settings.CELERY_SERIALIZER,
+    result_serializer=settings.CELERY_SERIALIZER,
+    accept_content=[settings.CELERY_SERIALIZER, "json"],
+    worker_prefetch_multiplier=settings.CELERY_PREFETCH_MULTIPLIER,
+    task_acks_late=settings.CELERY_ACKS_LATE,
+    # With late acks a task killed with its worker is redelivered, not lost
+    task_reject_on_worker_lost=settings.CELERY_ACKS_LATE,
+    # Every task here is fire-and-forget; nothing reads results back
+    task_ignore_result=True,
+    task_queues=[
+        Queue(settings.CELERY_BULK_QUEUE),
+        Queue(settings.CELERY_NOTIFY_QUEUE),
+        Queue(settings.CELERY_WEBHOOK_QUEUE),
+    ],
+    task_default_queue=settings.CELERY_BULK_QUEUE,
 )
 
 celery_app.conf.task_routes = {
-    "app.tasks.subscription.*": {"queue": "subscription"}
+    # Latency-sensitive, per-user work gets its own workers
+    "app.tasks.subscription.send_subscription_expiry_notification": {"queue": settings.CELERY_NOTIFY_QUEUE},
+    # Event delivery waits on subscriber endpoints; keep it off the notify workers
+    "app.tasks.outbox.*": {"queue": settings.CELERY_WEBHOOK_QUEUE},
+    "app.tasks.webhook.*": {"queue": settings.CELERY_WEBHOOK_QUEUE},
+    "app.tasks.subscription.*": {"queue": settings.CELERY_BULK_QUEUE},
 }
 
 celery_app.conf.beat_schedule = {
+    "relay-outbox-events": {
+        "task": "app.tasks.outbox.relay_outbox_events",
+        "schedule": settings.OUTBOX_RELAY_INTERVAL_SECONDS,
+        "options": {"expires": settings.OUTBOX_RELAY_INTERVAL_SECONDS},
+    },
+    "dispatch-webhook-events": {
+        "task": "app.tasks.webhook.dispatch_webhook_events",
+        "schedule": settings.WEBHOOK_DISPATCH_INTERVAL_SECONDS,
+        "options": {"expires": settings.WEBHOOK_DISPATCH_INTERVAL_SECONDS},
+    },
+    "expire-due-subscriptions": {
+        "task": "app.tasks.subscription.expire_due_subscriptions",
+        "schedule": settings.EXPIRY_POLL_INTERVAL_SECONDS,
+        # A missed poll is picked up by the next one
+        "options": {"expires": settings.EXPIRY_POLL_INTERVAL_SECONDS},
+    },
+    "warm-cache": {
+        "task": "app.tasks.cache.warm_cache",
+        "schedule": settings.WARMUP_CHECK_INTERVAL_SECONDS,
+        "options": {"expires": settings.WARMUP_CHECK_INTERVAL_SECONDS},
+    },
     "check-expired-subscriptions": {
         "task": "app.tasks.subscription.check_expired_subscriptions",
-        "schedule": 3600.0,  # Run every hour
+        "schedule": settings.EXPIRY_RECONCILE_INTERVAL_SECONDS,  # Reconciliation safety net
+    },
+    "schedule-expiry-notifications": {
+        "task": "app.tasks.subscription.schedule_expiry_notifications",
+        "schedule": settings.EXPIRY_NOTICE_SCAN_INTERVAL_SECONDS,
     }
-} 
\ No newline at end of file
+}
+
+@worker_ready.connect
+def _start_heartbeat(sender, **kwargs):
+    from app.core.heartbeat import worker_heartbeat
+    worker_heartbeat.start(sender.hostname)
+
+@worker_shutdown.connect
+def _stop_heartbeat(**kwargs):
+    from app.core.heartbeat import worker_heartbeat
+    worker_heartbeat.stop()
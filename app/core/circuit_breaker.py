@@ -1,9 +1,6 @@
 from enum import Enum
 from datetime import datetime, timedelta
-import redis
-from app.core.config import settings
-
-redis_client = redis.from_url(settings.REDIS_URL)
+from app.core.cache import get_redis
 
 class CircuitState(Enum):
     CLOSED = "CLOSED"  # Normal operation
@@ -27,28 +24,28 @@ class CircuitBreaker:
         self._last_failure_key = f"circuit:{name}:last_failure"
 
     def _get_state(self) -> CircuitState:
-        state = redis_client.get(self._state_key)
+        state = get_redis().get(self._state_key)
         if not state:
             return CircuitState.CLOSED
         return CircuitState(state.decode())
 
     def _set_state(self, state: CircuitState) -> None:
-        redis_client.set(self._state_key, state.value)
+        get_redis().set(self._state_key, state.value)
 
     def _increment_failures(self) -> None:
-        redis_client.incr(self._failure_count_key)
-        redis_client.set(self._last_failure_key, datetime.utcnow().isoformat())
+        get_redis().incr(self._failure_count_key)
+        get_redis().set(self._last_failure_key, datetime.utcnow().isoformat())
 
     def _reset_failures(self) -> None:
-        redis_client.delete(self._failure_count_key)
-        redis_client.delete(self._last_failure_key)
+        get_redis().delete(self._failure_count_key)
+        get_redis().delete(self._last_failure_key)
 
     def _get_failure_count(self) -> int:
-        count = redis_client.get(self._failure_count_key)
+        count = get_redis().get(self._failure_count_key)
         return int(count) if count else 0
 
     def _should_try_reset(self) -> bool:
-        last_failure = redis_client.get(self._last_failure_key)
+        last_failure = get_redis().get(self._last_failure_key)
         if not last_failure:
             return True
         
@@ -0,0 +1,196 @@
+import zlib
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Optional, Tuple
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # optional: br is only offered when installed
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional: zstd is only offered when installed
+    zstandard = None
+
+class Compressor(ABC):
+    """Streaming compressor: compress() returns bytes decodable so far"""
+
+    @abstractmethod
+    def compress(self, data: bytes) -> bytes:
+        ...
+
+    @abstractmethod
+    def finish(self) -> bytes:
+        ...
+
+    @abstractmethod
+    def compress_all(self, data: bytes) -> bytes:
+        """Whole body at once, without the per-chunk flush"""
+
+class GzipCompressor(Compressor):
+    def __init__(self, level: int):
+        self._zlib = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._zlib.flush()
+
+    def compress_all(self, data: bytes) -> bytes:
+        return self._zlib.compress(data) + self._zlib.flush()
+
+class BrotliCompressor(Compressor):
+    def __init__(self, level: int):
+        self._brotli = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._brotli.process(data) + self._brotli.flush()
+
+    def finish(self) -> bytes:
+        return self._brotli.finish()
+
+    def compress_all(self, data: bytes) -> bytes:
+        return self._brotli.process(data) + self._brotli.finish()
+
+class ZstdCompressor(Compressor):
+    def __init__(self, level: int):
+        self._zstd = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._zstd.compress(data) + self._zstd.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._zstd.flush()
+
+    def compress_all(self, data: bytes) -> bytes:
+        return self._zstd.compress(data) + self._zstd.flush()
+
+def available_encodings() -> Dict[str, Tuple[Callable[[int], Compressor], int]]:
+    """Encoding -> (compressor factory, level), in server preference order"""
+    encodings: Dict[str, Tuple[Callable[[int], Compressor], int]] = {}
+    if zstandard is not None:
+        encodings["zstd"] = (ZstdCompressor, settings.COMPRESSION_ZSTD_LEVEL)
+    if brotli is not None:
+        encodings["br"] = (BrotliCompressor, settings.COMPRESSION_BROTLI_LEVEL)
+    encodings["gzip"] = (GzipCompressor, settings.COMPRESSION_GZIP_LEVEL)
+    return encodings
+
+def negotiate(accept_encoding: str, offered: List[str]) -> Optional[str]:
+    """Best of `offered` (in our order) that Accept-Encoding allows; None for identity"""
+    qualities: Dict[str, float] = {}
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        qualities[name.strip()] = q
+    best, best_q = None, 0.0
+    for encoding in offered:
+        q = qualities.get(encoding, qualities.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+def _compressible(content_type: str) -> bool:
+    media_type = content_type.split(";")[0].strip().lower()
+    if media_type == "text/event-stream":
+        # Idle SSE streams would each pin a compressor's window in memory
+        return False
+    return (
+        media_type.startswith("text/")
+        or media_type.endswith(("/json", "+json", "/xml", "+xml", "/javascript"))
+    )
+
+class CompressionMiddleware:
+    """
+    Pure ASGI response compression: zstd, br or gzip by Accept-Encoding.
+    Complete bodies under `minimum_size` go out as they are; streamed bodies
+    are compressed chunk by chunk with a flush after each, so clients still
+    receive every chunk as soon as it is sent.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: Optional[int] = None):
+        self.app = app
+        self.minimum_size = settings.COMPRESSION_MINIMUM_SIZE if minimum_size is None else minimum_size
+        self.encodings = available_encodings()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""), list(self.encodings))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        factory, level = self.encodings[encoding]
+        await _CompressedResponse(self.app, encoding, factory, level, self.minimum_size)(scope, receive, send)
+
+class _CompressedResponse:
+    def __init__(self, app: ASGIApp, encoding: str, factory, level: int, minimum_size: int):
+        self.app = app
+        self.encoding = encoding
+        self.factory = factory
+        self.level = level
+        self.minimum_size = minimum_size
+        self.send: Send = None
+        self.start: Optional[Message] = None
+        self.compressor: Optional[Compressor] = None
+        self.passthrough = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_wrapper)
+
+    async def send_wrapper(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            self.passthrough = (
+                "content-encoding" in headers
+                or message["status"] in (204, 304)
+                or not _compressible(headers.get("content-type", ""))
+            )
+            if self.passthrough:
+                await self.send(message)
+            else:
+                # Held until the first body chunk shows whether it's worth it
+                self.start = message
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.start is not None:
+            start, self.start = self.start, None
+            if not more_body and len(body) < self.minimum_size:
+                self.passthrough = True
+                await self.send(start)
+                await self.send(message)
+                return
+            headers = MutableHeaders(raw=start["headers"])
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            self.compressor = self.factory(self.level)
+            if more_body:
+                del headers["Content-Length"]
+                body = self.compressor.compress(body)
+            else:
+                body = self.compressor.compress_all(body)
+                headers["Content-Length"] = str(len(body))
+            await self.send(start)
+            await self.send({"type": "http.response.body", "body": body, "more_body": more_body})
+            return
+
+        body = self.compressor.compress(body) if body else b""
+        if not more_body:
+            body += self.compressor.finish()
+        await self.send({"type": "http.response.body", "body": body, "more_body": more_body})
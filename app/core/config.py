@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 from pydantic_settings import BaseSettings
 from pydantic import AnyHttpUrl, validator
 
@@ -19,6 +19,40 @@ class Settings(BaseSettings):
 
     # Database
     DATABASE_URL: str
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 5
+    DB_POOL_TIMEOUT: float = 10.0
+    DB_POOL_RECYCLE: int = 1800  # seconds, -1 disables
+    DB_POOL_PRE_PING: bool = False
+    DB_POOL_WAIT_WARN_MS: float = 100.0
+    DB_STATEMENT_TIMEOUT_MS: int = 0  # 0 disables
+    DB_USE_NULLPOOL: bool = False
+    DB_PGBOUNCER_MODE: bool = False
+
+    # Read replica
+    READ_REPLICA_URL: Optional[str] = None
+    REPLICA_MAX_LAG_SECONDS: float = 5.0
+    REPLICA_LAG_CHECK_INTERVAL: float = 5.0
+    READ_YOUR_WRITES_SECONDS: int = 10
+
+    # Subscription writes
+    SUBSCRIPTION_WRITE_RETRIES: int = 3
+
+    # Expiry scheduling
+    EXPIRY_POLL_INTERVAL_SECONDS: float = 5.0
+    EXPIRY_BATCH_SIZE: int = 500
+    EXPIRY_RECONCILE_INTERVAL_SECONDS: float = 3600.0
+
+    # Expiry notifications
+    EXPIRY_NOTICE_DAYS: int = 3
+    EXPIRY_NOTICE_SCAN_INTERVAL_SECONDS: float = 3600.0
+    NOTIFICATION_BATCH_SIZE: int = 100
+    NOTIFICATION_TRANSPORT: str = "file"  # file or smtp
+    NOTIFICATION_RATE_LIMIT: int = 50  # messages per second per transport
+    NOTIFICATION_FILE_PATH: str = "notifications.log"
+    SMTP_HOST: str = "localhost"
+    SMTP_PORT: int = 1025
+    SMTP_FROM: str = "no-reply@example.com"
 
     # JWT
     SECRET_KEY: str
@@ -28,10 +62,96 @@ class Settings(BaseSettings):
     # Redis
     REDIS_URL: str
 
+    # Outbox relay
+    OUTBOX_STREAM: str = "subscription-events"
+    OUTBOX_STREAM_MAXLEN: int = 1_000_000  # approximate trim
+    OUTBOX_RELAY_BATCH_SIZE: int = 1000
+    OUTBOX_RELAY_INTERVAL_SECONDS: float = 1.0
+
+    # Webhooks
+    WEBHOOK_DISPATCH_INTERVAL_SECONDS: float = 1.0
+    WEBHOOK_DISPATCH_COUNT: int = 1000  # stream entries read per dispatch
+    WEBHOOK_BATCH_SIZE: int = 100  # events per POST
+    WEBHOOK_TIMEOUT_SECONDS: float = 10.0
+    WEBHOOK_MAX_CONNECTIONS: int = 100
+    WEBHOOK_MAX_ATTEMPTS: int = 8
+    WEBHOOK_RETRY_BASE_SECONDS: float = 10.0
+    WEBHOOK_RETRY_MAX_SECONDS: float = 3600.0
+    WEBHOOK_CLAIM_IDLE_SECONDS: float = 60.0
+    WEBHOOK_DEAD_LETTER_MAX: int = 10000
+
+    # Server-Sent Events
+    SSE_KEEPALIVE_SECONDS: float = 15.0
+    SSE_QUEUE_SIZE: int = 16
+    SSE_PLAN_CACHE_SECONDS: float = 60.0
+
+    # Entitlement cache (batch lookups)
+    ENTITLEMENT_CACHE_SECONDS: int = 60
+    ENTITLEMENT_LOOKUP_MAX_USERS: int = 1000
+    # A hit this close to expiry is recomputed by one reader; 0 disables
+    ENTITLEMENT_REFRESH_AHEAD_SECONDS: int = 10
+    # Share of cache-hit lookups that refresh the users' recency for warm-up
+    # (misses always do); each one costs a sorted-set write
+    ENTITLEMENT_RECENT_SAMPLE_RATE: float = 0.01
+
+    # HTTP caching (ETag version markers, plan catalog Cache-Control)
+    ETAG_VERSION_TTL_SECONDS: int = 3600
+    PLANS_CACHE_MAX_AGE: int = 60
+    PLANS_STALE_WHILE_REVALIDATE: int = 300
+
+    # Response compression (zstd and br only when their packages are installed)
+    COMPRESSION_MINIMUM_SIZE: int = 1024  # bytes; smaller complete bodies go out as-is
+    COMPRESSION_GZIP_LEVEL: int = 5
+    COMPRESSION_BROTLI_LEVEL: int = 4
+    COMPRESSION_ZSTD_LEVEL: int = 3
+
+    # Celery
+    CELERY_BROKER_URL: Optional[str] = None  # defaults to REDIS_URL
+    CELERY_RESULT_BACKEND: Optional[str] = None  # results disabled
+    CELERY_SERIALIZER: str = "msgpack"
+    CELERY_PREFETCH_MULTIPLIER: int = 4
+    CELERY_ACKS_LATE: bool = True
+    CELERY_BULK_QUEUE: str = "subscription.bulk"
+    CELERY_NOTIFY_QUEUE: str = "subscription.notify"
+    CELERY_WEBHOOK_QUEUE: str = "subscription.webhook"  # outbox relay and webhook delivery
+    CELERY_HEARTBEAT_INTERVAL_SECONDS: float = 10.0  # written to Redis by each worker
+
+    # Health checks (/health/ready): probed concurrently, result cached per process
+    HEALTH_CACHE_SECONDS: float = 2.0
+    HEALTH_PROBE_TIMEOUT_SECONDS: float = 1.0
+    # Connect/socket/statement timeouts inside each probe; keep them below
+    # HEALTH_PROBE_TIMEOUT_SECONDS so a timed-out probe's thread still ends
+    HEALTH_PROBE_IO_TIMEOUT_SECONDS: float = 0.8
+
+    # Rate limiting
+    RATE_LIMIT_REQUESTS: int = 60
+
     # Application
     DEBUG: bool = False
     ENVIRONMENT: str = "development"
 
+    # Server (python -m app.server: gunicorn master, uvicorn workers)
+    WEB_BIND: str = "0.0.0.0:8000"
+    WEB_WORKERS: Optional[int] = None  # defaults to the usable CPU count
+    WEB_GRACEFUL_TIMEOUT: int = 30  # seconds for in-flight requests on reload/shutdown
+    WEB_KEEPALIVE: int = 5
+    WEB_PIDFILE: str = "/tmp/subscription-service.pid"
+
+    # Per-worker warm-up at startup, before the worker accepts requests
+    WARMUP_ENABLED: bool = True
+    WARMUP_DB_CONNECTIONS: int = 4  # opened into the pool (capped at DB_POOL_SIZE)
+    WARMUP_REDIS_CONNECTIONS: int = 4
+    # Shared cache warm-up when Redis comes up empty (deploy, failover)
+    WARMUP_RECENT_USERS: int = 10000  # entitlements preloaded, most recently looked up first
+    WARMUP_CHECK_INTERVAL_SECONDS: float = 30.0
+
+    # Profiling
+    PROFILING_ENABLED: bool = False
+    PROFILING_MAX_SECONDS: int = 60
+    PROFILING_TOKEN_EXPIRE_SECONDS: int = 300
+    PROFILING_STATS_LIMIT: int = 50
+    PROFILING_RESULT_SECONDS: int = 3600  # per-request stats kept in Redis
+
     class Config:
         case_sensitive = True
         env_file = ".env"
@@ -0,0 +1,144 @@
+import json
+import logging
+import random
+import time
+from typing import Dict, Iterable, List, Tuple
+import redis
+from app.core.cache import cache as shared_cache, get_redis
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Cached for users without an active subscription, so they don't miss every time
+NO_ENTITLEMENT: dict = {}
+# Hash of plan id -> feature_bits. Kept apart from the per-user entries so a
+# plan's feature change needs one DEL, not one per subscriber.
+PLAN_FEATURES_KEY = "entitlement:plan_features"
+# Field of the plan feature hash holding its expiry time, for refresh-ahead
+EXPIRES_AT_FIELD = "expires_at"
+# Sorted set of user id -> last lookup time, capped at WARMUP_RECENT_USERS
+RECENT_USERS_KEY = "entitlement:recent"
+
+def _key(user_id: int) -> str:
+    return f"entitlement:{user_id}"
+
+def entitlement_data(subscription) -> dict:
+    """Compact view of an active subscription: what a caller needs to gate access"""
+    return {
+        "plan_id": subscription.plan_id,
+        "status": subscription.status.value,
+        "end_date": subscription.end_date.isoformat(),
+    }
+
+def _recent_pipe(pipe, user_ids: Iterable[int]) -> None:
+    pipe.zadd(RECENT_USERS_KEY, dict.fromkeys(user_ids, time.time()))
+    pipe.zremrangebyrank(RECENT_USERS_KEY, 0, -settings.WARMUP_RECENT_USERS - 1)
+
+def get_cached(user_ids: List[int]) -> Tuple[Dict[int, dict], Dict[int, int]]:
+    """
+    Cached entitlements among `user_ids` (absent users are cache misses) and
+    the cached feature_bits per plan id, in one round trip. Misses are
+    recorded as recently active when they are cached again; hits only for an
+    ENTITLEMENT_RECENT_SAMPLE_RATE sample of lookups.
+
+    Refresh-ahead: a hit within ENTITLEMENT_REFRESH_AHEAD_SECONDS of expiry
+    is returned as a miss to the one caller that claims its refresh, so a
+    key read steadily is reloaded before it expires and never goes cold.
+    The expiry time is stored with each value, so this costs no PTTL calls.
+    """
+    if not user_ids:
+        return {}, {}
+    keys = [_key(user_id) for user_id in user_ids]
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        pipe.mget(keys)
+        pipe.hgetall(PLAN_FEATURES_KEY)
+        if random.random() < settings.ENTITLEMENT_RECENT_SAMPLE_RATE:
+            _recent_pipe(pipe, user_ids)
+        values, plan_bits, *_ = pipe.execute()
+    except redis.RedisError as e:
+        logger.warning(f"Entitlement cache unavailable: {e}")
+        return {}, {}
+    cached = {}
+    for user_id, value in zip(user_ids, values):
+        entry = json.loads(value) if value is not None else None
+        # [expires_at, entitlement]; anything else predates that format: a miss
+        if isinstance(entry, list):
+            cached[user_id] = entry
+    plan_bits = {key.decode(): int(value) for key, value in plan_bits.items()}
+    plan_expires_at = plan_bits.pop(EXPIRES_AT_FIELD, None)
+
+    refresh_ahead = settings.ENTITLEMENT_REFRESH_AHEAD_SECONDS
+    expiring = set()
+    if refresh_ahead:
+        soon = time.time() + refresh_ahead
+        due = [_key(user_id) for user_id, (expires_at, _) in cached.items() if expires_at < soon]
+        if plan_expires_at is not None and plan_expires_at < soon:
+            due.append(PLAN_FEATURES_KEY)
+        try:
+            expiring = set(shared_cache.claim_refresh(due, refresh_ahead))
+        except redis.RedisError as e:
+            logger.warning(f"Could not claim entitlement refresh: {e}")
+    found = {
+        user_id: entitlement
+        for user_id, (_, entitlement) in cached.items()
+        if _key(user_id) not in expiring
+    }
+    if PLAN_FEATURES_KEY in expiring:
+        # Empty: the caller reloads and re-caches the whole map
+        return found, {}
+    return found, {int(plan_id): bits for plan_id, bits in plan_bits.items()}
+
+def recent_user_ids(limit: int) -> List[int]:
+    """Users whose entitlements were looked up most recently, newest first"""
+    return [int(user_id) for user_id in get_redis().zrevrange(RECENT_USERS_KEY, 0, limit - 1)]
+
+def cache(entitlements: Dict[int, dict], record_recent: bool = False) -> None:
+    """
+    Cache entitlements as [expires_at, entitlement]. With `record_recent`
+    (lookup misses, not warm-up) the users are also marked recently active.
+    """
+    if not entitlements:
+        return
+    expires_at = int(time.time()) + settings.ENTITLEMENT_CACHE_SECONDS
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for user_id, entitlement in entitlements.items():
+            pipe.setex(_key(user_id), settings.ENTITLEMENT_CACHE_SECONDS, json.dumps([expires_at, entitlement]))
+        if record_recent:
+            _recent_pipe(pipe, entitlements)
+        pipe.execute()
+    except redis.RedisError as e:
+        logger.warning(f"Could not cache entitlements: {e}")
+
+def invalidate(user_ids: Iterable[int]) -> None:
+    """
+    Drop cached entitlements after a committed write. A lookup that read the
+    old row just before the commit can still re-cache it, so the TTL bounds
+    how long such an entry lives.
+    """
+    keys = [_key(user_id) for user_id in set(user_ids)]
+    if not keys:
+        return
+    try:
+        get_redis().delete(*keys)
+    except redis.RedisError as e:
+        logger.warning(f"Could not invalidate entitlements: {e}")
+
+def cache_plan_features(plan_bits: Dict[int, int]) -> None:
+    if not plan_bits:
+        return
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        expires_at = int(time.time()) + settings.ENTITLEMENT_CACHE_SECONDS
+        pipe.hset(PLAN_FEATURES_KEY, mapping={**plan_bits, EXPIRES_AT_FIELD: expires_at})
+        pipe.expire(PLAN_FEATURES_KEY, settings.ENTITLEMENT_CACHE_SECONDS)
+        pipe.execute()
+    except redis.RedisError as e:
+        logger.warning(f"Could not cache plan features: {e}")
+
+def invalidate_plan_features() -> None:
+    try:
+        get_redis().delete(PLAN_FEATURES_KEY)
+    except redis.RedisError as e:
+        logger.warning(f"Could not invalidate plan features: {e}")
@@ -0,0 +1,63 @@
+import logging
+import secrets
+from typing import TYPE_CHECKING, List, Optional
+import redis
+from app.core.cache import get_redis
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+if TYPE_CHECKING:
+    # Type only: CRUD (and so the Celery worker) imports this module
+    from fastapi import Request
+
+# Version markers: random tokens replaced on every write to what they cover.
+# Random rather than counters, so a marker lost from Redis never comes back
+# with a value an old ETag could match.
+CATALOG_KEY = "version:plans"
+
+def subscription_key(user_id: int) -> str:
+    return f"version:subscription:{user_id}"
+
+def get_versions(keys: List[str]) -> Optional[List[str]]:
+    """
+    Current marker per key, creating missing ones, in one round trip. Read
+    them before the data they cover: a write landing in between then only
+    costs the client one extra full response. None if Redis is unavailable.
+    """
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for key in keys:
+            pipe.set(key, secrets.token_hex(8), nx=True, ex=settings.ETAG_VERSION_TTL_SECONDS)
+        pipe.mget(keys)
+        return [value.decode() for value in pipe.execute()[-1]]
+    except redis.RedisError as e:
+        logger.warning(f"Could not read version markers: {e}")
+        return None
+
+def bump(keys: List[str]) -> None:
+    """Replace the markers after a committed write; old ETags stop matching"""
+    if not keys:
+        return
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for key in keys:
+            pipe.set(key, secrets.token_hex(8), ex=settings.ETAG_VERSION_TTL_SECONDS)
+        pipe.execute()
+    except redis.RedisError as e:
+        # Clients may see 304s for the old data until the marker's TTL ends
+        logger.warning(f"Could not bump version markers: {e}")
+
+def make_etag(*parts) -> str:
+    # Weak: the same version may be sent with different encodings
+    return 'W/"' + ".".join(str(part) for part in parts) + '"'
+
+def matches(request: "Request", etag: str) -> bool:
+    """If-None-Match check (weak comparison)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    bare = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == bare for tag in header.split(","))
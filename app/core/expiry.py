@@ -0,0 +1,63 @@
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+import redis
+from app.core.cache import get_redis
+
+logger = logging.getLogger(__name__)
+
+def _timestamp(value: datetime) -> float:
+    # end_date is stored as naive UTC
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+class ExpirySchedule:
+    """
+    Redis sorted set of subscription ids scored by their end_date timestamp.
+    Subscription writes keep it current; a frequent poller claims the ids
+    that are due. Missing or stale entries are harmless: the hourly
+    reconciliation scan still expires anything the schedule missed.
+    """
+
+    def __init__(self, key: str = "subscription_expiries"):
+        self.key = key
+
+    def schedule(self, subscription_id: int, end_date: datetime) -> None:
+        try:
+            get_redis().zadd(self.key, {subscription_id: _timestamp(end_date)})
+        except redis.RedisError as e:
+            logger.warning(f"Could not schedule expiry of subscription {subscription_id}: {e}")
+
+    def schedule_many(self, end_dates: Dict[int, datetime]) -> None:
+        if not end_dates:
+            return
+        try:
+            get_redis().zadd(self.key, {i: _timestamp(end_date) for i, end_date in end_dates.items()})
+        except redis.RedisError as e:
+            logger.warning(f"Could not schedule expiry of {len(end_dates)} subscriptions: {e}")
+
+    def unschedule(self, subscription_id: int) -> None:
+        try:
+            get_redis().zrem(self.key, subscription_id)
+        except redis.RedisError as e:
+            logger.warning(f"Could not unschedule expiry of subscription {subscription_id}: {e}")
+
+    def claim_due(self, limit: int, now: Optional[datetime] = None) -> List[int]:
+        """
+        Remove and return up to `limit` ids whose end_date has passed. Only
+        due entries are read, so an idle poll writes nothing. An id counts
+        as claimed only if this caller's ZREM removed it, so concurrent
+        pollers never claim the same id.
+        """
+        cutoff = _timestamp(now or datetime.utcnow())
+        due = get_redis().zrangebyscore(self.key, "-inf", cutoff, start=0, num=limit)
+        if not due:
+            return []
+        pipe = get_redis().pipeline(transaction=False)
+        for member in due:
+            pipe.zrem(self.key, member)
+        return [int(member) for member, removed in zip(due, pipe.execute()) if removed]
+
+    def pending(self) -> int:
+        return get_redis().zcard(self.key)
+
+expiry_schedule = ExpirySchedule()
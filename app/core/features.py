@@ -0,0 +1,13 @@
+import json
+from typing import List, Optional
+
+def parse_keys(features: Optional[str]) -> List[str]:
+    """Feature keys from a plan's features JSON: a list of keys, or an object of key -> enabled"""
+    if not features:
+        return []
+    value = json.loads(features)
+    if isinstance(value, dict):
+        return [key for key, enabled in value.items() if enabled]
+    if isinstance(value, list) and all(isinstance(key, str) for key in value):
+        return value
+    raise ValueError("Features must be a JSON list of keys or an object of key -> bool")
@@ -0,0 +1,117 @@
+import asyncio
+import logging
+import time
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional
+import redis
+from starlette.concurrency import run_in_threadpool
+from app.core.cache import get_redis
+from app.core.config import settings
+from app.core.heartbeat import live_workers
+from app.db.session import get_probe_engine, pool_status
+
+logger = logging.getLogger(__name__)
+
+# Dependencies the API cannot serve without; a missing Celery worker only
+# delays background work, so it degrades the report without failing it
+CRITICAL = ("database", "redis")
+
+def probe_database() -> Dict[str, Any]:
+    engine = get_probe_engine()
+    with engine.begin() as conn:
+        if engine.dialect.name == "postgresql":
+            # SET LOCAL: also safe behind PgBouncer in transaction pooling mode
+            timeout_ms = int(settings.HEALTH_PROBE_IO_TIMEOUT_SECONDS * 1000)
+            conn.exec_driver_sql(f"SET LOCAL statement_timeout = {timeout_ms}")
+        conn.exec_driver_sql("SELECT 1")
+    status = pool_status()
+    capacity = status.get("size", 0) + status.get("max_overflow", 0)
+    if capacity > 0:
+        status["saturation"] = round(status["checked_out"] / capacity, 3)
+    return {"pool": status}
+
+@lru_cache(maxsize=None)
+def _probe_redis_client() -> redis.Redis:
+    # Own client with short timeouts; PING on the shared one could block for
+    # as long as its socket allows
+    timeout = settings.HEALTH_PROBE_IO_TIMEOUT_SECONDS
+    return redis.from_url(
+        settings.REDIS_URL, socket_connect_timeout=timeout, socket_timeout=timeout, max_connections=2
+    )
+
+def _redis_pool_stats(pool) -> Dict[str, Any]:
+    stats: Dict[str, Any] = {"max_connections": pool.max_connections}
+    # Internals of redis-py's ConnectionPool; pools without them omit the counts
+    in_use = getattr(pool, "_in_use_connections", None)
+    available = getattr(pool, "_available_connections", None)
+    if in_use is not None and available is not None:
+        stats.update(in_use=len(in_use), idle=len(available))
+    return stats
+
+def probe_redis() -> Dict[str, Any]:
+    _probe_redis_client().ping()
+    return {"pool": _redis_pool_stats(get_redis().connection_pool)}
+
+def probe_celery() -> Dict[str, Any]:
+    workers = live_workers()
+    if not workers:
+        raise RuntimeError("No worker heartbeat")
+    return {"workers": workers}
+
+PROBES: Dict[str, Callable[[], Dict[str, Any]]] = {
+    "database": probe_database,
+    "redis": probe_redis,
+    "celery": probe_celery,
+}
+
+class HealthChecker:
+    """
+    Probes every dependency concurrently, each in a worker thread under its
+    own timeout, and keeps the report for HEALTH_CACHE_SECONDS. Within that
+    window a probe request costs nothing, and concurrent requests after it
+    share a single round of probes.
+    """
+
+    def __init__(self, probes: Optional[Dict[str, Callable[[], Dict[str, Any]]]] = None):
+        self.probes = probes or PROBES
+        self._report: Optional[Dict[str, Any]] = None
+        self._checked_at = float("-inf")
+        self._lock = asyncio.Lock()
+
+    async def _probe(self, name: str, probe: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            details = await asyncio.wait_for(
+                run_in_threadpool(probe), settings.HEALTH_PROBE_TIMEOUT_SECONDS
+            )
+            result = {"status": "up", **details}
+        except asyncio.TimeoutError:
+            result = {"status": "down", "error": f"timed out after {settings.HEALTH_PROBE_TIMEOUT_SECONDS}s"}
+        except Exception as e:
+            result = {"status": "down", "error": str(e)}
+        result["latency_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        if result["status"] == "down":
+            logger.warning(f"Health probe {name} failed: {result['error']}")
+        return result
+
+    async def check(self) -> Dict[str, Any]:
+        if time.monotonic() - self._checked_at < settings.HEALTH_CACHE_SECONDS:
+            return self._report
+        async with self._lock:
+            # Another request may have refreshed it while this one waited
+            if time.monotonic() - self._checked_at >= settings.HEALTH_CACHE_SECONDS:
+                results = await asyncio.gather(
+                    *(self._probe(name, probe) for name, probe in self.probes.items())
+                )
+                dependencies = dict(zip(self.probes, results))
+                if any(dependencies[name]["status"] == "down" for name in CRITICAL if name in dependencies):
+                    status = "unavailable"
+                elif any(result["status"] == "down" for result in results):
+                    status = "degraded"
+                else:
+                    status = "healthy"
+                self._report = {"status": status, "timestamp": time.time(), "dependencies": dependencies}
+                self._checked_at = time.monotonic()
+        return self._report
+
+health_checker = HealthChecker()
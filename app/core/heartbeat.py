@@ -0,0 +1,63 @@
+import logging
+import socket
+import threading
+import time
+from typing import Optional
+import redis
+from app.core.cache import get_redis
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Sorted set of Celery worker hostname -> time of its last heartbeat
+HEARTBEATS_KEY = "celery:heartbeats"
+
+def max_heartbeat_age() -> float:
+    """A worker that missed three heartbeats in a row counts as gone"""
+    return settings.CELERY_HEARTBEAT_INTERVAL_SECONDS * 3
+
+class WorkerHeartbeat:
+    """
+    Records from a Celery worker's main process that it is alive, every
+    CELERY_HEARTBEAT_INTERVAL_SECONDS, so a health check learns how many
+    workers are up from one Redis read instead of a broadcast to them all.
+    """
+
+    def __init__(self):
+        self.hostname = socket.gethostname()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def beat(self) -> None:
+        now = time.time()
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            pipe.zadd(HEARTBEATS_KEY, {self.hostname: now})
+            pipe.zremrangebyscore(HEARTBEATS_KEY, "-inf", now - max_heartbeat_age())
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Could not record worker heartbeat: {e}")
+
+    def _run(self) -> None:
+        while not self._stop.wait(settings.CELERY_HEARTBEAT_INTERVAL_SECONDS):
+            self.beat()
+
+    def start(self, hostname: Optional[str] = None) -> None:
+        self.hostname = hostname or self.hostname
+        self.beat()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="worker-heartbeat", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        try:
+            get_redis().zrem(HEARTBEATS_KEY, self.hostname)
+        except redis.RedisError as e:
+            logger.warning(f"Could not clear worker heartbeat: {e}")
+
+worker_heartbeat = WorkerHeartbeat()
+
+def live_workers() -> int:
+    """Celery workers that sent a heartbeat recently"""
+    return get_redis().zcount(HEARTBEATS_KEY, time.time() - max_heartbeat_age(), "+inf")
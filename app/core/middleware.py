@@ -0,0 +1,137 @@
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.profiling import PROFILE_HEADER, PROFILE_ID_HEADER, request_profile, store_profile
+from app.core.rate_limit import RateLimiter, rate_limiter
+
+logger = logging.getLogger(__name__)
+
+PROCESS_TIME_HEADER = "X-Process-Time"
+# Load balancer and orchestrator probes: never rate limited (they come from
+# a few addresses, often) and costing no Redis round trip
+UNLIMITED_PATH_PREFIXES = ("/health",)
+
+class RequestMetrics:
+    """Per-route request counts and latency for this worker"""
+
+    def __init__(self):
+        # (method, route template) -> [count, 4xx, 5xx, total ns, max ns]
+        self._routes: Dict[Tuple[str, str], List[int]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, method: str, route: str, status_code: int, duration_ns: int) -> None:
+        with self._lock:
+            stats = self._routes.setdefault((method, route), [0, 0, 0, 0, 0])
+            stats[0] += 1
+            if 400 <= status_code < 500:
+                stats[1] += 1
+            elif status_code >= 500:
+                stats[2] += 1
+            stats[3] += duration_ns
+            stats[4] = max(stats[4], duration_ns)
+
+    def snapshot(self) -> List[dict]:
+        with self._lock:
+            routes = sorted(self._routes.items())
+        return [
+            {
+                "method": method,
+                "route": route,
+                "count": count,
+                "client_errors": client_errors,
+                "server_errors": server_errors,
+                "mean_ms": round(total_ns / count / 1e6, 3),
+                "max_ms": round(max_ns / 1e6, 3),
+            }
+            for (method, route), (count, client_errors, server_errors, total_ns, max_ns) in routes
+        ]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+request_metrics = RequestMetrics()
+
+class RequestPipelineMiddleware:
+    """
+    Rate limiting, error mapping, timing, opt-in profiling and metrics in
+    one pure ASGI layer: a single pass per request, with no extra task or
+    response stream as each BaseHTTPMiddleware layer adds.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        limiter: Optional[RateLimiter] = None,
+        metrics: Optional[RequestMetrics] = None,
+    ):
+        self.app = app
+        self.limiter = limiter or rate_limiter
+        self.metrics = metrics or request_metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter_ns()
+        status_code = 500
+        response_started = False
+        profile = None
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers[PROCESS_TIME_HEADER] = f"{(time.perf_counter_ns() - started) / 1e9:.6f}"
+                if profile is not None:
+                    headers[PROFILE_ID_HEADER] = store_profile(profile)
+            await send(message)
+
+        try:
+            client = scope.get("client")
+            if (
+                not scope["path"].startswith(UNLIMITED_PATH_PREFIXES)
+                and not await self.limiter.allow(client[0] if client else "unknown")
+            ):
+                response = JSONResponse(
+                    status_code=429,
+                    content={"detail": "Too many requests. Please try again later."}
+                )
+                await response(scope, receive, send_wrapper)
+                return
+            token = Headers(scope=scope).get(PROFILE_HEADER)
+            with request_profile(token, scope["method"], scope["path"]) as profile:
+                await self.app(scope, receive, send_wrapper)
+        except Exception as e:
+            if response_started:
+                # Too late for an error response; let the server drop the connection
+                logger.error(f"Error after response started: {e}", exc_info=True)
+                raise
+            if isinstance(e, HTTPException):
+                response = JSONResponse(
+                    status_code=e.status_code, content={"detail": e.detail}, headers=e.headers
+                )
+            else:
+                logger.error(f"Unhandled error: {str(e)}", exc_info=True)
+                response = JSONResponse(status_code=500, content={"detail": "Internal server error"})
+            await response(scope, receive, send_wrapper)
+        finally:
+            self.metrics.record(
+                scope["method"], _route_label(scope), status_code, time.perf_counter_ns() - started
+            )
+
+def _route_label(scope: Scope) -> str:
+    # The router leaves the matched route in the scope; unmatched paths share
+    # one entry so the metrics stay bounded
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    return scope["path"] if "endpoint" in scope else "unmatched"
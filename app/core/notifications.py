@@ -0,0 +1,156 @@
+import json
+import logging
+import smtplib
+import time
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from email.message import EmailMessage
+from typing import Dict, List, Optional, Tuple, Type
+import redis
+from app.core.cache import get_redis
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+def notice_key(subscription_id: int, end_date: datetime) -> str:
+    # Keyed by end date too, so a renewed subscription is notified again
+    end = int(end_date.replace(tzinfo=timezone.utc).timestamp())
+    return f"expiry_notice:{subscription_id}:{end}"
+
+@dataclass
+class ExpiryNotice:
+    subscription_id: int
+    user_id: int
+    email: str
+    plan_name: str
+    end_date: datetime
+
+    @property
+    def dedupe_key(self) -> str:
+        return notice_key(self.subscription_id, self.end_date)
+
+    def subject(self) -> str:
+        return f"Your {self.plan_name} subscription expires on {self.end_date:%Y-%m-%d}"
+
+class Transport(ABC):
+    """Sends a batch of notices; implementations register under `name`"""
+    name: str = ""
+
+    @abstractmethod
+    def send_batch(self, notices: List[ExpiryNotice]) -> None:
+        ...
+
+class FileTransport(Transport):
+    """Appends one JSON line per notice; local stand-in for a mail provider"""
+    name = "file"
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or settings.NOTIFICATION_FILE_PATH
+
+    def send_batch(self, notices: List[ExpiryNotice]) -> None:
+        with open(self.path, "a") as f:
+            for notice in notices:
+                record = asdict(notice)
+                record["end_date"] = notice.end_date.isoformat()
+                record["subject"] = notice.subject()
+                f.write(json.dumps(record) + "\n")
+
+class SMTPTransport(Transport):
+    """Sends every notice in the batch over a single SMTP connection"""
+    name = "smtp"
+
+    def send_batch(self, notices: List[ExpiryNotice]) -> None:
+        with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT, timeout=10) as smtp:
+            for notice in notices:
+                message = EmailMessage()
+                message["From"] = settings.SMTP_FROM
+                message["To"] = notice.email
+                message["Subject"] = notice.subject()
+                message.set_content(
+                    f"Your {notice.plan_name} subscription ends on "
+                    f"{notice.end_date:%Y-%m-%d %H:%M} UTC."
+                )
+                smtp.send_message(message)
+
+TRANSPORTS: Dict[str, Type[Transport]] = {
+    FileTransport.name: FileTransport,
+    SMTPTransport.name: SMTPTransport,
+}
+
+def get_transport(name: Optional[str] = None) -> Transport:
+    name = name or settings.NOTIFICATION_TRANSPORT
+    if name not in TRANSPORTS:
+        raise ValueError(f"Unknown notification transport: {name}")
+    return TRANSPORTS[name]()
+
+class TransportRateLimiter:
+    """
+    Fixed one-second windows in Redis shared by every worker, so a transport
+    never receives more than NOTIFICATION_RATE_LIMIT messages per second.
+    """
+
+    def __init__(self, transport_name: str, per_second: int):
+        self.transport_name = transport_name
+        self.per_second = per_second
+
+    def acquire(self, count: int) -> int:
+        """Block until up to `count` sends are allowed; returns how many were granted"""
+        while True:
+            window = int(time.time())
+            key = f"notify_rate:{self.transport_name}:{window}"
+            pipe = get_redis().pipeline()
+            pipe.incrby(key, count)
+            pipe.expire(key, 2)
+            used = pipe.execute()[0]
+            granted = min(count, self.per_second - (used - count))
+            if granted > 0:
+                if granted < count:
+                    get_redis().decrby(key, count - granted)
+                return granted
+            get_redis().decrby(key, count)
+            time.sleep(max(window + 1 - time.time(), 0.01))
+
+def claim_notices(notices: List[ExpiryNotice], window_seconds: int) -> List[ExpiryNotice]:
+    """SET NX a dedupe key per notice; returns the notices not sent in this window yet"""
+    pipe = get_redis().pipeline(transaction=False)
+    for notice in notices:
+        pipe.set(notice.dedupe_key, 1, nx=True, ex=window_seconds)
+    return [notice for notice, claimed in zip(notices, pipe.execute()) if claimed]
+
+def unnotified(subscriptions: List[Tuple[int, datetime]]) -> List[int]:
+    """Ids among (id, end_date) pairs not yet notified for that end date"""
+    pipe = get_redis().pipeline(transaction=False)
+    for subscription_id, end_date in subscriptions:
+        pipe.exists(notice_key(subscription_id, end_date))
+    try:
+        notified = pipe.execute()
+    except redis.RedisError as e:
+        # send_notices dedupes again, so enqueueing all of them is only wasteful
+        logger.warning(f"Could not check sent expiry notices: {e}")
+        notified = [0] * len(subscriptions)
+    return [subscription_id for (subscription_id, _), sent in zip(subscriptions, notified) if not sent]
+
+def release_notices(notices: List[ExpiryNotice]) -> None:
+    """Drop dedupe keys of notices that failed to send so a retry can claim them"""
+    if notices:
+        get_redis().delete(*[notice.dedupe_key for notice in notices])
+
+def send_notices(notices: List[ExpiryNotice], transport: Optional[Transport] = None) -> int:
+    """Dedupe, rate-limit and send; returns the number of notices sent"""
+    transport = transport or get_transport()
+    window = (settings.EXPIRY_NOTICE_DAYS + 1) * 86400
+    pending = claim_notices(notices, window)
+    limiter = TransportRateLimiter(transport.name, settings.NOTIFICATION_RATE_LIMIT)
+    sent = 0
+    while pending:
+        granted = limiter.acquire(len(pending))
+        batch, pending = pending[:granted], pending[granted:]
+        try:
+            transport.send_batch(batch)
+        except Exception:
+            release_notices(batch + pending)
+            raise
+        sent += len(batch)
+    logger.info(f"Sent {sent} expiry notices via {transport.name}")
+    return sent
@@ -0,0 +1,178 @@
+import cProfile
+import functools
+import hashlib
+import hmac
+import inspect
+import io
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, Optional
+import redis
+from fastapi.routing import APIRoute
+from app.core.cache import get_redis
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-Profile-Token"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+# cProfile instance for the request currently being profiled (if any)
+_active_profile: ContextVar[Optional[cProfile.Profile]] = ContextVar(
+    "active_profile", default=None
+)
+
+_CWD = os.getcwd() + os.sep
+
+# Only one sampling run per worker at a time
+_sampling_lock = threading.Lock()
+
+class ProfilerBusyError(Exception):
+    pass
+
+class SamplingProfiler:
+    """
+    Wall-clock sampling profiler for the current worker process.
+
+    Every `interval` seconds the stack of each thread is captured via
+    `sys._current_frames()` and folded into a collapsed stack line, so the
+    output can be fed straight into flamegraph.pl or speedscope.
+    """
+
+    def __init__(self, interval: float = 0.005, max_depth: int = 128):
+        self.interval = interval
+        self.max_depth = max_depth
+
+    def _collapse(self, frame, thread_name: str) -> str:
+        stack = []
+        while frame is not None and len(stack) < self.max_depth:
+            code = frame.f_code
+            filename = code.co_filename.removeprefix(_CWD)
+            stack.append(f"{code.co_name} ({filename}:{code.co_firstlineno})")
+            frame = frame.f_back
+        stack.append(thread_name)
+        return ";".join(reversed(stack))
+
+    def run(self, seconds: float) -> Counter:
+        """Sample all other threads for `seconds` and return stack counts"""
+        if not _sampling_lock.acquire(blocking=False):
+            raise ProfilerBusyError("A sampling profile is already running on this worker")
+        try:
+            own_ident = threading.get_ident()
+            samples: Counter = Counter()
+            deadline = time.perf_counter() + seconds
+            while time.perf_counter() < deadline:
+                names = {t.ident: t.name for t in threading.enumerate()}
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id == own_ident:
+                        continue
+                    samples[self._collapse(frame, names.get(thread_id, str(thread_id)))] += 1
+                time.sleep(self.interval)
+            return samples
+        finally:
+            _sampling_lock.release()
+
+def format_collapsed(samples: Counter) -> str:
+    """Render stack counts in the collapsed-stack (folded) format"""
+    return "\n".join(f"{stack} {count}" for stack, count in samples.most_common())
+
+def _token_signature(method: str, path: str, expires_at: int) -> str:
+    message = f"{method.upper()} {path} {expires_at}".encode()
+    return hmac.new(settings.SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()
+
+def create_profile_token(method: str, path: str, expires_in: Optional[int] = None) -> str:
+    """Create a signed token that enables cProfile for one method/path"""
+    expires_at = int(time.time()) + (expires_in or settings.PROFILING_TOKEN_EXPIRE_SECONDS)
+    return f"{expires_at}.{_token_signature(method, path, expires_at)}"
+
+def verify_profile_token(token: str, method: str, path: str) -> bool:
+    try:
+        expires_at_str, signature = token.split(".", 1)
+        expires_at = int(expires_at_str)
+    except ValueError:
+        return False
+    if expires_at < time.time():
+        return False
+    return hmac.compare_digest(signature, _token_signature(method, path, expires_at))
+
+def _profile_key(profile_id: str) -> str:
+    return f"profile:{profile_id}"
+
+def store_profile(profile: cProfile.Profile) -> str:
+    """
+    Keep the request's stats in Redis for PROFILING_RESULT_SECONDS, so any
+    worker can serve them back, not just the one that ran the request.
+    """
+    output = io.StringIO()
+    stats = pstats.Stats(profile, stream=output)
+    stats.sort_stats("cumulative").print_stats(settings.PROFILING_STATS_LIMIT)
+    profile_id = uuid.uuid4().hex
+    try:
+        get_redis().setex(_profile_key(profile_id), settings.PROFILING_RESULT_SECONDS, output.getvalue())
+    except redis.RedisError as e:
+        logger.warning(f"Could not store request profile: {e}")
+    return profile_id
+
+def get_request_profile(profile_id: str) -> Optional[str]:
+    stats = get_redis().get(_profile_key(profile_id))
+    return stats.decode() if stats is not None else None
+
+def _profiled(call: Callable) -> Callable:
+    """Wrap an endpoint so it runs under the request's cProfile, if any"""
+    if inspect.iscoroutinefunction(call):
+        @functools.wraps(call)
+        async def async_wrapper(*args, **kwargs):
+            profile = _active_profile.get()
+            if profile is None:
+                return await call(*args, **kwargs)
+            profile.enable()
+            try:
+                return await call(*args, **kwargs)
+            finally:
+                profile.disable()
+        return async_wrapper
+
+    @functools.wraps(call)
+    def wrapper(*args, **kwargs):
+        # Sync endpoints run in the threadpool; the context (and so the
+        # active profile) is copied into the worker thread.
+        profile = _active_profile.get()
+        if profile is None:
+            return call(*args, **kwargs)
+        profile.enable()
+        try:
+            return call(*args, **kwargs)
+        finally:
+            profile.disable()
+    return wrapper
+
+class ProfiledRoute(APIRoute):
+    """APIRoute that can run its endpoint under a per-request cProfile"""
+
+    def get_route_handler(self) -> Callable:
+        self.dependant.call = _profiled(self.dependant.call)
+        return super().get_route_handler()
+
+@contextmanager
+def request_profile(token: Optional[str], method: str, path: str) -> Iterator[Optional[cProfile.Profile]]:
+    """
+    Run the request's endpoint under a fresh cProfile when `token` is a valid
+    signed profiling token; yields the profile, or None.
+    """
+    if not settings.PROFILING_ENABLED or not token or not verify_profile_token(token, method, path):
+        yield None
+        return
+    profile = cProfile.Profile()
+    reset_token = _active_profile.set(profile)
+    try:
+        yield profile
+    finally:
+        _active_profile.reset(reset_token)
@@ -1,40 +1,49 @@
-from fastapi import Request, HTTPException
-from fastapi.responses import JSONResponse
-import time
+import asyncio
+import logging
+from typing import Callable, Optional
 import redis
 from app.core.config import settings
 
-redis_client = redis.from_url(settings.REDIS_URL)
+logger = logging.getLogger(__name__)
+
+def _async_redis():
+    # Imported on the first request, not at startup
+    from redis import asyncio as aioredis
+    return aioredis.from_url(settings.REDIS_URL)
 
 class RateLimiter:
-    def __init__(self, requests_per_minute: int = 60):
+    """
+    Fixed one-minute window per client IP, counted in Redis. Uses an asyncio
+    Redis client, so the check never blocks the event loop or waits for a
+    threadpool slot behind sync endpoints.
+    """
+
+    def __init__(self, requests_per_minute: int = 60, client_factory: Optional[Callable] = None):
         self.requests_per_minute = requests_per_minute
+        self._client_factory = client_factory or _async_redis
+        self._client = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _redis(self):
+        # asyncio clients belong to the loop they first ran on
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client, self._loop = self._client_factory(), loop
+        return self._client
 
-    async def __call__(self, request: Request, call_next):
-        # Get client IP
-        client_ip = request.client.host
-        
-        # Create a key for this IP
+    async def allow(self, client_ip: str) -> bool:
+        """Count one request from `client_ip`; False once its window is used up"""
         key = f"rate_limit:{client_ip}"
-        
-        # Get current count
-        current = redis_client.get(key)
-        
-        if current is None:
-            # First request
-            redis_client.setex(key, 60, 1)
-        elif int(current) >= self.requests_per_minute:
-            # Rate limit exceeded
-            raise HTTPException(
-                status_code=429,
-                detail="Too many requests. Please try again later."
-            )
-        else:
-            # Increment counter
-            redis_client.incr(key)
-        
-        # Process the request
-        response = await call_next(request)
-        return response
+        try:
+            # One round trip; MULTI so the first request of a window always
+            # sets the TTL and a counter can never be left without one
+            pipe = self._redis().pipeline(transaction=True)
+            pipe.incr(key)
+            pipe.expire(key, 60, nx=True)
+            current = (await pipe.execute())[0]
+        except redis.RedisError as e:
+            logger.warning(f"Rate limiter unavailable, allowing request: {e}")
+            return True
+        return current <= self.requests_per_minute
 
-rate_limiter = RateLimiter() 
\ No newline at end of file
+rate_limiter = RateLimiter(requests_per_minute=settings.RATE_LIMIT_REQUESTS)
@@ -1,14 +1,22 @@
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Any, Union
-from jose import jwt
-from passlib.context import CryptContext
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# jose (and the cryptography backend it pulls in) and passlib are imported on
+# first use rather than at startup: workers that never handle a login or
+# a token don't pay for them
+
+@lru_cache(maxsize=None)
+def _pwd_context():
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 def create_access_token(
     subject: Union[str, Any], expires_delta: timedelta = None
 ) -> str:
+    from jose import jwt
+
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
@@ -21,8 +29,17 @@ def create_access_token(
     )
     return encoded_jwt
 
+def decode_access_token(token: str) -> dict:
+    """Claims of a valid token; ValueError if it is malformed, forged or expired"""
+    from jose import JWTError, jwt
+
+    try:
+        return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError as e:
+        raise ValueError(str(e)) from e
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return _pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password) 
\ No newline at end of file
+    return _pwd_context().hash(password)
@@ -0,0 +1,124 @@
+import logging
+import time
+from sqlalchemy.pool import QueuePool
+from app.core import entitlements, etag
+from app.core.cache import get_redis
+from app.core.config import settings
+from app.db.session import SessionLocal, get_engine
+
+logger = logging.getLogger(__name__)
+
+# Set (without expiry) by the first warm-up against a Redis; gone means the
+# cache was lost and needs warming again
+WARM_MARKER_KEY = "cache:warm"
+
+def warm_db_pool(connections: int) -> int:
+    """Open up to `connections` pooled connections at once, then return them to the pool"""
+    engine = get_engine()
+    if not isinstance(engine.pool, QueuePool):
+        # NullPool (e.g. behind PgBouncer) keeps nothing to warm
+        return 0
+    connections = min(connections, engine.pool.size())
+    opened = []
+    try:
+        for _ in range(connections):
+            conn = engine.connect()
+            opened.append(conn)
+            conn.exec_driver_sql("SELECT 1")
+    finally:
+        for conn in opened:
+            conn.close()
+    return len(opened)
+
+def warm_redis_pool(connections: int) -> int:
+    """Connect and PING `connections` Redis connections, then release them to the pool"""
+    pool = get_redis().connection_pool
+    opened = []
+    try:
+        for _ in range(connections):
+            conn = pool.get_connection("PING")
+            opened.append(conn)
+            conn.send_command("PING")
+            conn.read_response()
+    finally:
+        for conn in opened:
+            pool.release(conn)
+    return len(opened)
+
+def warm_plan_catalog() -> int:
+    """
+    Load the plan catalog once: compiles its queries, caches the plans'
+    feature bits for entitlement lookups and sets the catalog ETag version.
+    """
+    from app.crud import plan as crud_plan
+
+    db = SessionLocal()
+    try:
+        plans = crud_plan.get_multi(db)
+        entitlements.cache_plan_features(crud_plan.get_feature_bits(db))
+    finally:
+        db.close()
+    etag.get_versions([etag.CATALOG_KEY])
+    return len(plans)
+
+def warm_entitlements(limit: int) -> int:
+    """
+    Cache the entitlements of up to `limit` recently looked-up users, in
+    lookup-sized batches. If the recency set went with the rest of Redis,
+    the users of the newest active subscriptions stand in for it.
+    """
+    from app.crud import subscription as crud_subscription
+
+    db = SessionLocal()
+    try:
+        user_ids = entitlements.recent_user_ids(limit)
+        if not user_ids:
+            user_ids = crud_subscription.get_recently_subscribed_user_ids(db, limit)
+        batch = settings.ENTITLEMENT_LOOKUP_MAX_USERS
+        for start in range(0, len(user_ids), batch):
+            crud_subscription.load_entitlements(db, user_ids[start:start + batch])
+    finally:
+        db.close()
+    return len(user_ids)
+
+def warm_shared_cache(force: bool = False) -> dict:
+    """
+    Preload the Redis cache all processes share: the plan catalog and recent
+    users' entitlements. Only when Redis has lost WARM_MARKER_KEY (it came
+    up empty after a failover or restart) unless forced; the SET NX on the
+    marker also picks one caller among workers starting together.
+    """
+    if not get_redis().set(WARM_MARKER_KEY, 1, nx=True) and not force:
+        return {}
+    started = time.perf_counter()
+    try:
+        warmed = {
+            "plans": warm_plan_catalog(),
+            "entitlements": warm_entitlements(settings.WARMUP_RECENT_USERS),
+        }
+    except Exception:
+        # Let the next check try again
+        get_redis().delete(WARM_MARKER_KEY)
+        raise
+    logger.info(f"Shared cache warmed in {(time.perf_counter() - started) * 1000:.0f}ms: {warmed}")
+    return warmed
+
+def warm_worker() -> None:
+    """
+    Warm one serving process before it takes traffic. Best effort: a
+    dependency that is down is logged and left to the first requests.
+    """
+    started = time.perf_counter()
+    steps = (
+        ("db_connections", warm_db_pool, (settings.WARMUP_DB_CONNECTIONS,)),
+        ("redis_connections", warm_redis_pool, (settings.WARMUP_REDIS_CONNECTIONS,)),
+        ("plans", warm_plan_catalog, ()),
+        ("shared_cache", warm_shared_cache, ()),
+    )
+    warmed = {}
+    for name, step, args in steps:
+        try:
+            warmed[name] = step(*args)
+        except Exception as e:
+            logger.warning(f"Warm-up step {name} failed: {e}")
+    logger.info(f"Worker warmed in {(time.perf_counter() - started) * 1000:.0f}ms: {warmed}")
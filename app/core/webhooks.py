@@ -0,0 +1,227 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+import redis
+from app.core.cache import get_redis
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_HEADER = "X-Webhook-Signature"
+CONSUMER_GROUP = "webhooks"
+DEAD_LETTER_KEY = "webhooks:dead_letter"
+
+if TYPE_CHECKING:
+    import httpx
+    from redis import asyncio as aioredis
+
+def sign(secret: str, body: bytes, timestamp: Optional[int] = None) -> str:
+    """`t=<unix time>,v1=<hex HMAC-SHA256 of "<t>." + body>`; receivers reject stale `t`"""
+    timestamp = timestamp or int(time.time())
+    digest = hmac.new(secret.encode(), f"{timestamp}.".encode() + body, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={digest}"
+
+def verify(secret: str, body: bytes, header: str, tolerance: int = 300) -> bool:
+    parts = dict(part.split("=", 1) for part in header.split(",") if "=" in part)
+    try:
+        timestamp = int(parts["t"])
+    except (KeyError, ValueError):
+        return False
+    if abs(time.time() - timestamp) > tolerance:
+        return False
+    return hmac.compare_digest(sign(secret, body, timestamp), header)
+
+# Endpoint fields needed for delivery; plain tuples so Celery can carry them
+Target = Tuple[int, str, str, int]  # (id, url, secret, max_concurrency)
+
+async def _post(client: "httpx.AsyncClient", target: Target, events: List[dict]) -> Optional[str]:
+    """POST one signed batch; returns an error description, or None on a 2xx"""
+    import httpx
+
+    endpoint_id, url, secret, _ = target
+    body = json.dumps({"events": events}).encode()
+    try:
+        response = await client.post(url, content=body, headers={
+            "Content-Type": "application/json",
+            SIGNATURE_HEADER: sign(secret, body),
+        })
+    except httpx.HTTPError as e:
+        return f"{type(e).__name__}: {e}"
+    if response.is_success:
+        return None
+    return f"HTTP {response.status_code}"
+
+def _slot_keys(target: Target) -> List[str]:
+    return [f"webhooks:slot:{target[0]}:{i}" for i in range(target[3])]
+
+async def _acquire_slot(client, target: Target) -> Optional[Tuple[str, str]]:
+    """
+    Take one of the endpoint's max_concurrency slots, shared by every worker.
+    Each slot is a key claimed with SET NX and a lease, so a worker that dies
+    mid-request frees its slot when the lease runs out. Returns (key, token),
+    or None if Redis is down: delivery then relies on the per-process limit.
+    """
+    keys = _slot_keys(target)
+    token = uuid.uuid4().hex
+    lease_ms = int(settings.WEBHOOK_TIMEOUT_SECONDS * 3000)
+    try:
+        while True:
+            free = [key for key, holder in zip(keys, await client.mget(keys)) if holder is None]
+            random.shuffle(free)
+            for key in free:
+                if await client.set(key, token, nx=True, px=lease_ms):
+                    return key, token
+            await asyncio.sleep(0.01)
+    except redis.RedisError as e:
+        logger.warning(f"Webhook concurrency slot unavailable for endpoint {target[0]}: {e}")
+        return None
+
+async def _release_slot(client, slot: Optional[Tuple[str, str]]) -> None:
+    if slot is None:
+        return
+    key, token = slot
+    try:
+        # Only delete our own claim: after the lease ran out it may be another's
+        async with client.pipeline(transaction=True) as pipe:
+            await pipe.watch(key)
+            if (await pipe.get(key) or b"").decode() == token:
+                pipe.multi()
+                pipe.delete(key)
+                await pipe.execute()
+    except redis.RedisError as e:
+        logger.warning(f"Could not release webhook slot {key}: {e}")
+
+# One event loop, HTTP client and async Redis client per worker process (per
+# thread with a threads pool), reused across tasks so connections to
+# endpoints stay open between dispatches
+_local = threading.local()
+
+def _clients() -> Tuple["httpx.AsyncClient", "aioredis.Redis"]:
+    # Imported here: only the delivery worker needs an HTTP client
+    import httpx
+    from redis import asyncio as aioredis
+
+    if getattr(_local, "http", None) is None:
+        limits = httpx.Limits(max_connections=settings.WEBHOOK_MAX_CONNECTIONS)
+        _local.http = httpx.AsyncClient(limits=limits, timeout=settings.WEBHOOK_TIMEOUT_SECONDS)
+        _local.redis = aioredis.from_url(settings.REDIS_URL)
+    return _local.http, _local.redis
+
+async def deliver(jobs: List[Tuple[Target, List[dict]]]) -> List[Optional[str]]:
+    """
+    Deliver (endpoint, batch) jobs concurrently over the pooled client; each
+    endpoint gets at most its own max_concurrency requests in flight across
+    all workers. Returns an error (or None) per job, in order.
+    """
+    http, redis_client = _clients()
+    semaphores: Dict[int, asyncio.Semaphore] = {}
+    for target, _ in jobs:
+        semaphores.setdefault(target[0], asyncio.Semaphore(target[3]))
+
+    async def run(target: Target, events: List[dict]) -> Optional[str]:
+        async with semaphores[target[0]]:
+            slot = await _acquire_slot(redis_client, target)
+            try:
+                return await _post(http, target, events)
+            finally:
+                await _release_slot(redis_client, slot)
+    return await asyncio.gather(*(run(target, events) for target, events in jobs))
+
+def deliver_batches(jobs: List[Tuple[Target, List[dict]]]) -> List[Optional[str]]:
+    """Synchronous deliver() for Celery tasks, on this worker's own event loop"""
+    if getattr(_local, "pid", None) != os.getpid():
+        # First use, or a forked child: never touch the parent's loop or sockets
+        _local.__dict__.clear()
+        _local.loop = asyncio.new_event_loop()
+        _local.pid = os.getpid()
+    return _local.loop.run_until_complete(deliver(jobs))
+
+def close_clients() -> None:
+    """Close this worker's HTTP and Redis clients and its event loop"""
+    if getattr(_local, "pid", None) != os.getpid():
+        return
+    if getattr(_local, "http", None) is not None:
+        _local.loop.run_until_complete(_local.http.aclose())
+        _local.loop.run_until_complete(_local.redis.aclose())
+    _local.loop.close()
+    _local.__dict__.clear()
+
+def retry_delay(attempt: int) -> float:
+    """Exponential backoff after the `attempt`-th failure, capped"""
+    return min(settings.WEBHOOK_RETRY_BASE_SECONDS * 2 ** (attempt - 1), settings.WEBHOOK_RETRY_MAX_SECONDS)
+
+def dead_letter(target: Target, events: List[dict], attempts: int, error: str) -> None:
+    logger.error(f"Webhook batch to endpoint {target[0]} failed after {attempts} attempts: {error}")
+    pipe = get_redis().pipeline()
+    pipe.lpush(DEAD_LETTER_KEY, json.dumps({
+        "endpoint_id": target[0],
+        "url": target[1],
+        "events": events,
+        "attempts": attempts,
+        "error": error,
+        "failed_at": datetime.utcnow().isoformat(),
+    }))
+    pipe.ltrim(DEAD_LETTER_KEY, 0, settings.WEBHOOK_DEAD_LETTER_MAX - 1)
+    pipe.execute()
+
+def get_dead_letters(limit: int = 100) -> List[dict]:
+    return [json.loads(item) for item in get_redis().lrange(DEAD_LETTER_KEY, 0, limit - 1)]
+
+def read_events(consumer: str, count: int) -> List[Tuple[str, dict]]:
+    """
+    Next events for the webhook consumer group on the subscription events
+    stream. Entries another consumer left unacknowledged for longer than
+    WEBHOOK_CLAIM_IDLE_SECONDS (e.g. a crashed worker) are taken over first.
+    """
+    stream = settings.OUTBOX_STREAM
+    try:
+        get_redis().xgroup_create(stream, CONSUMER_GROUP, id="0", mkstream=True)
+    except redis.ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+    _, entries, *_ = get_redis().xautoclaim(
+        stream, CONSUMER_GROUP, consumer,
+        min_idle_time=int(settings.WEBHOOK_CLAIM_IDLE_SECONDS * 1000), count=count
+    )
+    if len(entries) < count:
+        for _, new_entries in get_redis().xreadgroup(
+            CONSUMER_GROUP, consumer, {stream: ">"}, count=count - len(entries)
+        ) or []:
+            entries += new_entries
+    events = []
+    for entry_id, fields in entries:
+        fields = {key.decode(): value.decode() for key, value in fields.items()}
+        events.append((entry_id.decode(), {
+            "id": int(fields["event_id"]),
+            "type": fields["type"],
+            "data": json.loads(fields["payload"]),
+        }))
+    return events
+
+def ack_events(entry_ids: List[str]) -> None:
+    if entry_ids:
+        get_redis().xack(settings.OUTBOX_STREAM, CONSUMER_GROUP, *entry_ids)
+
+def release_consumer(consumer: str) -> bool:
+    """
+    Remove `consumer` from the group when it has nothing pending, so worker
+    restarts don't pile up consumers. One with pending entries is kept: they
+    would be lost with it, and another worker will claim them instead.
+    """
+    try:
+        for info in get_redis().xinfo_consumers(settings.OUTBOX_STREAM, CONSUMER_GROUP):
+            if info["name"].decode() == consumer and not info["pending"]:
+                get_redis().xgroup_delconsumer(settings.OUTBOX_STREAM, CONSUMER_GROUP, consumer)
+                return True
+    except redis.RedisError as e:
+        logger.warning(f"Could not remove webhook consumer {consumer}: {e}")
+    return False
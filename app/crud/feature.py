@@ -0,0 +1,54 @@
+from typing import Dict, List, Optional
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.core.features import parse_keys
+from app.models.feature import Feature
+
+# Plan.feature_bits is a signed 64-bit column
+MAX_FEATURE_ID = 62
+
+class FeatureRegistryFull(ValueError):
+    """Registering the requested keys would pass MAX_FEATURE_ID"""
+
+def _insert_missing(db: Session, keys: List[str]):
+    """
+    INSERT ... ON CONFLICT DO NOTHING on features.key: keys a concurrent
+    plan write registered first are skipped rather than raising.
+    """
+    # Writes always go to the primary, which shares the replica's dialect
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    return (
+        dialect_insert(Feature)
+        .values([{"key": key} for key in keys])
+        .on_conflict_do_nothing(index_elements=[Feature.key])
+        .returning(Feature.key, Feature.id)
+    )
+
+def get_multi(db: Session) -> List[Feature]:
+    return db.query(Feature).order_by(Feature.id).all()
+
+def get_or_create_ids(db: Session, keys: List[str]) -> Dict[str, int]:
+    """Registry ids for `keys`, registering unknown ones (not committed)"""
+    keys = list(dict.fromkeys(keys))
+    if not keys:
+        return {}
+    ids = dict(db.execute(select(Feature.key, Feature.id).where(Feature.key.in_(keys))).all())
+    new = [key for key in keys if key not in ids]
+    if new:
+        ids.update(db.execute(_insert_missing(db, new)).all())
+        raced = [key for key in new if key not in ids]
+        if raced:
+            ids.update(db.execute(select(Feature.key, Feature.id).where(Feature.key.in_(raced))).all())
+    if max(ids.values()) > MAX_FEATURE_ID:
+        raise FeatureRegistryFull(f"Feature registry is full ({MAX_FEATURE_ID} features)")
+    return ids
+
+def bits_for(db: Session, features: Optional[str]) -> int:
+    """Bitset of a plan's features JSON"""
+    bits = 0
+    for feature_id in get_or_create_ids(db, parse_keys(features)).values():
+        bits |= 1 << feature_id
+    return bits
@@ -0,0 +1,70 @@
+import json
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+from app.models.outbox import OutboxEvent
+from app.models.subscription import Subscription
+
+SUBSCRIPTION_CREATED = "subscription.created"
+SUBSCRIPTION_UPDATED = "subscription.updated"
+SUBSCRIPTION_CANCELLED = "subscription.cancelled"
+SUBSCRIPTION_EXPIRED = "subscription.expired"
+
+def _isoformat(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+def event_data(subscription: Subscription) -> dict:
+    """JSON-safe snapshot of a subscription, as carried by its events"""
+    return {
+        "subscription_id": subscription.id,
+        "user_id": subscription.user_id,
+        "plan_id": subscription.plan_id,
+        "status": subscription.status.value,
+        "start_date": _isoformat(subscription.start_date),
+        "end_date": _isoformat(subscription.end_date),
+        "created_at": _isoformat(subscription.created_at),
+        "updated_at": _isoformat(subscription.updated_at),
+        "cancelled_at": _isoformat(subscription.cancelled_at),
+    }
+
+def record(db: Session, event_type: str, subscriptions: List[Subscription]) -> None:
+    """
+    Add one event per subscription to the current transaction, without
+    committing: the caller's commit makes the change and its events durable
+    together.
+    """
+    if not subscriptions:
+        return
+    now = datetime.utcnow()
+    db.execute(insert(OutboxEvent), [
+        {
+            "event_type": event_type,
+            "subscription_id": subscription.id,
+            "user_id": subscription.user_id,
+            "payload": json.dumps(event_data(subscription)),
+            "created_at": now,
+        }
+        for subscription in subscriptions
+    ])
+
+def claim_batch(db: Session, limit: int) -> list:
+    """
+    Oldest pending events as (id, event_type, user_id, payload) rows, locked
+    with SKIP LOCKED so concurrent relays take disjoint batches (SQLite has
+    no row locks and ignores the clause). Plain rows, no ORM objects: the
+    relay only forwards them.
+    """
+    return db.execute(
+        select(OutboxEvent.id, OutboxEvent.event_type, OutboxEvent.user_id, OutboxEvent.payload)
+        .order_by(OutboxEvent.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    ).all()
+
+def remove(db: Session, event_ids: List[int]) -> None:
+    db.execute(
+        delete(OutboxEvent)
+        .where(OutboxEvent.id.in_(event_ids))
+        .execution_options(synchronize_session=False)
+    )
@@ -1,10 +1,14 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
+from sqlalchemy import delete, insert, select, update as sql_update
 from sqlalchemy.orm import Session
+from app.core import entitlements, etag
+from app.crud import feature as crud_feature
 from app.models.subscription import Plan
 from app.schemas.subscription import PlanCreate, PlanUpdate
 
 def get(db: Session, id: int) -> Optional[Plan]:
-    return db.query(Plan).filter(Plan.id == id).first()
+    # Primary-key lookup; served from the session's identity map when loaded
+    return db.get(Plan, id)
 
 def get_by_name(db: Session, name: str) -> Optional[Plan]:
     return db.query(Plan).filter(Plan.name == name).first()
@@ -12,32 +16,51 @@ def get_by_name(db: Session, name: str) -> Optional[Plan]:
 def get_multi(db: Session, *, skip: int = 0, limit: int = 100) -> List[Plan]:
     return db.query(Plan).offset(skip).limit(limit).all()
 
+def get_feature_bits(db: Session) -> Dict[int, int]:
+    """feature_bits of every plan, by plan id"""
+    return dict(db.execute(select(Plan.id, Plan.feature_bits)).all())
+
 def create(db: Session, *, obj_in: PlanCreate) -> Plan:
-    db_obj = Plan(
-        name=obj_in.name,
-        description=obj_in.description,
-        price=obj_in.price,
-        duration_days=obj_in.duration_days,
-        features=obj_in.features
-    )
-    db.add(db_obj)
+    db_obj = db.scalars(
+        insert(Plan).values(
+            name=obj_in.name,
+            description=obj_in.description,
+            price=obj_in.price,
+            duration_days=obj_in.duration_days,
+            features=obj_in.features,
+            feature_bits=crud_feature.bits_for(db, obj_in.features)
+        ).returning(Plan)
+    ).one()
     db.commit()
-    db.refresh(db_obj)
+    entitlements.invalidate_plan_features()
+    etag.bump([etag.CATALOG_KEY])
     return db_obj
 
 def update(
-    db: Session, *, db_obj: Plan, obj_in: PlanUpdate
-) -> Plan:
+    db: Session, *, id: int, obj_in: PlanUpdate
+) -> Optional[Plan]:
     update_data = obj_in.dict(exclude_unset=True)
-    for field in update_data:
-        setattr(db_obj, field, update_data[field])
-    db.add(db_obj)
+    if "features" in update_data:
+        update_data["feature_bits"] = crud_feature.bits_for(db, update_data["features"])
+    db_obj = db.scalars(
+        sql_update(Plan)
+        .where(Plan.id == id)
+        .values(**update_data)
+        .returning(Plan)
+        .execution_options(populate_existing=True)
+    ).first()
     db.commit()
-    db.refresh(db_obj)
+    entitlements.invalidate_plan_features()
+    etag.bump([etag.CATALOG_KEY])
     return db_obj
 
-def remove(db: Session, *, id: int) -> Plan:
-    obj = db.query(Plan).get(id)
-    db.delete(obj)
+def remove(db: Session, *, id: int) -> Optional[Plan]:
+    obj = db.scalars(
+        delete(Plan)
+        .where(Plan.id == id)
+        .returning(Plan)
+    ).first()
     db.commit()
-    return obj 
\ No newline at end of file
+    entitlements.invalidate_plan_features()
+    etag.bump([etag.CATALOG_KEY])
+    return obj
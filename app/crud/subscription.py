@@ -1,89 +1,324 @@
+import random
+import time
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Callable, Dict, List, Optional, TypeVar
+from sqlalchemy import select, update
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import Session
-from app.models.subscription import Subscription, SubscriptionStatus
+from app.core import entitlements, etag
+from app.core.broadcast import publish_subscription_changes
+from app.core.config import settings
+from app.core.expiry import expiry_schedule
+from app.crud import outbox as crud_outbox
+from app.crud import plan as crud_plan
+from app.db.session import (
+    mark_recent_write,
+    use_primary_after_recent_write,
+    use_primary_after_recent_writes
+)
+from app.models.subscription import Plan, Subscription, SubscriptionStatus
+from app.models.user import User
 from app.schemas.subscription import SubscriptionCreate, SubscriptionUpdate
 
+T = TypeVar("T")
+
 def get(db: Session, id: int) -> Optional[Subscription]:
     return db.query(Subscription).filter(Subscription.id == id).first()
 
 def get_active_subscription(db: Session, user_id: int) -> Optional[Subscription]:
+    use_primary_after_recent_write(db, user_id)
     return db.query(Subscription).filter(
         Subscription.user_id == user_id,
         Subscription.status == SubscriptionStatus.ACTIVE
     ).first()
 
+def load_entitlements(db: Session, user_ids: List[int], record_recent: bool = False) -> Dict[int, dict]:
+    """Entitlements of `user_ids` from one query, cached (NO_ENTITLEMENT if inactive)"""
+    rows = db.execute(
+        select(Subscription.user_id, Subscription.plan_id, Subscription.status, Subscription.end_date)
+        .where(
+            Subscription.user_id.in_(user_ids),
+            Subscription.status == SubscriptionStatus.ACTIVE
+        )
+    ).all()
+    loaded = dict.fromkeys(user_ids, entitlements.NO_ENTITLEMENT)
+    loaded.update((row.user_id, entitlements.entitlement_data(row)) for row in rows)
+    entitlements.cache(loaded, record_recent=record_recent)
+    return loaded
+
+def get_recently_subscribed_user_ids(db: Session, limit: int) -> List[int]:
+    """Users of the newest active subscriptions (primary key order, no sort)"""
+    return list(db.scalars(
+        select(Subscription.user_id)
+        .where(Subscription.status == SubscriptionStatus.ACTIVE)
+        .order_by(Subscription.id.desc())
+        .limit(limit)
+    ))
+
+def get_entitlements(db: Session, user_ids: List[int]) -> Dict[int, Optional[dict]]:
+    """
+    Entitlement (or None) per user: cache hits from one round trip, the
+    misses from a single query over all of them, written back to the cache
+    in one pipeline. feature_bits come from the separately cached plan map.
+    """
+    user_ids = list(dict.fromkeys(user_ids))
+    found, plan_bits = entitlements.get_cached(user_ids)
+    missing = [user_id for user_id in user_ids if user_id not in found]
+    if missing:
+        use_primary_after_recent_writes(db, missing)
+        found.update(load_entitlements(db, missing, record_recent=True))
+    if any(entitlement and entitlement["plan_id"] not in plan_bits for entitlement in found.values()):
+        plan_bits = crud_plan.get_feature_bits(db)
+        entitlements.cache_plan_features(plan_bits)
+    return {
+        user_id: {**found[user_id], "feature_bits": plan_bits.get(found[user_id]["plan_id"], 0)}
+        if found[user_id] else None
+        for user_id in user_ids
+    }
+
+def _run_with_retry(db: Session, write: Callable[[], T]) -> T:
+    """
+    Run a single-statement write and commit it, retrying a bounded number of
+    times on transient errors (serialization failures, deadlocks, locked
+    SQLite database).
+    """
+    for attempt in range(settings.SUBSCRIPTION_WRITE_RETRIES + 1):
+        try:
+            result = write()
+            db.commit()
+            return result
+        except OperationalError:
+            db.rollback()
+            if attempt == settings.SUBSCRIPTION_WRITE_RETRIES:
+                raise
+            time.sleep(random.uniform(0, 0.01 * 2 ** attempt))
+
+def _write_with_events(db: Session, statement, event_type: str) -> list[Subscription]:
+    """
+    Run a RETURNING write and record an outbox event per returned row in the
+    same transaction, so downstream fan-out never sees a change that was
+    rolled back (or misses one that committed).
+    """
+    def write():
+        rows = db.scalars(statement).all()
+        crud_outbox.record(db, event_type, rows)
+        return rows
+    rows = _run_with_retry(db, write)
+    user_ids = {row.user_id for row in rows}
+    entitlements.invalidate(user_ids)
+    etag.bump([etag.subscription_key(user_id) for user_id in user_ids])
+    # Live (SSE) clients hear about it right away; the outbox covers the rest
+    publish_subscription_changes(event_type, rows)
+    return rows
+
+def _insert_active_if_absent(db: Session, values: dict):
+    """
+    INSERT ... ON CONFLICT DO NOTHING against the partial unique index on
+    (user_id) WHERE status = 'ACTIVE', so the existence check and the insert
+    are one atomic statement.
+    """
+    # Writes always go to the primary, which shares the replica's dialect.
+    # create_db_engine only accepts PostgreSQL and SQLite.
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    return (
+        dialect_insert(Subscription)
+        .values(**values)
+        .on_conflict_do_nothing(
+            index_elements=[Subscription.user_id],
+            index_where=Subscription.status == SubscriptionStatus.ACTIVE
+        )
+        .returning(Subscription)
+    )
+
 def create_subscription(
     db: Session, *, obj_in: SubscriptionCreate
-) -> Subscription:
+) -> Optional[Subscription]:
+    """
+    Create an active subscription; returns None if the user already has one.
+    """
     # Get the plan to calculate end date
-    plan = db.query(Subscription.plan).filter(
-        Subscription.plan_id == obj_in.plan_id
-    ).first()
+    plan = crud_plan.get(db, obj_in.plan_id)
     
     if not plan:
         raise ValueError("Plan not found")
     
-    db_obj = Subscription(
-        user_id=obj_in.user_id,
-        plan_id=obj_in.plan_id,
-        status=SubscriptionStatus.ACTIVE,
-        start_date=datetime.utcnow(),
-        end_date=datetime.utcnow() + timedelta(days=plan.duration_days)
+    now = datetime.utcnow()
+    statement = _insert_active_if_absent(db, {
+        "user_id": obj_in.user_id,
+        "plan_id": obj_in.plan_id,
+        "status": SubscriptionStatus.ACTIVE,
+        "start_date": now,
+        "end_date": now + timedelta(days=plan.duration_days),
+        "created_at": now,
+        "updated_at": now,
+    })
+    rows = _write_with_events(db, statement, crud_outbox.SUBSCRIPTION_CREATED)
+    db_obj = rows[0] if rows else None
+    if db_obj:
+        expiry_schedule.schedule(db_obj.id, db_obj.end_date)
+        mark_recent_write(db_obj.user_id)
+    return db_obj
+
+def _update_active_subscription(
+    db: Session, user_id: int, values: dict
+) -> Optional[Subscription]:
+    # UPDATE ... RETURNING: no prior SELECT and no refresh afterwards
+    statement = (
+        update(Subscription)
+        .where(
+            Subscription.user_id == user_id,
+            Subscription.status == SubscriptionStatus.ACTIVE
+        )
+        .values(**values)
+        .returning(Subscription)
+        .execution_options(populate_existing=True)
     )
-    db.add(db_obj)
-    db.commit()
-    db.refresh(db_obj)
+    status = values.get("status")
+    if status == SubscriptionStatus.CANCELLED:
+        event_type = crud_outbox.SUBSCRIPTION_CANCELLED
+    elif status == SubscriptionStatus.EXPIRED:
+        event_type = crud_outbox.SUBSCRIPTION_EXPIRED
+    else:
+        event_type = crud_outbox.SUBSCRIPTION_UPDATED
+    rows = _write_with_events(db, statement, event_type)
+    db_obj = rows[0] if rows else None
+    if db_obj:
+        if db_obj.status != SubscriptionStatus.ACTIVE:
+            expiry_schedule.unschedule(db_obj.id)
+        elif "end_date" in values:
+            expiry_schedule.schedule(db_obj.id, db_obj.end_date)
+        mark_recent_write(user_id)
     return db_obj
 
 def update_subscription(
-    db: Session, *, db_obj: Subscription, obj_in: SubscriptionUpdate
-) -> Subscription:
+    db: Session, *, user_id: int, obj_in: SubscriptionUpdate
+) -> Optional[Subscription]:
+    """
+    Update a user's active subscription; returns None if there is none.
+    """
     update_data = obj_in.dict(exclude_unset=True)
+    values = {}
     
     if "plan_id" in update_data:
         # Get the new plan to calculate new end date
-        new_plan = db.query(Subscription.plan).filter(
-            Subscription.plan_id == update_data["plan_id"]
-        ).first()
+        new_plan = crud_plan.get(db, update_data["plan_id"])
         
         if not new_plan:
             raise ValueError("New plan not found")
         
-        # Update end date based on remaining time
-        remaining_days = (db_obj.end_date - datetime.utcnow()).days
-        db_obj.end_date = datetime.utcnow() + timedelta(days=new_plan.duration_days)
-        db_obj.plan_id = update_data["plan_id"]
+        values["end_date"] = datetime.utcnow() + timedelta(days=new_plan.duration_days)
+        values["plan_id"] = update_data["plan_id"]
     
     if "status" in update_data:
-        db_obj.status = update_data["status"]
+        values["status"] = update_data["status"]
         if update_data["status"] == SubscriptionStatus.CANCELLED:
-            db_obj.cancelled_at = datetime.utcnow()
+            values["cancelled_at"] = datetime.utcnow()
     
-    db.add(db_obj)
-    db.commit()
-    db.refresh(db_obj)
-    return db_obj
+    return _update_active_subscription(db, user_id, values)
 
 def cancel_subscription(
-    db: Session, *, db_obj: Subscription
-) -> Subscription:
-    db_obj.status = SubscriptionStatus.CANCELLED
-    db_obj.cancelled_at = datetime.utcnow()
-    db.add(db_obj)
-    db.commit()
-    db.refresh(db_obj)
-    return db_obj
+    db: Session, *, user_id: int
+) -> Optional[Subscription]:
+    """
+    Cancel a user's active subscription; returns None if there is none.
+    """
+    return _update_active_subscription(db, user_id, {
+        "status": SubscriptionStatus.CANCELLED,
+        "cancelled_at": datetime.utcnow()
+    })
 
-def get_expired_subscriptions(db: Session) -> list[Subscription]:
-    return db.query(Subscription).filter(
+def get_expired_subscriptions(db: Session, limit: Optional[int] = None) -> list[Subscription]:
+    query = db.query(Subscription).filter(
         Subscription.status == SubscriptionStatus.ACTIVE,
         Subscription.end_date < datetime.utcnow()
+    ).order_by(Subscription.id)
+    if limit:
+        query = query.limit(limit)
+    return query.all()
+
+def get_ending_subscriptions(
+    db: Session, *, before: datetime, after_id: int = 0, limit: int = 1000
+) -> list[tuple[int, datetime]]:
+    """
+    (id, end_date) of ACTIVE subscriptions ending between now and `before`,
+    in id order from `after_id` (keyset pagination over large result sets).
+    """
+    return [tuple(row) for row in db.execute(
+        select(Subscription.id, Subscription.end_date)
+        .where(
+            Subscription.status == SubscriptionStatus.ACTIVE,
+            Subscription.end_date >= datetime.utcnow(),
+            Subscription.end_date < before,
+            Subscription.id > after_id
+        )
+        .order_by(Subscription.id)
+        .limit(limit)
+    )]
+
+def get_notification_rows(db: Session, subscription_ids: list[int]) -> list:
+    """(Subscription, email, plan name) for the still-ACTIVE subscriptions among `subscription_ids`"""
+    return db.execute(
+        select(Subscription, User.email, Plan.name)
+        .join(User, User.id == Subscription.user_id)
+        .join(Plan, Plan.id == Subscription.plan_id)
+        .where(
+            Subscription.id.in_(subscription_ids),
+            Subscription.status == SubscriptionStatus.ACTIVE
+        )
     ).all()
 
-def expire_subscription(db: Session, subscription: Subscription) -> Subscription:
-    subscription.status = SubscriptionStatus.EXPIRED
-    db.add(subscription)
-    db.commit()
-    db.refresh(subscription)
-    return subscription 
\ No newline at end of file
+def expire_subscription(db: Session, subscription_id: int) -> Optional[Subscription]:
+    statement = (
+        update(Subscription)
+        .where(
+            Subscription.id == subscription_id,
+            Subscription.status == SubscriptionStatus.ACTIVE
+        )
+        .values(status=SubscriptionStatus.EXPIRED)
+        .returning(Subscription)
+        .execution_options(populate_existing=True)
+    )
+    rows = _write_with_events(db, statement, crud_outbox.SUBSCRIPTION_EXPIRED)
+    subscription = rows[0] if rows else None
+    expiry_schedule.unschedule(subscription_id)
+    if subscription:
+        mark_recent_write(subscription.user_id)
+    return subscription
+
+def get_active_end_dates(db: Session, subscription_ids: List[int]) -> Dict[int, datetime]:
+    if not subscription_ids:
+        return {}
+    rows = db.execute(
+        select(Subscription.id, Subscription.end_date).where(
+            Subscription.id.in_(subscription_ids),
+            Subscription.status == SubscriptionStatus.ACTIVE
+        )
+    )
+    return dict(rows.all())
+
+def expire_subscriptions(db: Session, subscription_ids: list[int]) -> list[Subscription]:
+    """
+    Expire a batch of subscriptions in one UPDATE. Only rows that are still
+    ACTIVE and past their end_date change, so ids claimed from a stale
+    schedule entry (e.g. the plan was extended meanwhile) are left alone.
+    """
+    if not subscription_ids:
+        return []
+    statement = (
+        update(Subscription)
+        .where(
+            Subscription.id.in_(subscription_ids),
+            Subscription.status == SubscriptionStatus.ACTIVE,
+            Subscription.end_date <= datetime.utcnow()
+        )
+        .values(status=SubscriptionStatus.EXPIRED)
+        .returning(Subscription)
+        .execution_options(populate_existing=True)
+    )
+    expired = _write_with_events(db, statement, crud_outbox.SUBSCRIPTION_EXPIRED)
+    for subscription in expired:
+        mark_recent_write(subscription.user_id)
+    return expired
@@ -1,10 +1,13 @@
 from typing import Any, Dict, Optional, Union
+from sqlalchemy import insert, update as sql_update
 from sqlalchemy.orm import Session
+from app.db.session import mark_recent_write, use_primary_after_recent_write
 from app.core.security import get_password_hash, verify_password
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
 
 def get(db: Session, id: int) -> Optional[User]:
+    use_primary_after_recent_write(db, id)
     return db.query(User).filter(User.id == id).first()
 
 def get_by_email(db: Session, email: str) -> Optional[User]:
@@ -14,32 +17,38 @@ def get_multi(db: Session, *, skip: int = 0, limit: int = 100) -> list[User]:
     return db.query(User).offset(skip).limit(limit).all()
 
 def create(db: Session, *, obj_in: UserCreate) -> User:
-    db_obj = User(
-        email=obj_in.email,
-        hashed_password=get_password_hash(obj_in.password),
-        is_admin=obj_in.is_admin,
-    )
-    db.add(db_obj)
+    db_obj = db.scalars(
+        insert(User).values(
+            email=obj_in.email,
+            hashed_password=get_password_hash(obj_in.password),
+            is_admin=obj_in.is_admin,
+        ).returning(User)
+    ).one()
     db.commit()
-    db.refresh(db_obj)
     return db_obj
 
 def update(
     db: Session, *, db_obj: User, obj_in: Union[UserUpdate, Dict[str, Any]]
 ) -> User:
     if isinstance(obj_in, dict):
-        update_data = obj_in
+        update_data = dict(obj_in)
     else:
         update_data = obj_in.dict(exclude_unset=True)
-    if update_data.get("password"):
-        hashed_password = get_password_hash(update_data["password"])
-        del update_data["password"]
-        update_data["hashed_password"] = hashed_password
-    for field in update_data:
-        setattr(db_obj, field, update_data[field])
-    db.add(db_obj)
+    password = update_data.pop("password", None)
+    if password:
+        update_data["hashed_password"] = get_password_hash(password)
+    if not update_data:
+        # users has no onupdate column, so there would be nothing to SET
+        return db_obj
+    db_obj = db.scalars(
+        sql_update(User)
+        .where(User.id == db_obj.id)
+        .values(**update_data)
+        .returning(User)
+        .execution_options(populate_existing=True)
+    ).one()
     db.commit()
-    db.refresh(db_obj)
+    mark_recent_write(db_obj.id)
     return db_obj
 
 def authenticate(db: Session, *, email: str, password: str) -> Optional[User]:
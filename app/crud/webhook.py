@@ -0,0 +1,37 @@
+import secrets
+from typing import List, Optional
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import Session
+from app.models.webhook import WebhookEndpoint
+from app.schemas.webhook import WebhookEndpointCreate
+
+def get(db: Session, id: int) -> Optional[WebhookEndpoint]:
+    return db.get(WebhookEndpoint, id)
+
+def get_multi(db: Session, *, skip: int = 0, limit: int = 100) -> List[WebhookEndpoint]:
+    return db.query(WebhookEndpoint).order_by(WebhookEndpoint.id).offset(skip).limit(limit).all()
+
+def get_active(db: Session) -> List[WebhookEndpoint]:
+    return db.query(WebhookEndpoint).filter(WebhookEndpoint.is_active.is_(True)).all()
+
+def create(db: Session, *, obj_in: WebhookEndpointCreate) -> WebhookEndpoint:
+    db_obj = db.scalars(
+        insert(WebhookEndpoint).values(
+            url=str(obj_in.url),
+            secret=secrets.token_hex(32),
+            event_types=",".join(obj_in.event_types) if obj_in.event_types else None,
+            max_concurrency=obj_in.max_concurrency,
+            is_active=True
+        ).returning(WebhookEndpoint)
+    ).one()
+    db.commit()
+    return db_obj
+
+def remove(db: Session, *, id: int) -> Optional[WebhookEndpoint]:
+    obj = db.scalars(
+        delete(WebhookEndpoint)
+        .where(WebhookEndpoint.id == id)
+        .returning(WebhookEndpoint)
+    ).first()
+    db.commit()
+    return obj
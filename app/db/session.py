@@ -1,13 +1,274 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import logging
+import math
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+from sqlalchemy import Delete, Insert, Update, create_engine, event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import NullPool, QueuePool
+from app.core.cache import get_redis
 from app.core.config import settings
 
-engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+logger = logging.getLogger(__name__)
+
+class PoolStats:
+    """Counters for time spent waiting on a pooled connection"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, wait: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            if timed_out:
+                self.timeouts += 1
+        if wait * 1000 >= settings.DB_POOL_WAIT_WARN_MS:
+            logger.warning(f"Waited {wait * 1000:.1f}ms for a database connection")
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": round(self.total_wait / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 3),
+            }
+
+pool_stats = PoolStats()
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that records how long each checkout waited for a connection.
+    Wraps the public Pool.connect(), so the time includes opening a new
+    connection and the pre-ping, not just waiting for a free slot.
+    """
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            pool_stats.record(time.perf_counter() - start, timed_out=True)
+            raise
+        pool_stats.record(time.perf_counter() - start)
+        return connection
+
+def _engine_options(url: str) -> Dict[str, Any]:
+    driver = make_url(url).drivername
+    options: Dict[str, Any] = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+    connect_args: Dict[str, Any] = {}
+
+    if driver.startswith("sqlite"):
+        # SQLite keeps SQLAlchemy's own pool choice (file vs. memory databases)
+        return options
+
+    if settings.DB_USE_NULLPOOL:
+        options["poolclass"] = NullPool
+    else:
+        options.update(
+            poolclass=InstrumentedQueuePool,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_use_lifo=True,
+        )
+
+    if settings.DB_PGBOUNCER_MODE:
+        # Transaction pooling: server connections are shared between clients,
+        # so no server-side prepared statements and no session-level SETs.
+        if driver == "postgresql+psycopg":
+            connect_args["prepare_threshold"] = None
+    elif settings.DB_STATEMENT_TIMEOUT_MS and driver.startswith("postgresql"):
+        connect_args["options"] = f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"
+
+    if connect_args:
+        options["connect_args"] = connect_args
+    return options
+
+def _set_local_statement_timeout(conn) -> None:
+    conn.exec_driver_sql(f"SET LOCAL statement_timeout = {int(settings.DB_STATEMENT_TIMEOUT_MS)}")
+
+# Both have the partial unique index and INSERT ... ON CONFLICT that keep a
+# user to one active subscription
+SUPPORTED_DIALECTS = ("postgresql", "sqlite")
+
+def create_db_engine(url: str):
+    dialect = make_url(url).get_backend_name()
+    if dialect not in SUPPORTED_DIALECTS:
+        raise ValueError(f"Unsupported database {dialect!r}: use one of {', '.join(SUPPORTED_DIALECTS)}")
+    db_engine = create_engine(url, **_engine_options(url))
+    if (
+        settings.DB_PGBOUNCER_MODE
+        and settings.DB_STATEMENT_TIMEOUT_MS
+        and db_engine.dialect.name == "postgresql"
+    ):
+        # Scoped to each transaction, so it never leaks to another client
+        event.listen(db_engine, "begin", _set_local_statement_timeout)
+    return db_engine
+
+def pool_status() -> Dict[str, Any]:
+    """Current pool occupancy plus checkout wait statistics"""
+    pool = get_engine().pool
+    status: Dict[str, Any] = {"pool": pool.__class__.__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            overflow=max(pool.overflow(), 0),
+            max_overflow=settings.DB_MAX_OVERFLOW,
+        )
+    status.update(pool_stats.snapshot())
+    return status
+
+# Created on first use: importing the app loads no database driver and
+# opens no pool until something actually talks to the database
+
+@lru_cache(maxsize=None)
+def get_engine():
+    return create_db_engine(settings.DATABASE_URL)
+
+@lru_cache(maxsize=None)
+def get_probe_engine():
+    """
+    One-connection engine for health probes, apart from the request pool so
+    an exhausted pool shows up as saturation instead of a hung probe. Pool
+    wait and connect are bounded by HEALTH_PROBE_IO_TIMEOUT_SECONDS; libpq
+    rounds connect_timeout up to whole seconds, minimum 2.
+    """
+    url = settings.DATABASE_URL
+    options = _engine_options(url)
+    if make_url(url).get_backend_name() == "postgresql":
+        timeout = settings.HEALTH_PROBE_IO_TIMEOUT_SECONDS
+        options.update(
+            poolclass=QueuePool, pool_size=1, max_overflow=0,
+            pool_timeout=timeout, pool_recycle=settings.DB_POOL_RECYCLE,
+        )
+        options["connect_args"] = {**options.get("connect_args", {}), "connect_timeout": math.ceil(timeout)}
+    return create_engine(url, **options)
+
+@lru_cache(maxsize=None)
+def get_replica_engine():
+    return create_db_engine(settings.READ_REPLICA_URL) if settings.READ_REPLICA_URL else None
+
+def dispose_engines(close: bool = True) -> None:
+    """
+    Empty the engines' pools. A forked child passes close=False: the
+    connections it inherited are dropped without being closed, since they
+    still belong to the parent.
+    """
+    for factory in (get_engine, get_replica_engine, get_probe_engine):
+        if factory.cache_info().currsize and factory() is not None:
+            factory().dispose(close=close)
+
+REPLICA_LAG_QUERY = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+class ReplicaLagMonitor:
+    """
+    Caches whether the read replica is usable, re-measuring its replication
+    lag at most every REPLICA_LAG_CHECK_INTERVAL seconds. An unreachable or
+    lagging replica sends all reads back to the primary.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._checked_at = float("-inf")
+        self._usable = True
+        self.lag: Optional[float] = None
+
+    def _measure(self) -> bool:
+        try:
+            with get_replica_engine().connect() as conn:
+                self.lag = float(conn.execute(REPLICA_LAG_QUERY).scalar() or 0)
+        except Exception as e:
+            logger.warning(f"Read replica unavailable, using primary: {e}")
+            self.lag = None
+            return False
+        if self.lag > settings.REPLICA_MAX_LAG_SECONDS:
+            logger.warning(f"Read replica lag {self.lag:.1f}s over threshold, using primary")
+            return False
+        return True
+
+    def replica_usable(self) -> bool:
+        if time.monotonic() - self._checked_at < settings.REPLICA_LAG_CHECK_INTERVAL:
+            return self._usable
+        # One thread re-measures; the others keep using the last result
+        if self._lock.acquire(blocking=False):
+            try:
+                self._usable = self._measure()
+                self._checked_at = time.monotonic()
+            finally:
+                self._lock.release()
+        return self._usable
+
+replica_monitor = ReplicaLagMonitor()
+
+class RoutingSession(Session):
+    """
+    Session that sends reads to the read replica and everything else to the
+    primary. Once a session has written, it stays on the primary so it reads
+    its own writes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        replica_engine = get_replica_engine()
+        if replica_engine is None or self.info.get("use_primary"):
+            return get_engine()
+        if (
+            self._flushing
+            or isinstance(clause, (Insert, Update, Delete))
+            or getattr(clause, "_for_update_arg", None) is not None
+        ):
+            self.info["use_primary"] = True
+            return get_engine()
+        if not replica_monitor.replica_usable():
+            return get_engine()
+        return replica_engine
+
+def _recent_write_key(user_id: int) -> str:
+    return f"recent_write:user:{user_id}"
+
+def mark_recent_write(user_id: int) -> None:
+    """Pin this user's reads to the primary for READ_YOUR_WRITES_SECONDS"""
+    if get_replica_engine() is not None:
+        get_redis().setex(_recent_write_key(user_id), settings.READ_YOUR_WRITES_SECONDS, 1)
+
+def use_primary_after_recent_write(db: Session, user_id: int) -> None:
+    """Route the session to the primary if `user_id` wrote recently"""
+    if get_replica_engine() is None or db.info.get("use_primary"):
+        return
+    if get_redis().exists(_recent_write_key(user_id)):
+        db.info["use_primary"] = True
+
+def use_primary_after_recent_writes(db: Session, user_ids: List[int]) -> None:
+    """Batch form of use_primary_after_recent_write: one EXISTS for all users"""
+    if get_replica_engine() is None or db.info.get("use_primary") or not user_ids:
+        return
+    if get_redis().exists(*[_recent_write_key(user_id) for user_id in user_ids]):
+        db.info["use_primary"] = True
+
+# expire_on_commit=False: objects returned by INSERT/UPDATE ... RETURNING stay
+# usable after commit without a refresh SELECT. No bind: RoutingSession picks
+# the (lazily created) engine per statement.
+SessionLocal = sessionmaker(
+    class_=RoutingSession, autocommit=False, autoflush=False, expire_on_commit=False
+)
 
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
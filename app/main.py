@@ -1,11 +1,16 @@
-from fastapi import FastAPI, Request
+from contextlib import asynccontextmanager
+from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from app.core.config import settings
 from app.api.v1.api import api_router
-from app.core.rate_limit import rate_limiter
-from app.core.cache import cache
-import time
+from app.core.cache import close_redis, get_redis
+from app.core.compression import CompressionMiddleware
+from app.core.health import health_checker
+from app.core.middleware import RequestPipelineMiddleware
+from app.core.warmup import warm_worker
+from app.db.session import dispose_engines, get_engine
 import logging
 
 # Setup logging
@@ -15,14 +20,32 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Clients are created here, in the serving process, rather than at import
+    # time; both stay lazy, so scripts and tests that never start the app
+    # still get them on first use. Neither call opens a connection.
+    get_engine()
+    get_redis()
+    if settings.WARMUP_ENABLED:
+        # Runs in each worker after fork, before it accepts connections
+        await run_in_threadpool(warm_worker)
+    yield
+    dispose_engines()
+    close_redis()
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
+    lifespan=lifespan,
     openapi_url=f"{settings.API_V1_PREFIX}/openapi.json",
     docs_url="/docs",
     redoc_url="/redoc",
 )
 
-# Set up CORS middleware
+# Rate limiting, error mapping, timing, profiling and metrics in one pass
+app.add_middleware(RequestPipelineMiddleware)
+
+# Set up CORS middleware; outside the pipeline so 429s and 500s carry CORS headers
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[str(origin) for origin in settings.BACKEND_CORS_ORIGINS],
@@ -31,49 +54,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Add rate limiting middleware
-app.middleware("http")(rate_limiter)
-
-# Add request timing middleware
-@app.middleware("http")
-async def add_process_time_header(request: Request, call_next):
-    start_time = time.time()
-    response = await call_next(request)
-    process_time = time.time() - start_time
-    response.headers["X-Process-Time"] = str(process_time)
-    return response
-
-# Add error handling middleware
-@app.middleware("http")
-async def error_handling_middleware(request: Request, call_next):
-    try:
-        return await call_next(request)
-    except Exception as e:
-        logger.error(f"Unhandled error: {str(e)}", exc_info=True)
-        return JSONResponse(
-            status_code=500,
-            content={"detail": "Internal server error"}
-        )
+# Outermost, so every response (errors included) is compressed
+app.add_middleware(CompressionMiddleware)
 
 # Include API router
 app.include_router(api_router, prefix=settings.API_V1_PREFIX)
 
+@app.get("/health/live")
+async def liveness():
+    """The process is up and serving; probes no dependency"""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
 @app.get("/health")
-async def health_check():
-    """Health check endpoint with cache"""
-    cache_key = "health_check"
-    cached_result = cache.get(cache_key)
-    if cached_result:
-        return cached_result
-    
-    result = {
-        "status": "healthy",
-        "timestamp": time.time(),
-        "services": {
-            "database": "up",
-            "redis": "up",
-            "celery": "up"
-        }
-    }
-    cache.set(cache_key, result, timeout=30)  # Cache for 30 seconds
-    return result 
\ No newline at end of file
+async def readiness():
+    """
+    Database, Redis and Celery workers, probed concurrently. 503 when the
+    database or Redis is down; a missing worker only degrades the status.
+    """
+    report = await health_checker.check()
+    status_code = 503 if report["status"] == "unavailable" else 200
+    return JSONResponse(report, status_code=status_code)
@@ -0,0 +1,11 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime
+from app.db.base_class import Base
+
+class Feature(Base):
+    """Registry of plan features; `id` is the feature's bit in Plan.feature_bits"""
+    __tablename__ = "features"
+
+    id = Column(Integer, primary_key=True, index=True)
+    key = Column(String, unique=True, index=True, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,17 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Text, DateTime
+from app.db.base_class import Base
+
+class OutboxEvent(Base):
+    """
+    Subscription events written in the same transaction as the change
+    itself; the relay task publishes them and deletes the rows.
+    """
+    __tablename__ = "outbox_events"
+
+    id = Column(Integer, primary_key=True)
+    event_type = Column(String, nullable=False)
+    subscription_id = Column(Integer, nullable=False)
+    user_id = Column(Integer, nullable=False)
+    payload = Column(Text, nullable=False)  # JSON string
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
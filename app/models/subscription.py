@@ -1,6 +1,6 @@
 from datetime import datetime
 from enum import Enum
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum as SQLEnum
+from sqlalchemy import BigInteger, Column, Integer, String, Float, DateTime, ForeignKey, Index, text, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from app.db.base_class import Base
 
@@ -18,7 +18,8 @@ class Plan(Base):
     description = Column(String)
     price = Column(Float, nullable=False)
     duration_days = Column(Integer, nullable=False)
-    features = Column(String)  # JSON string of features
+    features = Column(String)  # JSON list of feature keys
+    feature_bits = Column(BigInteger, nullable=False, default=0, server_default="0")  # bit n = Feature.id n
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -26,6 +27,16 @@ class Plan(Base):
 
 class Subscription(Base):
     __tablename__ = "subscriptions"
+    __table_args__ = (
+        # At most one ACTIVE subscription per user, enforced by the database
+        Index(
+            "uq_subscriptions_user_active",
+            "user_id",
+            unique=True,
+            postgresql_where=text("status = 'ACTIVE'"),
+            sqlite_where=text("status = 'ACTIVE'"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, index=True, nullable=False)
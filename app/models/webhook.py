@@ -0,0 +1,17 @@
+from datetime import datetime
+from sqlalchemy import Boolean, Column, Integer, String, DateTime
+from app.db.base_class import Base
+
+class WebhookEndpoint(Base):
+    __tablename__ = "webhook_endpoints"
+
+    id = Column(Integer, primary_key=True, index=True)
+    url = Column(String, nullable=False)
+    secret = Column(String, nullable=False)
+    event_types = Column(String, nullable=True)  # comma-separated; NULL means all events
+    max_concurrency = Column(Integer, nullable=False, default=4)
+    is_active = Column(Boolean(), default=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    def accepts(self, event_type: str) -> bool:
+        return not self.event_types or event_type in self.event_types.split(",")
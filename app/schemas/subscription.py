@@ -1,6 +1,8 @@
 from datetime import datetime
 from typing import Optional, List
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, validator
+from app.core.config import settings
+from app.core.features import parse_keys
 from app.models.subscription import SubscriptionStatus
 
 class PlanBase(BaseModel):
@@ -8,18 +10,31 @@ class PlanBase(BaseModel):
     description: Optional[str] = None
     price: float = Field(gt=0)
     duration_days: int = Field(gt=0)
-    features: Optional[str] = None
+    features: Optional[str] = None  # JSON list of feature keys, e.g. '["api", "sso"]'
+
+def _check_features(cls, v: Optional[str]) -> Optional[str]:
+    try:
+        parse_keys(v)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid features: {e}")
+    return v
+
+# Validated on input only: plans written before the feature registry may
+# hold free text, and reading them back must not fail
 
 class PlanCreate(PlanBase):
-    pass
+    check_features = validator("features", allow_reuse=True)(_check_features)
 
 class PlanUpdate(PlanBase):
     name: Optional[str] = None
     price: Optional[float] = Field(default=None, gt=0)
     duration_days: Optional[int] = Field(default=None, gt=0)
 
+    check_features = validator("features", allow_reuse=True)(_check_features)
+
 class PlanInDB(PlanBase):
     id: int
+    feature_bits: int = 0
     created_at: datetime
     updated_at: datetime
 
@@ -51,4 +66,21 @@ class SubscriptionInDB(SubscriptionBase):
         from_attributes = True
 
 class SubscriptionResponse(SubscriptionInDB):
-    pass 
\ No newline at end of file
+    pass 
+
+class SubscriptionLookup(BaseModel):
+    user_ids: List[int] = Field(min_length=1, max_length=settings.ENTITLEMENT_LOOKUP_MAX_USERS)
+
+class Entitlement(BaseModel):
+    """Compact subscription view; test a feature with `feature_bits >> feature_id & 1`"""
+    plan_id: int
+    status: SubscriptionStatus
+    end_date: datetime
+    feature_bits: int
+
+class FeatureInDB(BaseModel):
+    id: int
+    key: str
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,41 @@
+from datetime import datetime
+from typing import List, Optional
+from pydantic import AnyHttpUrl, BaseModel, Field, validator
+from app.crud.outbox import (
+    SUBSCRIPTION_CANCELLED, SUBSCRIPTION_CREATED, SUBSCRIPTION_EXPIRED, SUBSCRIPTION_UPDATED
+)
+
+EVENT_TYPES = (SUBSCRIPTION_CREATED, SUBSCRIPTION_UPDATED, SUBSCRIPTION_CANCELLED, SUBSCRIPTION_EXPIRED)
+
+class WebhookEndpointCreate(BaseModel):
+    url: AnyHttpUrl
+    event_types: Optional[List[str]] = None  # None subscribes to every event
+    max_concurrency: int = Field(default=4, gt=0, le=64)
+
+    @validator("event_types")
+    def check_event_types(cls, v: Optional[List[str]]) -> Optional[List[str]]:
+        unknown = set(v or []) - set(EVENT_TYPES)
+        if unknown:
+            raise ValueError(f"Unknown event types: {', '.join(sorted(unknown))}")
+        return v
+
+class WebhookEndpointInDB(BaseModel):
+    id: int
+    url: str
+    event_types: Optional[List[str]] = None
+    max_concurrency: int
+    is_active: bool
+    created_at: datetime
+
+    @validator("event_types", pre=True)
+    def split_event_types(cls, v):
+        if isinstance(v, str):
+            return v.split(",")
+        return v
+
+    class Config:
+        from_attributes = True
+
+class WebhookEndpointCreated(WebhookEndpointInDB):
+    # Only returned once, when the endpoint is registered
+    secret: str
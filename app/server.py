@@ -0,0 +1,131 @@
+"""
+Production entry point: a gunicorn master with uvicorn workers.
+
+    python -m app.server                    # serve; one worker per usable CPU
+    python -m app.server --workers 8 --bind 0.0.0.0:9000
+    python -m app.server reload             # zero-downtime switch to new code
+
+The master imports the app once (preload_app) and forks the workers, so
+they share its modules copy-on-write and start without re-importing
+anything. Each worker then drops any connection it inherited (post_fork)
+and warms its own pools and the plan catalog in the app's lifespan before
+it accepts connections.
+"""
+import argparse
+import os
+import signal
+import sys
+import time
+from typing import List, Optional
+from gunicorn.app.base import BaseApplication
+from app.core.config import settings
+
+def worker_count() -> int:
+    if settings.WEB_WORKERS:
+        return settings.WEB_WORKERS
+    try:
+        # CPUs this process may actually run on (taskset/cpuset), not the host's
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+def post_fork(server, worker) -> None:
+    """gunicorn hook, run in each new worker"""
+    from app.core.cache import close_redis
+    from app.db.session import dispose_engines
+
+    # Anything the master opened belongs to the master: forget it unclosed
+    dispose_engines(close=False)
+    close_redis(close_connections=False)
+
+class Server(BaseApplication):
+    def __init__(self, options: dict):
+        self.options = options
+        super().__init__()
+
+    def load_config(self) -> None:
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        from app.main import app
+        return app
+
+def server_options(workers: Optional[int] = None, bind: Optional[str] = None) -> dict:
+    return {
+        "bind": bind or settings.WEB_BIND,
+        "workers": workers or worker_count(),
+        "worker_class": "uvicorn.workers.UvicornWorker",
+        "preload_app": True,
+        "graceful_timeout": settings.WEB_GRACEFUL_TIMEOUT,
+        "keepalive": settings.WEB_KEEPALIVE,
+        "pidfile": settings.WEB_PIDFILE,
+        "post_fork": post_fork,
+    }
+
+def _read_pid(path: str) -> Optional[int]:
+    try:
+        with open(path) as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
+def _children(pid: int) -> int:
+    count = 0
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # Field 4 is the parent pid; the name before it may contain spaces
+                if int(f.read().rsplit(")", 1)[1].split()[1]) == pid:
+                    count += 1
+        except (OSError, IndexError, ValueError):
+            continue
+    return count
+
+def reload(timeout: float = 60.0) -> int:
+    """
+    Start a new master on the current code beside the running one, wait for
+    its workers, then stop the old master gracefully (its in-flight requests
+    get WEB_GRACEFUL_TIMEOUT). A plain HUP is not enough with preload_app:
+    it re-forks workers from the code the old master already imported.
+    """
+    old_pid = _read_pid(settings.WEB_PIDFILE)
+    if old_pid is None:
+        print(f"No running server (pidfile {settings.WEB_PIDFILE})", file=sys.stderr)
+        return 1
+    workers = _children(old_pid)
+    os.kill(old_pid, signal.SIGUSR2)
+    deadline = time.monotonic() + timeout
+    new_pid = None
+    while time.monotonic() < deadline:
+        # The new master writes "<pidfile>.2", renamed once the old one exits
+        new_pid = _read_pid(settings.WEB_PIDFILE + ".2")
+        if new_pid is not None and _children(new_pid) >= workers:
+            break
+        time.sleep(0.2)
+    else:
+        print("New master did not come up; the old one keeps serving", file=sys.stderr)
+        return 1
+    os.kill(old_pid, signal.SIGTERM)
+    print(f"Reloaded: master {old_pid} -> {new_pid}")
+    return 0
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the API under gunicorn with uvicorn workers")
+    parser.add_argument("command", nargs="?", choices=["serve", "reload"], default="serve")
+    parser.add_argument("--workers", type=int, help="default: WEB_WORKERS or the usable CPU count")
+    parser.add_argument("--bind", help="default: WEB_BIND")
+    args = parser.parse_args(argv)
+
+    if args.command == "reload":
+        return reload()
+    # gunicorn re-executes sys.argv on USR2; keep it a module run so the
+    # new master imports `app` the same way
+    sys.argv = ["-m", "app.server", *sys.argv[1:]]
+    Server(server_options(args.workers, args.bind)).run()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
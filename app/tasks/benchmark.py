@@ -0,0 +1,13 @@
+from app.core.cache import get_redis
+from app.core.celery_app import celery_app
+
+@celery_app.task
+def count_task(counter_key: str, work_ms: float = 0.0) -> None:
+    """
+    No-op task for measuring worker throughput; optionally sleeps `work_ms`
+    to stand in for I/O-bound work, then bumps a completion counter.
+    """
+    if work_ms:
+        import time
+        time.sleep(work_ms / 1000)
+    get_redis().incr(counter_key)
@@ -0,0 +1,10 @@
+from app.core.celery_app import celery_app
+from app.core.warmup import warm_shared_cache
+
+@celery_app.task
+def warm_cache(force: bool = False) -> dict:
+    """
+    Re-warm the shared cache if Redis came back empty. Scheduled every
+    WARMUP_CHECK_INTERVAL_SECONDS; a warm cache costs one SET NX.
+    """
+    return warm_shared_cache(force)
@@ -0,0 +1,51 @@
+from sqlalchemy.orm import Session
+from app.core.cache import get_redis
+from app.core.celery_app import celery_app
+from app.core.config import settings
+from app.crud import outbox as crud_outbox
+from app.db.session import SessionLocal
+
+def relay_batch(db: Session, batch_size: int) -> int:
+    """
+    Publish one batch of outbox events to the Redis stream, then delete them.
+    Delivery is at-least-once: a crash between XADD and the commit publishes
+    the batch again, so consumers dedupe on `event_id`.
+    """
+    events = crud_outbox.claim_batch(db, batch_size)
+    if not events:
+        db.rollback()
+        return 0
+    pipe = get_redis().pipeline(transaction=False)
+    for event in events:
+        pipe.xadd(
+            settings.OUTBOX_STREAM,
+            {
+                "event_id": event.id,
+                "type": event.event_type,
+                "user_id": event.user_id,
+                "payload": event.payload,
+            },
+            maxlen=settings.OUTBOX_STREAM_MAXLEN,
+            approximate=True
+        )
+    pipe.execute()
+    crud_outbox.remove(db, [event.id for event in events])
+    db.commit()
+    return len(events)
+
+@celery_app.task
+def relay_outbox_events(max_batches: int = 50) -> int:
+    """
+    Drain the outbox into the subscription events stream in batches.
+    """
+    db = SessionLocal()
+    relayed = 0
+    try:
+        for _ in range(max_batches):
+            count = relay_batch(db, settings.OUTBOX_RELAY_BATCH_SIZE)
+            relayed += count
+            if count < settings.OUTBOX_RELAY_BATCH_SIZE:
+                break
+    finally:
+        db.close()
+    return relayed
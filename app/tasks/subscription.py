@@ -1,25 +1,118 @@
+import logging
+from datetime import datetime, timedelta
+from typing import List, Optional
 from sqlalchemy.orm import Session
 from app.core.celery_app import celery_app
+from app.core.config import settings
+from app.core.expiry import expiry_schedule
+from app.core.notifications import ExpiryNotice, send_notices, unnotified
 from app.db.session import SessionLocal
 from app.crud import subscription as crud_subscription
 
+logger = logging.getLogger(__name__)
+
 @celery_app.task
-def check_expired_subscriptions():
+def expire_due_subscriptions(max_batches: int = 20) -> int:
     """
-    Background task to check and expire subscriptions that have passed their end date.
+    Expire subscriptions whose end_date has passed, as scheduled in the
+    Redis expiry set. Claims small batches until nothing is due.
     """
     db = SessionLocal()
+    expired = 0
     try:
-        expired_subscriptions = crud_subscription.get_expired_subscriptions(db)
-        for subscription in expired_subscriptions:
-            crud_subscription.expire_subscription(db, subscription)
+        for _ in range(max_batches):
+            subscription_ids = expiry_schedule.claim_due(settings.EXPIRY_BATCH_SIZE)
+            if not subscription_ids:
+                break
+            expired_ids = {s.id for s in crud_subscription.expire_subscriptions(db, subscription_ids)}
+            expired += len(expired_ids)
+            # Claimed from a stale entry (e.g. the plan was extended): put the
+            # subscription back on the schedule at its current end date
+            unexpired = [i for i in subscription_ids if i not in expired_ids]
+            expiry_schedule.schedule_many(crud_subscription.get_active_end_dates(db, unexpired))
     finally:
         db.close()
+    return expired
 
 @celery_app.task
-def send_subscription_expiry_notification(subscription_id: int):
+def check_expired_subscriptions() -> int:
     """
-    Background task to send notification when a subscription is about to expire.
+    Reconciliation safety net: scan for ACTIVE subscriptions past their end
+    date that the expiry schedule missed (e.g. written while Redis was down).
     """
-    # TODO: Implement notification sending logic
-    pass 
\ No newline at end of file
+    db = SessionLocal()
+    expired = 0
+    try:
+        while True:
+            overdue = crud_subscription.get_expired_subscriptions(db, limit=settings.EXPIRY_BATCH_SIZE)
+            if not overdue:
+                break
+            expired += len(crud_subscription.expire_subscriptions(db, [s.id for s in overdue]))
+            for subscription in overdue:
+                expiry_schedule.unschedule(subscription.id)
+    finally:
+        db.close()
+    if expired:
+        logger.warning(f"Expiry reconciliation expired {expired} unscheduled subscriptions")
+    return expired
+
+@celery_app.task
+def schedule_expiry_notifications(days_ahead: Optional[int] = None) -> int:
+    """
+    Find ACTIVE subscriptions ending within `days_ahead` days that have not
+    been notified yet and fan them out to send_subscription_expiry_notification
+    in NOTIFICATION_BATCH_SIZE batches, one task per batch rather than per
+    subscription. Hourly scans skip the ones already sent, so each run only
+    enqueues subscriptions that entered the window since the last one.
+    """
+    days_ahead = days_ahead or settings.EXPIRY_NOTICE_DAYS
+    before = datetime.utcnow() + timedelta(days=days_ahead)
+    batch_size = settings.NOTIFICATION_BATCH_SIZE
+    db = SessionLocal()
+    batches = 0
+    pending: List[int] = []
+    try:
+        after_id = 0
+        while True:
+            subscriptions = crud_subscription.get_ending_subscriptions(
+                db, before=before, after_id=after_id, limit=batch_size
+            )
+            if not subscriptions:
+                break
+            pending.extend(unnotified(subscriptions))
+            while len(pending) >= batch_size:
+                send_subscription_expiry_notification.delay(pending[:batch_size])
+                pending = pending[batch_size:]
+                batches += 1
+            after_id = subscriptions[-1][0]
+    finally:
+        db.close()
+    if pending:
+        send_subscription_expiry_notification.delay(pending)
+        batches += 1
+    return batches
+
+@celery_app.task(bind=True, max_retries=5)
+def send_subscription_expiry_notification(self, subscription_ids: List[int]) -> int:
+    """
+    Background task to notify a batch of subscriptions that they are about to expire.
+    """
+    db = SessionLocal()
+    try:
+        notices = [
+            ExpiryNotice(
+                subscription_id=subscription.id,
+                user_id=subscription.user_id,
+                email=email,
+                plan_name=plan_name,
+                end_date=subscription.end_date
+            )
+            for subscription, email, plan_name in crud_subscription.get_notification_rows(db, subscription_ids)
+        ]
+    finally:
+        db.close()
+    try:
+        return send_notices(notices)
+    except Exception as e:
+        # Unsent notices were released from the dedupe set, so the retry resends only those
+        raise self.retry(exc=e, countdown=30 * 2 ** self.request.retries)
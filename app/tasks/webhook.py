@@ -0,0 +1,80 @@
+import socket
+from typing import List
+from billiard.process import current_process
+from celery.signals import worker_process_shutdown
+from app.core import webhooks
+from app.core.celery_app import celery_app
+from app.core.config import settings
+from app.crud import webhook as crud_webhook
+from app.db.session import SessionLocal
+
+def _consumer_name() -> str:
+    # Stable across restarts: a replacement pool process reuses its index, so
+    # it takes over the same stream consumer instead of adding a new one
+    return f"{socket.gethostname()}-{getattr(current_process(), 'index', 0)}"
+
+@worker_process_shutdown.connect
+def _shutdown_delivery(**kwargs):
+    webhooks.close_clients()
+    webhooks.release_consumer(_consumer_name())
+
+def _target(endpoint) -> webhooks.Target:
+    return (endpoint.id, endpoint.url, endpoint.secret, endpoint.max_concurrency)
+
+def _handle_failure(target: webhooks.Target, events: List[dict], attempt: int, error: str) -> None:
+    if attempt >= settings.WEBHOOK_MAX_ATTEMPTS:
+        webhooks.dead_letter(target, events, attempt, error)
+    else:
+        deliver_webhook_batch.apply_async(
+            (target[0], events, attempt + 1), countdown=webhooks.retry_delay(attempt)
+        )
+
+@celery_app.task
+def dispatch_webhook_events() -> int:
+    """
+    Read new subscription events from the stream, deliver them to every
+    matching endpoint in batches of WEBHOOK_BATCH_SIZE and acknowledge them.
+    Failed batches are retried individually by deliver_webhook_batch.
+    """
+    entries = webhooks.read_events(_consumer_name(), settings.WEBHOOK_DISPATCH_COUNT)
+    if not entries:
+        return 0
+    events = [event for _, event in entries]
+
+    db = SessionLocal()
+    try:
+        targets = [(endpoint, _target(endpoint)) for endpoint in crud_webhook.get_active(db)]
+    finally:
+        db.close()
+
+    jobs = []
+    for endpoint, target in targets:
+        matching = [event for event in events if endpoint.accepts(event["type"])]
+        for start in range(0, len(matching), settings.WEBHOOK_BATCH_SIZE):
+            jobs.append((target, matching[start:start + settings.WEBHOOK_BATCH_SIZE]))
+
+    for (target, batch), error in zip(jobs, webhooks.deliver_batches(jobs)):
+        if error:
+            _handle_failure(target, batch, 1, error)
+    webhooks.ack_events([entry_id for entry_id, _ in entries])
+    return len(jobs)
+
+@celery_app.task
+def deliver_webhook_batch(endpoint_id: int, events: List[dict], attempt: int) -> bool:
+    """
+    Retry one failed batch to one endpoint; dead-letters it after
+    WEBHOOK_MAX_ATTEMPTS. Batches for deleted or disabled endpoints are dropped.
+    """
+    db = SessionLocal()
+    try:
+        endpoint = crud_webhook.get(db, endpoint_id)
+        target = _target(endpoint) if endpoint and endpoint.is_active else None
+    finally:
+        db.close()
+    if target is None:
+        return False
+    error = webhooks.deliver_batches([(target, events)])[0]
+    if error:
+        _handle_failure(target, events, attempt, error)
+        return False
+    return True
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Multi-key Cache operations on a large Redis keyspace.
+
+Fills Redis with --keys cached values (default 1M), then compares:
+
+- --batch single-key get/set/delete calls against one get_many/set_many/
+  delete_many (median of --repeat rounds);
+- clearing a --group of keys hidden in that keyspace with KEYS + DEL (the
+  old clear_pattern), with the SCAN-based clear_pattern and with
+  invalidate_tags. While each runs, a second client PINGs Redis in a loop;
+  its worst round trip is how long everyone else sharing the instance (rate
+  limiter, Celery broker) was stalled.
+
+Uses --redis-url (keys are prefixed "bench-cache:" and removed afterwards;
+nothing else is touched), or in-memory fakeredis with --fake. fakeredis
+shares this process' GIL with the probe, so use a real Redis for the
+stall numbers.
+
+    python -m benchmarks.cache_bulk --redis-url redis://localhost:6379/15 --keys 1000000 --output cache.json
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from typing import Callable, List, Optional
+
+PREFIX = "bench-cache:"
+FILL_CHUNK = 10_000
+VALUE = {"plan_id": 2, "status": "ACTIVE", "end_date": "2030-01-01T00:00:00"}
+
+def _key(i: int) -> str:
+    return f"{PREFIX}{i}"
+
+def _median_ms(func: Callable[[], None], repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - started)
+    return round(statistics.median(times) * 1000, 3)
+
+class StallProbe:
+    """PINGs Redis from its own client until stopped; keeps the slowest round trip"""
+
+    def __init__(self, client):
+        self.client = client
+        self.worst = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            started = time.perf_counter()
+            self.client.ping()
+            self.worst = max(self.worst, time.perf_counter() - started)
+            time.sleep(0.001)
+
+    def __enter__(self) -> "StallProbe":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+
+def fill(cache, keys: int) -> float:
+    started = time.perf_counter()
+    for start in range(0, keys, FILL_CHUNK):
+        cache.set_many({_key(i): VALUE for i in range(start, min(start + FILL_CHUNK, keys))}, 3600)
+    return time.perf_counter() - started
+
+def batch_operations(cache, keys: int, batch: int, repeat: int) -> dict:
+    rng = random.Random(7)
+    sample = [_key(i) for i in rng.sample(range(keys), batch)]
+    scratch = [f"{PREFIX}scratch:{i}" for i in range(batch)]
+    values = {key: VALUE for key in scratch}
+
+    def set_loop():
+        for key in scratch:
+            cache.set(key, VALUE, 60)
+
+    def delete_loop():
+        for key in scratch:
+            cache.delete(key)
+
+    def timed_delete(delete: Callable[[], None]) -> float:
+        times = []
+        for _ in range(repeat):
+            cache.set_many(values, 60)
+            started = time.perf_counter()
+            delete()
+            times.append(time.perf_counter() - started)
+        return round(statistics.median(times) * 1000, 3)
+
+    results = {
+        "get": {
+            "loop_ms": _median_ms(lambda: [cache.get(key) for key in sample], repeat),
+            "many_ms": _median_ms(lambda: cache.get_many(sample), repeat),
+        },
+        "set": {
+            "loop_ms": _median_ms(set_loop, repeat),
+            "many_ms": _median_ms(lambda: cache.set_many(values, 60), repeat),
+        },
+        "delete": {
+            "loop_ms": timed_delete(delete_loop),
+            "many_ms": timed_delete(lambda: cache.delete_many(scratch)),
+        },
+    }
+    for result in results.values():
+        result["speedup"] = round(result["loop_ms"] / result["many_ms"], 1)
+    return results
+
+def clear_group(cache, client, probe_client, group: int) -> dict:
+    pattern = f"{PREFIX}group:*"
+    values = {f"{PREFIX}group:{i}": VALUE for i in range(group)}
+
+    def keys_and_delete():
+        # The previous clear_pattern: one KEYS walks the whole keyspace in a single command
+        keys = client.keys(pattern)
+        if keys:
+            client.delete(*keys)
+
+    strategies = {
+        "keys": keys_and_delete,
+        "scan": lambda: cache.clear_pattern(pattern),
+        "tags": lambda: cache.invalidate_tags(["bench-group"]),
+    }
+    results = {}
+    for name, clear in strategies.items():
+        cache.set_many(values, 3600, tags=["bench-group"] if name == "tags" else ())
+        with StallProbe(probe_client) as probe:
+            started = time.perf_counter()
+            clear()
+            elapsed = time.perf_counter() - started
+        assert not cache.get_many(list(values)[:100]), name
+        results[name] = {
+            "elapsed_ms": round(elapsed * 1000, 1),
+            "worst_ping_ms": round(probe.worst * 1000, 2),
+        }
+    return results
+
+def run(args: argparse.Namespace) -> dict:
+    os.environ["REDIS_URL"] = args.redis_url
+    os.environ.setdefault("DATABASE_URL", "sqlite:///./benchmark.db")
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+    if args.fake:
+        from benchmarks import local_stack
+        local_stack.install_fake_redis()
+
+    import redis
+    from app.core.cache import Cache, get_redis
+
+    client = get_redis()
+    probe_client = redis.from_url(args.redis_url)
+    cache = Cache()
+    try:
+        fill_seconds = fill(cache, args.keys)
+        return {
+            "keys": args.keys,
+            "fill_keys_per_s": round(args.keys / fill_seconds),
+            "dbsize": client.dbsize(),
+            "batch": {"size": args.batch, **batch_operations(cache, args.keys, args.batch, args.repeat)},
+            "clear": {"group": args.group, **clear_group(cache, client, probe_client, args.group)},
+        }
+    finally:
+        cache.clear_pattern(f"{PREFIX}*")
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Multi-key cache operations on a large keyspace")
+    parser.add_argument("--redis-url", default="redis://localhost:6379/15")
+    parser.add_argument("--fake", action="store_true", help="use in-memory fakeredis")
+    parser.add_argument("--keys", type=int, default=1_000_000)
+    parser.add_argument("--batch", type=int, default=100, help="keys per multi-key call")
+    parser.add_argument("--group", type=int, default=10_000, help="keys to clear by pattern/tag")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args(argv)
+
+    results = run(args)
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
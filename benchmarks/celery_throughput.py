@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Measure Celery worker throughput (tasks/s) with the current broker settings.
+
+Enqueues --tasks count_task messages on a dedicated queue, starts --workers
+worker processes on it (unless --no-start, for workers you run yourself with
+`--include app.tasks.benchmark`) and reports completed tasks per second,
+overall and per worker. The production worker does not load count_task. Compare runs
+while varying CELERY_PREFETCH_MULTIPLIER, CELERY_ACKS_LATE and
+CELERY_SERIALIZER in the environment.
+
+    python -m benchmarks.celery_throughput --tasks 20000 --workers 2 --concurrency 8
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import uuid
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Celery tasks/s benchmark")
+    parser.add_argument("--tasks", type=int, default=10_000)
+    parser.add_argument("--workers", type=int, default=1, help="worker processes to start")
+    parser.add_argument("--concurrency", type=int, default=4, help="pool size per worker")
+    parser.add_argument("--pool", default="prefork", help="prefork, threads, gevent, ...")
+    parser.add_argument("--work-ms", type=float, default=0.0, help="simulated work per task")
+    parser.add_argument("--queue", default="benchmark")
+    parser.add_argument("--timeout", type=float, default=600.0)
+    parser.add_argument("--no-start", action="store_true", help="use already running workers")
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args(argv)
+
+    from app.core.cache import get_redis
+    from app.core.config import settings
+    from app.tasks.benchmark import count_task
+
+    counter_key = f"benchmark:celery:{uuid.uuid4().hex}"
+    get_redis().set(counter_key, 0, ex=int(args.timeout) + 60)
+
+    # Publish everything first so the measurement is pure consumption
+    started = time.perf_counter()
+    for _ in range(args.tasks):
+        count_task.apply_async((counter_key, args.work_ms), queue=args.queue)
+    publish_seconds = time.perf_counter() - started
+    print(f"Published {args.tasks:,} tasks in {publish_seconds:.2f}s "
+          f"({args.tasks / publish_seconds:,.0f}/s)")
+
+    workers = []
+    if not args.no_start:
+        for i in range(args.workers):
+            workers.append(subprocess.Popen([
+                sys.executable, "-m", "celery", "-A", "app.core.celery_app", "worker",
+                "-Q", args.queue, "-c", str(args.concurrency), "-P", args.pool,
+                "--include", "app.tasks.benchmark",
+                "-n", f"bench{i}@%h", "--loglevel", "WARNING", "--without-gossip",
+                "--without-mingle", "--without-heartbeat",
+            ], env=os.environ.copy()))
+
+    try:
+        # Clock starts at the first completed task, excluding worker boot time
+        deadline = time.monotonic() + args.timeout
+        first = None
+        done = 0
+        while done < args.tasks and time.monotonic() < deadline:
+            done = int(get_redis().get(counter_key) or 0)
+            if done and first is None:
+                first = (time.perf_counter(), done)
+            time.sleep(0.05)
+        finished = time.perf_counter()
+    finally:
+        for worker in workers:
+            worker.terminate()
+        for worker in workers:
+            worker.wait()
+        get_redis().delete(counter_key)
+
+    if first is None or done < args.tasks:
+        print(f"❌ Only {done:,}/{args.tasks:,} tasks finished within {args.timeout}s")
+        return 1
+
+    seconds = max(finished - first[0], 1e-9)
+    rate = (done - first[1]) / seconds
+    result = {
+        "tasks": args.tasks,
+        "workers": args.workers,
+        "concurrency": args.concurrency,
+        "pool": args.pool,
+        "work_ms": args.work_ms,
+        "serializer": settings.CELERY_SERIALIZER,
+        "prefetch_multiplier": settings.CELERY_PREFETCH_MULTIPLIER,
+        "acks_late": settings.CELERY_ACKS_LATE,
+        "tasks_per_second": round(rate, 1),
+        "tasks_per_second_per_worker": round(rate / max(args.workers, 1), 1),
+    }
+    print(f"✅ {result['tasks_per_second']:,} tasks/s "
+          f"({result['tasks_per_second_per_worker']:,} per worker)")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+CPU cost vs bytes saved for each response encoding and level.
+
+Builds representative API payloads (plan catalog, batch entitlement lookup,
+single subscription) and compresses each with the middleware's own
+compressors at several levels, reporting compressed size, ratio and the
+median time per response. Use it to pick COMPRESSION_*_LEVEL and
+COMPRESSION_MINIMUM_SIZE.
+
+    python -m benchmarks.compression_levels --repeat 50 --output compression.json
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./benchmark.db")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+
+from app.core import compression
+
+LEVELS = {"gzip": [1, 5, 9], "br": [1, 4, 8, 11], "zstd": [1, 3, 9, 19]}
+FACTORIES = {
+    "gzip": compression.GzipCompressor,
+    "br": compression.BrotliCompressor,
+    "zstd": compression.ZstdCompressor,
+}
+
+def payloads() -> Dict[str, bytes]:
+    now = datetime(2026, 1, 1)
+    plans = [
+        {
+            "id": n,
+            "name": f"Plan {n}",
+            "description": f"Subscription plan {n} with priority support and {n * 10} GB of storage",
+            "price": round(4.99 + n, 2),
+            "duration_days": 30 if n % 3 else 365,
+            "features": json.dumps(["api", "sso", "audit_log", "exports"][: 1 + n % 4]),
+            "feature_bits": (1 << (2 + n % 4)) - 2,
+            "created_at": now.isoformat(),
+            "updated_at": now.isoformat(),
+        }
+        for n in range(1, 51)
+    ]
+    entitlements = {
+        user_id: {
+            "plan_id": 1 + user_id % 50,
+            "status": "ACTIVE",
+            "end_date": (now + timedelta(days=user_id % 365)).isoformat(),
+            "feature_bits": 6,
+        } if user_id % 7 else None
+        for user_id in range(1, 1001)
+    }
+    subscription = {
+        "id": 1, "user_id": 1, "plan_id": 1, "status": "ACTIVE",
+        "start_date": now.isoformat(), "end_date": (now + timedelta(days=30)).isoformat(),
+        "created_at": now.isoformat(), "updated_at": now.isoformat(), "cancelled_at": None,
+        "plan": plans[0],
+    }
+    entitlement = entitlements[1]
+    return {
+        name: json.dumps(value, separators=(",", ":")).encode()
+        for name, value in {
+            "plan_catalog": plans,
+            "lookup_1000": entitlements,
+            "subscription": subscription,
+            "entitlement": entitlement,
+        }.items()
+    }
+
+def measure(factory, level: int, body: bytes, repeat: int) -> Dict[str, float]:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter_ns()
+        compressed = factory(level).compress_all(body)
+        timings.append(time.perf_counter_ns() - started)
+    median_us = statistics.median(timings) / 1000
+    return {
+        "bytes": len(compressed),
+        "ratio": round(len(body) / len(compressed), 2),
+        "median_us": round(median_us, 1),
+        "mb_per_s": round(len(body) / median_us, 1),
+    }
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Response compression cost/benefit benchmark")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args(argv)
+
+    available = compression.available_encodings()
+    results: Dict[str, dict] = {}
+    for name, body in payloads().items():
+        results[name] = {"identity_bytes": len(body)}
+        print(f"\n{name}: {len(body)} bytes")
+        print(f"  {'encoding':<10}{'level':>6}{'bytes':>9}{'ratio':>8}{'median us':>11}{'MB/s':>9}")
+        for encoding, levels in LEVELS.items():
+            if encoding not in available:
+                print(f"  {encoding:<10} (not installed)")
+                continue
+            for level in levels:
+                row = measure(FACTORIES[encoding], level, body, args.repeat)
+                results[name][f"{encoding}-{level}"] = row
+                print(f"  {encoding:<10}{level:>6}{row['bytes']:>9}{row['ratio']:>8}"
+                      f"{row['median_us']:>11}{row['mb_per_s']:>9}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
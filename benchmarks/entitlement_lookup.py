@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Compare a batch entitlement lookup with the per-user loop it replaces.
+
+Seeds --users users with an active subscription, then for --batch of them
+times N sequential `GET /subscriptions/{user_id}` calls against N
+`GET /subscriptions/{user_id}/entitlement` calls and one
+`POST /subscriptions/lookup` with a cold and a warm entitlement cache,
+counting SQL statements and response bytes for each. Runs in-process (ASGI transport) against
+BENCH_DATABASE_URL / --database-url and fakeredis.
+
+    python -m benchmarks.entitlement_lookup --users 5000 --batch 1000
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+from typing import List, Optional
+
+import httpx
+
+from benchmarks import local_stack
+
+API = "/api/v1"
+
+class StatementCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args):
+        self.count += 1
+
+async def run(args: argparse.Namespace) -> dict:
+    app, seeded = local_stack.build_app(args.users, args.database_url)
+
+    from sqlalchemy import event
+    from app.core.cache import get_redis
+    from app.db.session import get_engine
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    counter = StatementCounter()
+    event.listen(get_engine(), "before_cursor_execute", counter)
+    user_ids = [user_id for _, user_id in seeded[:args.batch]]
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        token = (await client.post(f"{API}/auth/token", data={
+            "username": seeded[0][0], "password": local_stack.DEFAULT_PASSWORD
+        })).json()["access_token"]
+        client.headers["Authorization"] = f"Bearer {token}"
+
+        async def timed(label: str, calls):
+            counter.count = 0
+            started = time.perf_counter()
+            responses = await calls()
+            elapsed = time.perf_counter() - started
+            assert all(response.status_code == 200 for response in responses), label
+            return {
+                "ms": round(elapsed * 1000, 2),
+                "requests": len(responses),
+                "sql_statements": counter.count,
+                "response_bytes": sum(len(response.content) for response in responses),
+            }
+
+        async def loop():
+            return [await client.get(f"{API}/subscriptions/{user_id}") for user_id in user_ids]
+
+        async def entitlement_loop():
+            return [await client.get(f"{API}/subscriptions/{user_id}/entitlement") for user_id in user_ids]
+
+        async def lookup():
+            return [await client.post(f"{API}/subscriptions/lookup", json={"user_ids": user_ids})]
+
+        result = {"users": args.users, "batch": len(user_ids)}
+        result["per_user_loop"] = await timed("loop", loop)
+        result["per_user_entitlement_loop"] = await timed("entitlement loop", entitlement_loop)
+        for key in get_redis().scan_iter("entitlement:*"):
+            get_redis().delete(key)
+        result["lookup_cold"] = await timed("lookup cold", lookup)
+        result["lookup_warm"] = await timed("lookup warm", lookup)
+    result["speedup_cold"] = round(result["per_user_loop"]["ms"] / result["lookup_cold"]["ms"], 1)
+    result["speedup_warm"] = round(result["per_user_loop"]["ms"] / result["lookup_warm"]["ms"], 1)
+    result["payload_ratio"] = round(
+        result["per_user_loop"]["response_bytes"] / result["per_user_entitlement_loop"]["response_bytes"], 1
+    )
+    return result
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Batch entitlement lookup benchmark")
+    parser.add_argument("--database-url", help="defaults to BENCH_DATABASE_URL or a local SQLite file")
+    parser.add_argument("--users", type=int, default=2000, help="seeded users")
+    parser.add_argument("--batch", type=int, default=1000, help="users looked up")
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args(argv)
+
+    result = asyncio.run(run(args))
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
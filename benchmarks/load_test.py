@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+Concurrent HTTP load generator for the subscription service.
+
+Runs a weighted mix of login, plan list, entitlement read, upgrade and
+cancel/re-subscribe operations with either
+
+* a closed model: `--concurrency` virtual users issuing requests back to back, or
+* an open model: requests arrive at a fixed `--rps` regardless of how fast the
+  service answers; latency is measured from the scheduled send time, so a
+  stalled service shows up in the tail instead of silently lowering the rate.
+
+Latencies are recorded in HdrHistograms and summarised as p50/p90/p99/p99.9.
+Results can be saved as JSON and compared against a previous run:
+
+    python -m benchmarks.load_test --local --users 200 --duration 30 --output base.json
+    python -m benchmarks.load_test --local --users 200 --duration 30 --compare base.json
+"""
+import argparse
+import asyncio
+import base64
+import json
+import platform
+import random
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+from hdrh.histogram import HdrHistogram
+
+API = "/api/v1"
+DEFAULT_WORKLOAD = "login=1,plans=5,entitlement=10,upgrade=2,cancel=1"
+OPERATIONS = ("login", "plans", "entitlement", "upgrade", "cancel", "subscribe")
+
+# Histogram range: 1us .. 60s, 3 significant digits
+HIST_MIN_US, HIST_MAX_US, HIST_DIGITS = 1, 60_000_000, 3
+
+def parse_workload(spec: str) -> Dict[str, int]:
+    weights = {}
+    for item in spec.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown operation '{name}', expected one of {OPERATIONS}")
+        weights[name] = int(weight or 1)
+    return weights
+
+def _user_id_from_token(token: str) -> int:
+    payload = token.split(".")[1]
+    payload += "=" * (-len(payload) % 4)
+    return int(json.loads(base64.urlsafe_b64decode(payload))["sub"])
+
+class Recorder:
+    """Per-operation latency histograms and status code counters"""
+
+    def __init__(self):
+        self.histograms: Dict[str, HdrHistogram] = {}
+        self.errors: Dict[str, int] = {}
+        self.status_codes: Dict[str, Dict[str, int]] = {}
+        self.recording = False
+
+    def record(self, op: str, latency_ns: int, status_code: Optional[int]) -> None:
+        if not self.recording:
+            return
+        hist = self.histograms.get(op)
+        if hist is None:
+            hist = self.histograms[op] = HdrHistogram(HIST_MIN_US, HIST_MAX_US, HIST_DIGITS)
+        hist.record_value(min(max(latency_ns // 1000, HIST_MIN_US), HIST_MAX_US))
+        codes = self.status_codes.setdefault(op, {})
+        key = str(status_code) if status_code is not None else "error"
+        codes[key] = codes.get(key, 0) + 1
+        if status_code is None or status_code >= 400:
+            self.errors[op] = self.errors.get(op, 0) + 1
+
+    def summary(self, elapsed: float) -> Dict[str, dict]:
+        total = HdrHistogram(HIST_MIN_US, HIST_MAX_US, HIST_DIGITS)
+        results = {}
+        for op, hist in sorted(self.histograms.items()):
+            total.add(hist)
+            results[op] = self._summarise(hist, elapsed, self.errors.get(op, 0))
+            results[op]["status_codes"] = self.status_codes.get(op, {})
+        results["all"] = self._summarise(total, elapsed, sum(self.errors.values()))
+        return results
+
+    @staticmethod
+    def _summarise(hist: HdrHistogram, elapsed: float, errors: int) -> dict:
+        count = hist.get_total_count()
+        return {
+            "count": count,
+            "errors": errors,
+            "throughput_rps": round(count / elapsed, 2) if elapsed else 0.0,
+            "mean_ms": round(hist.get_mean_value() / 1000, 3),
+            "p50_ms": hist.get_value_at_percentile(50) / 1000,
+            "p90_ms": hist.get_value_at_percentile(90) / 1000,
+            "p99_ms": hist.get_value_at_percentile(99) / 1000,
+            "p99_9_ms": hist.get_value_at_percentile(99.9) / 1000,
+            "max_ms": hist.get_max_value() / 1000,
+        }
+
+class VirtualUser:
+    def __init__(self, email: str, password: str):
+        self.email = email
+        self.password = password
+        self.user_id: Optional[int] = None
+        self.headers: Dict[str, str] = {}
+        self.busy = asyncio.Lock()
+
+class Workload:
+    """The operations a virtual user can perform"""
+
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder, plan_ids: List[int]):
+        self.client = client
+        self.recorder = recorder
+        self.plan_ids = plan_ids
+
+    async def _request(self, op: str, method: str, url: str, started_ns: int, **kwargs) -> Optional[httpx.Response]:
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            response = None
+        self.recorder.record(
+            op, time.perf_counter_ns() - started_ns,
+            response.status_code if response is not None else None
+        )
+        return response
+
+    async def login(self, user: VirtualUser, started_ns: int) -> None:
+        response = await self._request(
+            "login", "POST", f"{API}/auth/token", started_ns,
+            data={"username": user.email, "password": user.password},
+        )
+        if response is not None and response.status_code == 200:
+            token = response.json()["access_token"]
+            user.headers = {"Authorization": f"Bearer {token}"}
+            user.user_id = _user_id_from_token(token)
+
+    async def plans(self, user: VirtualUser, started_ns: int) -> None:
+        await self._request("plans", "GET", f"{API}/plans/", started_ns, headers=user.headers)
+
+    async def entitlement(self, user: VirtualUser, started_ns: int) -> None:
+        await self._request(
+            "entitlement", "GET", f"{API}/subscriptions/{user.user_id}", started_ns,
+            headers=user.headers,
+        )
+
+    async def upgrade(self, user: VirtualUser, started_ns: int) -> None:
+        await self._request(
+            "upgrade", "PUT", f"{API}/subscriptions/{user.user_id}", started_ns,
+            headers=user.headers, json={"plan_id": random.choice(self.plan_ids)},
+        )
+
+    async def cancel(self, user: VirtualUser, started_ns: int) -> None:
+        # Cancel, then subscribe again so the user keeps an active subscription
+        await self._request(
+            "cancel", "DELETE", f"{API}/subscriptions/{user.user_id}", started_ns,
+            headers=user.headers,
+        )
+        await self._request(
+            "subscribe", "POST", f"{API}/subscriptions/", time.perf_counter_ns(),
+            headers=user.headers,
+            json={"user_id": user.user_id, "plan_id": random.choice(self.plan_ids)},
+        )
+
+    async def run(self, op: str, user: VirtualUser, started_ns: int) -> None:
+        # One operation per user at a time, so cancel/subscribe pairs stay consistent
+        async with user.busy:
+            if op != "login" and not user.headers:
+                await self.login(user, time.perf_counter_ns())
+                started_ns = time.perf_counter_ns()
+            await getattr(self, op)(user, started_ns)
+
+async def run_closed(workload: Workload, users: List[VirtualUser], ops: List[str],
+                     weights: List[int], concurrency: int, duration: float) -> None:
+    deadline = time.perf_counter() + duration
+
+    async def worker(index: int) -> None:
+        while time.perf_counter() < deadline:
+            op = random.choices(ops, weights)[0]
+            user = users[index % len(users)] if len(users) >= concurrency else random.choice(users)
+            await workload.run(op, user, time.perf_counter_ns())
+
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+
+async def run_open(workload: Workload, users: List[VirtualUser], ops: List[str],
+                   weights: List[int], rps: float, concurrency: int, duration: float) -> int:
+    """
+    Fire requests on a fixed schedule. An arrival that finds all
+    `concurrency` connections busy waits for one, and its latency still
+    counts from its scheduled time, so stalls land in the tail. Returns the
+    longest queue of waiting arrivals.
+    """
+    in_flight = asyncio.Semaphore(concurrency)
+    tasks = set()
+    queued = max_queued = 0
+    interval_ns = int(1e9 / rps)
+    start_ns = time.perf_counter_ns()
+    end_ns = start_ns + int(duration * 1e9)
+    scheduled_ns = start_ns
+
+    async def fire(op: str, user: VirtualUser, at_ns: int) -> None:
+        nonlocal queued
+        queued += 1
+        waiting = True
+        try:
+            async with in_flight:
+                queued -= 1
+                waiting = False
+                await workload.run(op, user, at_ns)
+        finally:
+            if waiting:
+                queued -= 1
+
+    while scheduled_ns < end_ns:
+        delay = (scheduled_ns - time.perf_counter_ns()) / 1e9
+        if delay > 0:
+            await asyncio.sleep(delay)
+        task = asyncio.create_task(
+            fire(random.choices(ops, weights)[0], random.choice(users), scheduled_ns)
+        )
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        max_queued = max(max_queued, queued)
+        scheduled_ns += interval_ns
+
+    if tasks:
+        await asyncio.gather(*tasks)
+    return max_queued
+
+async def run_load(args: argparse.Namespace, transport: Optional[httpx.AsyncBaseTransport],
+                   credentials: List[Tuple[str, str]]) -> dict:
+    weights_by_op = parse_workload(args.workload)
+    ops, weights = list(weights_by_op), list(weights_by_op.values())
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    async with httpx.AsyncClient(
+        base_url=args.base_url, transport=transport, limits=limits, timeout=args.timeout
+    ) as client:
+        users = [VirtualUser(email, password) for email, password in credentials]
+        plan_ids = args.plan_ids or [1, 2]
+        workload = Workload(client, recorder, plan_ids)
+
+        # Log everyone in before measuring
+        await asyncio.gather(*(workload.login(user, time.perf_counter_ns()) for user in users))
+        users = [user for user in users if user.headers]
+        if not users:
+            raise SystemExit("No virtual user could log in; check credentials and base URL")
+
+        if args.warmup:
+            await run_closed(workload, users, ops, weights, args.concurrency, args.warmup)
+
+        recorder.recording = True
+        started = time.perf_counter()
+        max_queued = 0
+        if args.model == "open":
+            max_queued = await run_open(workload, users, ops, weights, args.rps, args.concurrency, args.duration)
+        else:
+            await run_closed(workload, users, ops, weights, args.concurrency, args.duration)
+        elapsed = time.perf_counter() - started
+        recorder.recording = False
+
+    return {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(),
+            "target": "local" if transport is not None else args.base_url,
+            "model": args.model,
+            "rps": args.rps if args.model == "open" else None,
+            "concurrency": args.concurrency,
+            "duration_s": round(elapsed, 3),
+            "users": len(users),
+            "workload": weights_by_op,
+            "max_queued_arrivals": max_queued,
+            "python": platform.python_version(),
+        },
+        "results": recorder.summary(elapsed),
+    }
+
+COMPARED_METRICS = ("p50_ms", "p99_ms", "p99_9_ms")
+
+def compare(current: dict, baseline: dict, threshold: float) -> List[str]:
+    """Return human-readable regressions of `current` against `baseline`"""
+    regressions = []
+    for op, stats in current["results"].items():
+        base = baseline["results"].get(op)
+        if not base:
+            continue
+        for metric in COMPARED_METRICS:
+            if base[metric] and stats[metric] > base[metric] * (1 + threshold):
+                regressions.append(
+                    f"{op}.{metric}: {base[metric]:.3f} -> {stats[metric]:.3f} "
+                    f"(+{(stats[metric] / base[metric] - 1) * 100:.1f}%)"
+                )
+        if base["throughput_rps"] and stats["throughput_rps"] < base["throughput_rps"] * (1 - threshold):
+            regressions.append(
+                f"{op}.throughput_rps: {base['throughput_rps']:.1f} -> {stats['throughput_rps']:.1f}"
+            )
+    return regressions
+
+def print_report(report: dict) -> None:
+    meta = report["meta"]
+    print(f"Target: {meta['target']}  model={meta['model']}  concurrency={meta['concurrency']}"
+          + (f"  rps={meta['rps']}" if meta["rps"] else "")
+          + f"  duration={meta['duration_s']}s  users={meta['users']}")
+    if meta["max_queued_arrivals"]:
+        print(f"Arrivals queued behind the concurrency cap (max): {meta['max_queued_arrivals']}")
+    header = f"{'operation':<12}{'count':>9}{'errors':>8}{'rps':>10}{'p50':>10}{'p90':>10}{'p99':>10}{'p99.9':>10}{'max':>10}"
+    print(header)
+    print("-" * len(header))
+    for op, s in report["results"].items():
+        print(f"{op:<12}{s['count']:>9}{s['errors']:>8}{s['throughput_rps']:>10.1f}"
+              f"{s['p50_ms']:>10.2f}{s['p90_ms']:>10.2f}{s['p99_ms']:>10.2f}"
+              f"{s['p99_9_ms']:>10.2f}{s['max_ms']:>10.2f}")
+    print("(latencies in ms)")
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Load test the subscription service")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--local", action="store_true",
+                        help="run the app in-process on BENCH_DATABASE_URL (default SQLite) with fakeredis")
+    parser.add_argument("--database-url", help="database for --local (e.g. a local Postgres)")
+    parser.add_argument("--model", choices=("closed", "open"), default="closed")
+    parser.add_argument("--rps", type=float, default=100.0, help="arrival rate for the open model")
+    parser.add_argument("--concurrency", type=int, default=32,
+                        help="virtual users (closed) or max in-flight requests (open)")
+    parser.add_argument("--duration", type=float, default=30.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="unmeasured warm-up seconds")
+    parser.add_argument("--workload", default=DEFAULT_WORKLOAD,
+                        help=f"weighted operation mix (default: {DEFAULT_WORKLOAD})")
+    parser.add_argument("--users", type=int, default=50, help="number of virtual user accounts")
+    parser.add_argument("--user-template", default="loadtest{n}@example.com",
+                        help="email pattern of pre-seeded accounts for remote targets")
+    parser.add_argument("--password", default=None)
+    parser.add_argument("--plan-ids", type=int, nargs="*", help="plans used by upgrade/subscribe")
+    parser.add_argument("--timeout", type=float, default=10.0)
+    parser.add_argument("--output", help="write JSON results to this file")
+    parser.add_argument("--compare", help="baseline JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="allowed relative regression before failing (default 0.10)")
+    return parser
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    transport = None
+
+    if args.local:
+        from benchmarks import local_stack
+
+        app, seeded = local_stack.build_app(args.users, args.database_url)
+        transport = httpx.ASGITransport(app=app)
+        args.base_url = "http://loadtest"
+        password = args.password or local_stack.DEFAULT_PASSWORD
+        credentials = [(email, password) for email, _ in seeded]
+    else:
+        password = args.password or "testpassword"
+        credentials = [(args.user_template.format(n=n), password) for n in range(args.users)]
+
+    report = asyncio.run(run_load(args, transport, credentials))
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"\nRegressions (>{args.threshold * 100:.0f}%) against {args.compare}:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\nNo regressions against {args.compare}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+"""
+In-process stack for benchmarks: the FastAPI app on SQLite (or any
+DATABASE_URL, e.g. a local Postgres) with fakeredis standing in for Redis.
+
+`install_fake_redis()` must run before the first Redis client is created.
+Importing `app` creates none: get_redis(), the rate limiter and the other
+clients are built on first use, so the stack is importable without Redis.
+"""
+import functools
+import os
+from typing import List, Optional, Tuple
+
+DEFAULT_DATABASE_URL = "sqlite:///./benchmark.db"
+DEFAULT_PASSWORD = "loadtestpassword"
+
+def configure_environment(database_url: Optional[str] = None) -> None:
+    os.environ["DATABASE_URL"] = database_url or os.environ.get(
+        "BENCH_DATABASE_URL", DEFAULT_DATABASE_URL
+    )
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+    os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+
+def install_fake_redis() -> None:
+    """
+    Route every redis.from_url() call (sync and asyncio) to one shared
+    in-memory fakeredis server. No-op if redis is already faked, e.g. by
+    tests/conftest.py when pytest also loads the micro-benchmark conftest.
+    """
+    import fakeredis
+    import fakeredis.aioredis
+    import redis
+    import redis.asyncio
+
+    if getattr(redis.from_url, "func", None) == fakeredis.FakeRedis.from_url:
+        return
+    server = fakeredis.FakeServer()
+    factory = functools.partial(fakeredis.FakeRedis.from_url, server=server)
+    redis.from_url = factory
+    redis.Redis.from_url = factory
+    redis.asyncio.from_url = functools.partial(fakeredis.aioredis.FakeRedis.from_url, server=server)
+
+def seed(num_users: int, password: str = DEFAULT_PASSWORD) -> List[Tuple[str, int]]:
+    """
+    Create the schema, a few plans and `num_users` users with an active
+    subscription each. Returns (email, user_id) pairs.
+    """
+    from datetime import datetime, timedelta
+    from app.core.security import get_password_hash
+    from app.db.base_class import Base
+    from app.db.session import SessionLocal, get_engine
+    from app.models import feature, outbox, webhook  # noqa: F401  (registers the tables)
+    from app.models.subscription import Plan, Subscription, SubscriptionStatus
+    from app.models.user import User
+
+    engine = get_engine()
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    try:
+        plans = [
+            Plan(name="Basic", description="Basic plan", price=9.99, duration_days=30),
+            Plan(name="Premium", description="Premium plan", price=19.99, duration_days=30),
+            Plan(name="Annual", description="Annual plan", price=199.0, duration_days=365),
+        ]
+        db.add_all(plans)
+        db.flush()
+
+        # bcrypt is deliberately slow; every benchmark user shares one hash
+        hashed_password = get_password_hash(password)
+        users = [
+            User(email=f"loadtest{n}@example.com", hashed_password=hashed_password)
+            for n in range(num_users)
+        ]
+        db.add_all(users)
+        db.flush()
+
+        now = datetime.utcnow()
+        db.add_all([
+            Subscription(
+                user_id=user.id,
+                plan_id=plans[0].id,
+                status=SubscriptionStatus.ACTIVE,
+                start_date=now,
+                end_date=now + timedelta(days=30),
+            )
+            for user in users
+        ])
+        db.commit()
+        return [(user.email, user.id) for user in users]
+    finally:
+        db.close()
+
+def build_app(num_users: int, database_url: Optional[str] = None):
+    """Return (asgi_app, [(email, user_id)]) for an in-process benchmark run"""
+    configure_environment(database_url)
+    install_fake_redis()
+
+    from app.core.rate_limit import rate_limiter
+    from app.main import app
+
+    # The per-IP limiter would throttle a load generator on a single address
+    rate_limiter.requests_per_minute = 10 ** 9
+    return app, seed(num_users)
@@ -0,0 +1,28 @@
+import random
+from jose import jwt
+from app.api import deps
+from app.core import security
+from app.core.cache import Cache
+from app.core.config import settings
+
+def test_create_access_token(benchmark):
+    benchmark(security.create_access_token, 1)
+
+def test_jwt_decode(benchmark):
+    token = security.create_access_token(1)
+    benchmark(jwt.decode, token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+
+def test_get_current_user(benchmark, db, dataset):
+    rng = random.Random(3)
+    tokens = [security.create_access_token(rng.randint(1, dataset)) for _ in range(1000)]
+    benchmark(lambda: deps.get_current_user(db=db, token=rng.choice(tokens)))
+
+def test_cache_set(benchmark):
+    cache = Cache()
+    value = {"id": 1, "plan_id": 2, "status": "ACTIVE", "end_date": "2030-01-01T00:00:00"}
+    benchmark(cache.set, "bench:cache", value, 60)
+
+def test_cache_get(benchmark):
+    cache = Cache()
+    cache.set("bench:cache", {"id": 1, "plan_id": 2, "status": "ACTIVE"}, 60)
+    benchmark(cache.get, "bench:cache")
@@ -0,0 +1,38 @@
+import itertools
+import random
+from app.crud import plan as crud_plan
+from app.crud import subscription as crud_subscription
+from app.models.subscription import SubscriptionStatus
+from app.schemas.subscription import PlanCreate, SubscriptionCreate, SubscriptionUpdate
+
+def test_get_active_subscription(benchmark, db, dataset):
+    rng = random.Random(1)
+    benchmark(lambda: crud_subscription.get_active_subscription(db, user_id=rng.randint(1, dataset)))
+
+def test_create_subscription(benchmark, db, dataset):
+    # Users past the seeded range have no subscription yet
+    user_ids = itertools.count(dataset + 1 + random.randrange(10 ** 9))
+    benchmark(lambda: crud_subscription.create_subscription(
+        db, obj_in=SubscriptionCreate(user_id=next(user_ids), plan_id=1)
+    ))
+
+def test_change_plan(benchmark, db, dataset):
+    # A plan nobody subscribes to: the lookup must not depend on subscriptions
+    plan = crud_plan.get_by_name(db, "Unsubscribed") or crud_plan.create(
+        db, obj_in=PlanCreate(name="Unsubscribed", price=1.0, duration_days=30)
+    )
+    rng = random.Random(3)
+    benchmark(lambda: crud_subscription.update_subscription(
+        db, user_id=rng.randint(1, dataset), obj_in=SubscriptionUpdate(plan_id=plan.id)
+    ))
+
+def test_update_subscription(benchmark, db, dataset):
+    rng = random.Random(2)
+
+    benchmark(lambda: crud_subscription.update_subscription(
+        db, user_id=rng.randint(1, dataset),
+        obj_in=SubscriptionUpdate(status=SubscriptionStatus.ACTIVE)
+    ))
+
+def test_plan_get_multi(benchmark, db):
+    benchmark(lambda: crud_plan.get_multi(db, skip=0, limit=100))
@@ -0,0 +1,63 @@
+"""
+Fixtures for the CRUD / core micro-benchmarks.
+
+The database is seeded once per dataset size and reused by later runs
+(BENCH_DATABASE_URL, default one SQLite file per size). Redis is fakeredis
+unless BENCH_REDIS_URL points at a real server.
+"""
+import os
+import pytest
+from benchmarks import local_stack
+
+DATASET_SIZES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--dataset-size", default="1k", choices=sorted(DATASET_SIZES),
+        help="number of seeded users/subscription histories (1k, 100k or 1m)"
+    )
+
+def pytest_configure(config):
+    size = config.getoption("--dataset-size")
+    local_stack.configure_environment(
+        os.environ.get("BENCH_DATABASE_URL", f"sqlite:///./benchmark_{size}.db")
+    )
+    if os.environ.get("BENCH_REDIS_URL"):
+        os.environ["REDIS_URL"] = os.environ["BENCH_REDIS_URL"]
+    else:
+        local_stack.install_fake_redis()
+
+def _seed(engine, size: int) -> None:
+    from generate_test_data import generate
+
+    generate(engine, users=size, plans=3, reset=True, progress=False)
+
+@pytest.fixture(scope="session")
+def dataset(request):
+    """Seeded dataset; returns the number of users (every user has at least one subscription)"""
+    from sqlalchemy import func, select
+    from sqlalchemy.exc import SQLAlchemyError
+    from app.db.session import get_engine
+    from app.models.user import User
+
+    engine = get_engine()
+    size = DATASET_SIZES[request.config.getoption("--dataset-size")]
+    try:
+        with engine.connect() as conn:
+            seeded = conn.execute(select(func.count()).select_from(User.__table__)).scalar()
+    except SQLAlchemyError:
+        seeded = None
+    if seeded != size:
+        _seed(engine, size)
+    return size
+
+@pytest.fixture
+def db(dataset):
+    from app.db.session import SessionLocal
+
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.rollback()
+        session.close()
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Run the micro-benchmarks and manage their baselines.
+
+    python -m benchmarks.micro.run save --dataset-size 100k
+    python -m benchmarks.micro.run compare --dataset-size 100k
+
+`save` stores the run as the new baseline for that dataset size; `compare`
+runs again and fails (exit code 1) when any benchmark's mean is more than
+`--threshold` percent slower than the latest baseline.
+"""
+import argparse
+import os
+import sys
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BASELINE_DIR = os.path.join(HERE, "baselines")
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="CRUD/core micro-benchmarks")
+    parser.add_argument("command", choices=("run", "save", "compare"))
+    parser.add_argument("--dataset-size", default="1k", choices=("1k", "100k", "1m"))
+    parser.add_argument("--threshold", type=int, default=10,
+                        help="allowed mean regression in percent (compare)")
+    parser.add_argument("pytest_args", nargs=argparse.REMAINDER,
+                        help="extra arguments passed to pytest")
+    args = parser.parse_args()
+
+    storage = f"file://{os.path.join(BASELINE_DIR, args.dataset_size)}"
+    pytest_args = [HERE, "-q", f"--dataset-size={args.dataset_size}", f"--benchmark-storage={storage}"]
+    if args.command == "save":
+        pytest_args.append(f"--benchmark-save={args.dataset_size}")
+    elif args.command == "compare":
+        pytest_args += ["--benchmark-compare", f"--benchmark-compare-fail=mean:{args.threshold}%"]
+    return pytest.main(pytest_args + args.pytest_args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Per-request cost of the HTTP middleware stack.
+
+Drives a trivial JSON endpoint directly over ASGI (no sockets) through:
+
+  bare      the app with no middleware
+  legacy    CORSMiddleware plus the rate limiter, timing, error handling
+            and profiler as four @app.middleware("http") layers, as
+            app/main.py stacked them before the request pipeline
+  pipeline  CORSMiddleware plus RequestPipelineMiddleware
+
+Each stack runs twice: with a limiter that does no I/O (framework overhead
+only) and with the Redis limiter on fakeredis (the legacy limiter's GET
+then SETEX/INCR against the pipeline's single round trip). Overhead is
+reported per request relative to `bare`.
+
+    python -m benchmarks.middleware_overhead --requests 20000 --output middleware.json
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from typing import List, Optional
+
+from benchmarks.local_stack import configure_environment, install_fake_redis
+
+configure_environment()
+install_fake_redis()
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from app.core import rate_limit
+from app.core.cache import get_redis
+from app.core.middleware import RequestMetrics, RequestPipelineMiddleware
+from app.core.profiling import PROFILE_HEADER, ProfiledRoute
+
+class NullLimiter(rate_limit.RateLimiter):
+    async def allow(self, client_ip: str) -> bool:
+        return True
+
+def _endpoint_app() -> FastAPI:
+    app = FastAPI()
+    app.router.route_class = ProfiledRoute
+
+    @app.get("/plans/{plan_id}")
+    async def read_plan(plan_id: int):
+        return {"id": plan_id, "name": "Basic", "price": 9.99, "duration_days": 30}
+
+    return app
+
+def _cors(app: FastAPI) -> None:
+    app.add_middleware(
+        CORSMiddleware, allow_origins=["*"], allow_credentials=True,
+        allow_methods=["*"], allow_headers=["*"],
+    )
+
+def build_legacy(redis_limiter: bool) -> FastAPI:
+    from app.core.profiling import request_profile
+
+    app = _endpoint_app()
+    _cors(app)
+    limit = 10 ** 9
+
+    async def rate_limiter(request: Request, call_next):
+        if redis_limiter:
+            key = f"rate_limit:{request.client.host}"
+            current = get_redis().get(key)
+            if current is None:
+                get_redis().setex(key, 60, 1)
+            elif int(current) >= limit:
+                raise HTTPException(status_code=429, detail="Too many requests. Please try again later.")
+            else:
+                get_redis().incr(key)
+        return await call_next(request)
+
+    async def add_process_time_header(request: Request, call_next):
+        start_time = time.time()
+        response = await call_next(request)
+        response.headers["X-Process-Time"] = str(time.time() - start_time)
+        return response
+
+    async def error_handling_middleware(request: Request, call_next):
+        try:
+            return await call_next(request)
+        except Exception:
+            return JSONResponse(status_code=500, content={"detail": "Internal server error"})
+
+    async def request_profiler(request: Request, call_next):
+        with request_profile(request.headers.get(PROFILE_HEADER),
+                             request.method, request.url.path):
+            return await call_next(request)
+
+    for middleware in (rate_limiter, add_process_time_header, error_handling_middleware, request_profiler):
+        app.middleware("http")(middleware)
+    return app
+
+def build_pipeline(redis_limiter: bool) -> FastAPI:
+    app = _endpoint_app()
+    limiter = rate_limit.RateLimiter(10 ** 9) if redis_limiter else NullLimiter()
+    app.add_middleware(RequestPipelineMiddleware, limiter=limiter, metrics=RequestMetrics())
+    _cors(app)
+    return app
+
+async def _request(app, path: str) -> int:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "root_path": "", "query_string": b"", "server": ("bench", 80), "client": ("10.0.0.1", 5000),
+        "headers": [(b"host", b"bench"), (b"origin", b"http://example.com")],
+    }
+    status = 0
+    received = False
+
+    async def receive():
+        nonlocal received
+        if received:
+            # Like a live connection: nothing more until the client goes away
+            await asyncio.Event().wait()
+        received = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+async def _time(app, requests: int, rounds: int) -> float:
+    """Median over `rounds` of the mean ns per request"""
+    for n in range(200):
+        assert await _request(app, f"/plans/{n}") == 200
+    samples: List[float] = []
+    for _ in range(rounds):
+        started = time.perf_counter_ns()
+        for n in range(requests):
+            await _request(app, f"/plans/{n}")
+        samples.append((time.perf_counter_ns() - started) / requests)
+    return statistics.median(samples)
+
+def run(requests: int, rounds: int) -> dict:
+    stacks: dict = {"bare": lambda redis_limiter: _endpoint_app()}
+    stacks["legacy"] = build_legacy
+    stacks["pipeline"] = build_pipeline
+    results: dict = {}
+    for redis_limiter in (False, True):
+        label = "redis_limiter" if redis_limiter else "no_io_limiter"
+        per_request = {
+            name: asyncio.run(_time(build(redis_limiter), requests, rounds))
+            for name, build in stacks.items()
+        }
+        results[label] = {
+            name: {
+                "us_per_request": round(ns / 1000, 1),
+                "overhead_us": round((ns - per_request["bare"]) / 1000, 1),
+            }
+            for name, ns in per_request.items()
+        }
+    return results
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="HTTP middleware per-request overhead benchmark")
+    parser.add_argument("--requests", type=int, default=5000, help="requests per round")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args(argv)
+
+    result = run(args.requests, args.rounds)
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
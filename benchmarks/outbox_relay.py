@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark the outbox relay: events drained from the database into the
+Redis stream per second.
+
+Fills the outbox with --events rows, then runs relay batches until it is
+empty (optionally from several threads, to exercise SKIP LOCKED on
+Postgres). Runs against BENCH_DATABASE_URL / --database-url and fakeredis
+unless BENCH_REDIS_URL points at a real Redis.
+
+    python -m benchmarks.outbox_relay --events 100000 --batch-size 1000 --target 10000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import local_stack
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Outbox relay throughput benchmark")
+    parser.add_argument("--database-url", help="defaults to BENCH_DATABASE_URL or a local SQLite file")
+    parser.add_argument("--events", type=int, default=50_000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--relays", type=int, default=1, help="concurrent relay workers")
+    parser.add_argument("--target", type=float, default=10_000, help="events/s required to pass")
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args(argv)
+
+    local_stack.configure_environment(args.database_url)
+    if os.environ.get("BENCH_REDIS_URL"):
+        os.environ["REDIS_URL"] = os.environ["BENCH_REDIS_URL"]
+    else:
+        local_stack.install_fake_redis()
+
+    from datetime import datetime
+    from sqlalchemy import insert
+    from app.core.cache import get_redis
+    from app.core.config import settings
+    from app.db.base_class import Base
+    from app.db.session import SessionLocal, get_engine
+    from app.models.outbox import OutboxEvent
+    from app.tasks.outbox import relay_batch
+
+    engine = get_engine()
+    Base.metadata.create_all(bind=engine)
+    get_redis().delete(settings.OUTBOX_STREAM)
+    now = datetime.utcnow()
+    payload = json.dumps({"plan_id": 1, "status": "ACTIVE", "end_date": now.isoformat()})
+    with engine.begin() as conn:
+        conn.execute(OutboxEvent.__table__.delete())
+        for offset in range(0, args.events, 10_000):
+            conn.execute(insert(OutboxEvent), [
+                {"event_type": "subscription.updated", "subscription_id": n, "user_id": n,
+                 "payload": payload, "created_at": now}
+                for n in range(offset, min(offset + 10_000, args.events))
+            ])
+
+    def drain() -> int:
+        db = SessionLocal()
+        relayed = 0
+        try:
+            while True:
+                count = relay_batch(db, args.batch_size)
+                if not count:
+                    return relayed
+                relayed += count
+        finally:
+            db.close()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.relays) as pool:
+        relayed = sum(pool.map(lambda _: drain(), range(args.relays)))
+    seconds = time.perf_counter() - started
+
+    result = {
+        "events": args.events,
+        "relayed": relayed,
+        "stream_length": get_redis().xlen(settings.OUTBOX_STREAM),
+        "batch_size": args.batch_size,
+        "relays": args.relays,
+        "seconds": round(seconds, 3),
+        "events_per_second": round(relayed / seconds, 1),
+    }
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    if result["events_per_second"] < args.target:
+        print(f"❌ Below target of {args.target:,.0f} events/s")
+        return 1
+    print(f"✅ {result['events_per_second']:,.0f} events/s")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Hold many idle SSE connections against one running API worker and measure
+fan-out latency of subscription changes.
+
+Opens --connections streams to /subscriptions/{user_id}/events spread over
+--watched users, then changes those users' plans --changes times and
+records how long each change takes to reach every watching connection.
+Run the server with a single worker (e.g. `uvicorn app.main:app`) and a
+high RATE_LIMIT_REQUESTS, raise the open-file limit on both sides
+(`ulimit -n 65536`) and pass --server-pid to report the worker's
+resident memory.
+
+    python -m benchmarks.sse_connections --base-url http://127.0.0.1:8000 \\
+        --email admin@example.com --password ... --connections 10000 --server-pid 1234
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from typing import Dict, List, Optional
+
+import httpx
+from hdrh.histogram import HdrHistogram
+
+API = "/api/v1"
+
+def _rss_mb(pid: Optional[int]) -> Optional[float]:
+    if not pid:
+        return None
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return None
+
+class Watcher:
+    def __init__(self, user_id: int):
+        self.user_id = user_id
+        self.connected = asyncio.Event()
+        self.received: List[int] = []  # perf_counter_ns at each change event
+
+    async def run(self, client: httpx.AsyncClient) -> None:
+        async with client.stream("GET", f"{API}/subscriptions/{self.user_id}/events") as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if line.startswith("event: snapshot"):
+                    self.connected.set()
+                elif line.startswith("event: subscription."):
+                    self.received.append(time.perf_counter_ns())
+
+async def run(args: argparse.Namespace) -> dict:
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    timeout = httpx.Timeout(30.0, read=None)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=timeout) as client:
+        token = (await client.post(f"{API}/auth/token", data={
+            "username": args.email, "password": args.password
+        })).json()["access_token"]
+        client.headers["Authorization"] = f"Bearer {token}"
+        plans = [plan["id"] for plan in (await client.get(f"{API}/plans/")).json()][:2]
+
+        watchers = [Watcher(1 + i % args.watched) for i in range(args.connections)]
+        by_user: Dict[int, List[Watcher]] = {}
+        for watcher in watchers:
+            by_user.setdefault(watcher.user_id, []).append(watcher)
+
+        rss_before = _rss_mb(args.server_pid)
+        started = time.perf_counter()
+        tasks = []
+        for start in range(0, len(watchers), args.connect_batch):
+            for watcher in watchers[start:start + args.connect_batch]:
+                tasks.append(asyncio.create_task(watcher.run(client)))
+            await asyncio.gather(*(w.connected.wait() for w in watchers[start:start + args.connect_batch]))
+        connect_seconds = time.perf_counter() - started
+        await asyncio.sleep(args.idle)
+        rss_idle = _rss_mb(args.server_pid)
+
+        histogram = HdrHistogram(1, 60 * 10 ** 9, 3)
+        expected_deliveries = 0
+        for change in range(args.changes):
+            user_id = 1 + change % args.watched
+            expected_deliveries += len(by_user[user_id])
+            expected = len(by_user[user_id][0].received) + 1
+            sent = time.perf_counter_ns()
+            await client.put(f"{API}/subscriptions/{user_id}", json={"plan_id": plans[change % len(plans)]})
+            deadline = time.monotonic() + 10
+            while (
+                any(len(w.received) < expected for w in by_user[user_id])
+                and time.monotonic() < deadline
+            ):
+                await asyncio.sleep(0.001)
+            for watcher in by_user[user_id]:
+                if len(watcher.received) >= expected:
+                    histogram.record_value(max(watcher.received[expected - 1] - sent, 1))
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    return {
+        "connections": args.connections,
+        "watched_users": args.watched,
+        "connect_seconds": round(connect_seconds, 2),
+        "server_rss_mb_before": rss_before,
+        "server_rss_mb_idle": rss_idle,
+        "deliveries": histogram.get_total_count(),
+        "expected_deliveries": expected_deliveries,
+        "fanout_ms": {
+            p: round(histogram.get_value_at_percentile(float(p)) / 1e6, 2)
+            for p in ("50", "99", "99.9")
+        },
+    }
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="SSE idle-connection and fan-out benchmark")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--connections", type=int, default=10_000)
+    parser.add_argument("--watched", type=int, default=100, help="distinct users watched")
+    parser.add_argument("--changes", type=int, default=200)
+    parser.add_argument("--connect-batch", type=int, default=500)
+    parser.add_argument("--idle", type=float, default=5.0, help="seconds to idle before changes")
+    parser.add_argument("--server-pid", type=int, help="report this process's RSS")
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args(argv)
+
+    result = asyncio.run(run(args))
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    return 0 if result["deliveries"] == result["expected_deliveries"] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Throughput of `python -m app.server` as the worker count grows.
+
+For each --workers value the server is started on --bind with that many
+workers (app preloaded, per-worker warm-up on), the benchmark waits for it
+to answer, drives closed-loop load on --path from --load-processes
+processes for --duration seconds, and then stops it gracefully. Reported per
+worker count: requests/s, p50/p99 latency, speed-up over the first count
+and scaling efficiency (speed-up / worker ratio).
+
+The server uses this environment's DATABASE_URL and REDIS_URL; raise
+RATE_LIMIT_REQUESTS, since every request comes from one address. Keep the
+load generator off the server's cores (e.g. `taskset -c 8-15` around this
+command with the server limited by WEB_WORKERS, or run it from another
+host with --base-url and start the server yourself), or the two compete
+and the curve flattens early.
+
+    python -m benchmarks.worker_scaling --email loadtest0@example.com --password loadtest \\
+        --workers 1 2 4 8 --load-processes 4 --duration 20 --output scaling.json
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import subprocess
+import sys
+import time
+from typing import List, Optional, Tuple
+
+import httpx
+from hdrh.histogram import HdrHistogram
+
+from benchmarks.load_test import HIST_DIGITS, HIST_MAX_US, HIST_MIN_US
+
+API = "/api/v1"
+
+def start_server(workers: int, bind: str, pidfile: str) -> subprocess.Popen:
+    env = dict(os.environ, WEB_PIDFILE=pidfile)
+    return subprocess.Popen(
+        [sys.executable, "-m", "app.server", "--workers", str(workers), "--bind", bind],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+def wait_until_up(base_url: str, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not come up within {timeout}s")
+
+def stop_server(server: subprocess.Popen) -> None:
+    server.send_signal(signal.SIGTERM)
+    try:
+        server.wait(timeout=60)
+    except subprocess.TimeoutExpired:
+        server.kill()
+
+async def _closed_loop(base_url: str, path: str, token: str, concurrency: int,
+                       warmup: float, duration: float) -> Tuple[bytes, int]:
+    histogram = HdrHistogram(HIST_MIN_US, HIST_MAX_US, HIST_DIGITS)
+    errors = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    headers = {"Authorization": f"Bearer {token}"}
+    started = time.monotonic()
+    record_from, stop_at = started + warmup, started + warmup + duration
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, headers=headers, timeout=30) as client:
+        async def user() -> None:
+            nonlocal errors
+            while True:
+                sent = time.perf_counter_ns()
+                now = time.monotonic()
+                if now >= stop_at:
+                    return
+                try:
+                    ok = (await client.get(path)).status_code == 200
+                except httpx.HTTPError:
+                    ok = False
+                if now < record_from:
+                    continue
+                if ok:
+                    latency_us = (time.perf_counter_ns() - sent) // 1000
+                    histogram.record_value(min(max(latency_us, HIST_MIN_US), HIST_MAX_US))
+                else:
+                    errors += 1
+
+        await asyncio.gather(*(user() for _ in range(concurrency)))
+    return histogram.encode(), errors
+
+def _load_process(args: tuple) -> Tuple[bytes, int]:
+    return asyncio.run(_closed_loop(*args))
+
+def measure(base_url: str, path: str, token: str, processes: int, concurrency: int,
+            warmup: float, duration: float) -> dict:
+    job = (base_url, path, token, concurrency, warmup, duration)
+    with multiprocessing.get_context("spawn").Pool(processes) as pool:
+        results = pool.map(_load_process, [job] * processes)
+    total = HdrHistogram(HIST_MIN_US, HIST_MAX_US, HIST_DIGITS)
+    errors = 0
+    for encoded, process_errors in results:
+        total.add(HdrHistogram.decode(encoded))
+        errors += process_errors
+    return {
+        "requests": total.get_total_count(),
+        "errors": errors,
+        "throughput_rps": round(total.get_total_count() / duration, 1),
+        "p50_ms": total.get_value_at_percentile(50) / 1000,
+        "p99_ms": total.get_value_at_percentile(99) / 1000,
+    }
+
+def run(args: argparse.Namespace) -> dict:
+    host, _, port = args.bind.rpartition(":")
+    base_url = args.base_url or f"http://{host}:{port}"
+    pidfile = f"/tmp/worker-scaling-{os.getpid()}.pid"
+    results = []
+    for workers in args.workers:
+        server = start_server(workers, args.bind, pidfile)
+        try:
+            wait_until_up(base_url)
+            token = httpx.post(f"{base_url}{API}/auth/token", data={
+                "username": args.email, "password": args.password
+            }).json()["access_token"]
+            result = measure(base_url, args.path, token, args.load_processes,
+                             args.concurrency, args.warmup, args.duration)
+        finally:
+            stop_server(server)
+        result["workers"] = workers
+        results.append(result)
+        print(f"workers={workers:<3} {result['throughput_rps']:>9} req/s  "
+              f"p50 {result['p50_ms']}ms  p99 {result['p99_ms']}ms  errors {result['errors']}")
+
+    first = results[0]
+    for result in results:
+        speedup = result["throughput_rps"] / first["throughput_rps"] if first["throughput_rps"] else 0.0
+        result["speedup"] = round(speedup, 2)
+        result["efficiency"] = round(speedup / (result["workers"] / first["workers"]), 2)
+    return {"cpus": os.cpu_count(), "path": args.path, "results": results}
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Throughput scaling across server worker counts")
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--bind", default="127.0.0.1:8001")
+    parser.add_argument("--base-url", help="defaults to http://<bind>")
+    parser.add_argument("--path", default=f"{API}/plans/")
+    parser.add_argument("--load-processes", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=32, help="connections per load process")
+    parser.add_argument("--warmup", type=float, default=3.0, help="seconds not recorded")
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Seed large synthetic datasets of users, plans and subscriptions.
+
+Postgres targets are loaded with COPY; other databases (e.g. SQLite) fall
+back to chunked multi-row INSERTs. Distributions are meant to look like a
+real SaaS customer base:
+
+* most users have one subscription, churned users have a history of
+  cancelled/expired subscriptions followed by (sometimes) a new one
+* at most one ACTIVE subscription per user
+* end dates are spread from well in the past to a year ahead, with a
+  fraction of ACTIVE subscriptions already past their end date so the
+  expiry job has work to do
+
+Example:
+    python generate_test_data.py --users 5000000 --plans 20 --reset
+"""
+import argparse
+import csv
+import io
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import create_engine, func, select, text
+from sqlalchemy.engine import Engine
+
+from app.core.security import get_password_hash
+from app.db.base_class import Base
+from app.models import feature, outbox, webhook  # noqa: F401  (registers the tables)
+from app.models.subscription import Plan, Subscription, SubscriptionStatus
+from app.models.user import User
+
+DEFAULT_PASSWORD = "testpassword"
+CHUNK_SIZE = 50_000
+
+# (name, price, duration_days, weight)
+PLAN_TIERS = [
+    ("Free", 0.01, 30, 30),
+    ("Basic", 9.99, 30, 35),
+    ("Premium", 19.99, 30, 20),
+    ("Team", 49.0, 30, 8),
+    ("Annual", 199.0, 365, 7),
+]
+
+def _database_url(override: Optional[str]) -> str:
+    if override:
+        return override
+    from app.core.config import settings
+    return settings.DATABASE_URL
+
+def _plan_rows(count: int, now: datetime) -> List[dict]:
+    rows = []
+    for i in range(count):
+        name, price, days, _ = PLAN_TIERS[i % len(PLAN_TIERS)]
+        suffix = "" if i < len(PLAN_TIERS) else f" {i // len(PLAN_TIERS) + 1}"
+        rows.append({
+            "name": f"{name}{suffix}",
+            "description": f"{name} subscription plan",
+            "price": price,
+            "duration_days": days,
+            "features": None,
+            "created_at": now,
+            "updated_at": now,
+        })
+    return rows
+
+class SubscriptionGenerator:
+    """Generates per-user subscription histories with a realistic status mix"""
+
+    def __init__(self, plans: Sequence[Tuple[int, int]], now: datetime, seed: int,
+                 churn_rate: float, active_rate: float, overdue_rate: float):
+        self.plans = plans  # (plan_id, duration_days)
+        self.weights = [PLAN_TIERS[i % len(PLAN_TIERS)][3] for i in range(len(plans))]
+        self.now = now
+        self.rng = random.Random(seed)
+        self.churn_rate = churn_rate
+        self.active_rate = active_rate
+        self.overdue_rate = overdue_rate
+
+    def for_user(self, user_id: int) -> Iterator[tuple]:
+        rng = self.rng
+        # Churned users accumulate 1-4 finished subscriptions before the current one
+        history = rng.randint(1, 4) if rng.random() < self.churn_rate else 0
+        start = self.now - timedelta(days=rng.randint(0, 3 * 365))
+
+        for _ in range(history):
+            plan_id, days = rng.choices(self.plans, self.weights)[0]
+            end = start + timedelta(days=days)
+            if rng.random() < 0.6:
+                cancelled = start + timedelta(days=rng.randint(0, days))
+                yield (user_id, plan_id, SubscriptionStatus.CANCELLED.value, start, end, cancelled)
+            else:
+                yield (user_id, plan_id, SubscriptionStatus.EXPIRED.value, start, end, None)
+            start = end + timedelta(days=rng.randint(0, 90))
+
+        roll = rng.random()
+        if roll > self.active_rate + 0.05 and history:
+            return  # churned and never came back
+        plan_id, days = rng.choices(self.plans, self.weights)[0]
+        if roll < self.active_rate:
+            start = self.now - timedelta(days=rng.randint(0, days), seconds=rng.randint(0, 86400))
+            end = start + timedelta(days=days)
+            if rng.random() < self.overdue_rate:
+                end = self.now - timedelta(minutes=rng.randint(1, 24 * 60))
+            yield (user_id, plan_id, SubscriptionStatus.ACTIVE.value, start, end, None)
+        else:
+            end = start + timedelta(days=days)
+            yield (user_id, plan_id, SubscriptionStatus.INACTIVE.value, start, end, None)
+
+USER_COLUMNS = ("id", "email", "hashed_password", "is_active", "is_admin")
+SUBSCRIPTION_COLUMNS = ("user_id", "plan_id", "status", "start_date", "end_date",
+                        "cancelled_at", "created_at", "updated_at")
+
+def _copy_rows(engine: Engine, table: str, columns: Sequence[str], rows: List[tuple]) -> None:
+    """Load rows with Postgres COPY FROM STDIN (CSV)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(["\\N" if value is None else value for value in row])
+    buffer.seek(0)
+    raw = engine.raw_connection()
+    try:
+        with raw.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+                buffer,
+            )
+        raw.commit()
+    finally:
+        raw.close()
+
+def _insert_rows(engine: Engine, table, columns: Sequence[str], rows: List[tuple]) -> None:
+    """Portable fallback: one executemany of multi-row INSERTs per chunk"""
+    with engine.begin() as conn:
+        conn.execute(table.insert(), [dict(zip(columns, row)) for row in rows])
+
+class Loader:
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self.use_copy = engine.dialect.name == "postgresql"
+
+    def load(self, table, columns: Sequence[str], rows: List[tuple]) -> None:
+        if not rows:
+            return
+        if self.use_copy:
+            _copy_rows(self.engine, table.name, columns, rows)
+        else:
+            _insert_rows(self.engine, table, columns, rows)
+
+def _fix_sequences(engine: Engine) -> None:
+    if engine.dialect.name != "postgresql":
+        return
+    with engine.begin() as conn:
+        for table in ("users", "plans", "subscriptions"):
+            conn.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                f"COALESCE((SELECT MAX(id) FROM {table}), 1))"
+            ))
+
+def generate(engine: Engine, *, users: int, plans: int, seed: int = 42, reset: bool = False,
+             churn_rate: float = 0.25, active_rate: float = 0.7, overdue_rate: float = 0.02,
+             password: str = DEFAULT_PASSWORD, email_template: str = "loadtest{n}@example.com",
+             chunk_size: int = CHUNK_SIZE, progress: bool = True) -> dict:
+    """Append `users` users with subscription histories; returns row counts"""
+    if reset:
+        Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    now = datetime.utcnow()
+    loader = Loader(engine)
+    started = time.perf_counter()
+
+    with engine.begin() as conn:
+        # Reuse an existing catalog so repeated runs only append users
+        if not conn.execute(select(func.count()).select_from(Plan.__table__)).scalar():
+            conn.execute(Plan.__table__.insert(), _plan_rows(plans, now))
+        plan_rows = conn.execute(
+            select(Plan.id, Plan.duration_days).order_by(Plan.id)
+        ).all()
+        first_user_id = (conn.execute(select(func.max(User.id))).scalar() or 0) + 1
+
+    generator = SubscriptionGenerator(
+        [tuple(row) for row in plan_rows], now, seed, churn_rate, active_rate, overdue_rate
+    )
+    # bcrypt is deliberately slow, so every generated user shares one hash
+    hashed_password = get_password_hash(password)
+
+    subscription_count = 0
+    for offset in range(0, users, chunk_size):
+        ids = range(first_user_id + offset, first_user_id + min(offset + chunk_size, users))
+        loader.load(User.__table__, USER_COLUMNS, [
+            (user_id, email_template.format(n=user_id - 1), hashed_password, True, False)
+            for user_id in ids
+        ])
+        subscription_rows = [
+            row + (row[3], now)
+            for user_id in ids
+            for row in generator.for_user(user_id)
+        ]
+        loader.load(Subscription.__table__, SUBSCRIPTION_COLUMNS, subscription_rows)
+        subscription_count += len(subscription_rows)
+        if progress:
+            done = min(offset + chunk_size, users)
+            rate = done / (time.perf_counter() - started)
+            print(f"\r  users {done:,}/{users:,}  subscriptions {subscription_count:,}  "
+                  f"({rate:,.0f} users/s)", end="", flush=True)
+    if progress:
+        print()
+
+    _fix_sequences(engine)
+    return {
+        "plans": len(plan_rows),
+        "users": users,
+        "subscriptions": subscription_count,
+        "seconds": round(time.perf_counter() - started, 1),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate large synthetic datasets")
+    parser.add_argument("--database-url", help="defaults to DATABASE_URL from settings/.env")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--plans", type=int, default=len(PLAN_TIERS))
+    parser.add_argument("--churn-rate", type=float, default=0.25,
+                        help="share of users with cancelled/expired history")
+    parser.add_argument("--active-rate", type=float, default=0.7,
+                        help="share of users whose latest subscription is ACTIVE")
+    parser.add_argument("--overdue-rate", type=float, default=0.02,
+                        help="share of ACTIVE subscriptions already past end_date")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--email-template", default="loadtest{n}@example.com")
+    parser.add_argument("--password", default=DEFAULT_PASSWORD)
+    parser.add_argument("--reset", action="store_true", help="drop and recreate all tables first")
+    args = parser.parse_args()
+
+    engine = create_engine(_database_url(args.database_url))
+    print(f"Seeding {args.users:,} users into {engine.url.render_as_string(hide_password=True)}")
+    try:
+        counts = generate(
+            engine, users=args.users, plans=args.plans, seed=args.seed, reset=args.reset,
+            churn_rate=args.churn_rate, active_rate=args.active_rate,
+            overdue_rate=args.overdue_rate, password=args.password,
+            email_template=args.email_template, chunk_size=args.chunk_size,
+        )
+    except Exception as e:
+        print(f"❌ Failed to generate data: {e}")
+        return False
+    print(f"✅ Created {counts['plans']} plans, {counts['users']:,} users and "
+          f"{counts['subscriptions']:,} subscriptions in {counts['seconds']}s")
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
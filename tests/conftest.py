@@ -0,0 +1,90 @@
+import functools
+import os
+import tempfile
+
+# Settings are read at import time, so configure them before importing the app
+_DB_DIR = tempfile.mkdtemp(prefix="subscription-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DB_DIR, 'test.db')}"
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/15")
+
+import fakeredis
+import fakeredis.aioredis
+import pytest
+import redis
+import redis.asyncio
+
+_redis_server = fakeredis.FakeServer()
+redis.from_url = functools.partial(fakeredis.FakeRedis.from_url, server=_redis_server)
+redis.asyncio.from_url = functools.partial(fakeredis.aioredis.FakeRedis.from_url, server=_redis_server)
+
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from app.db.base_class import Base
+from app.db.session import SessionLocal, get_engine
+from app.models import feature, outbox, webhook  # noqa: F401  (registers the tables)
+from app.models.subscription import Plan, Subscription, SubscriptionStatus
+from app.models.user import User
+
+@pytest.fixture(autouse=True)
+def schema():
+    Base.metadata.create_all(bind=get_engine())
+    yield
+    Base.metadata.drop_all(bind=get_engine())
+    fakeredis.FakeRedis(server=_redis_server).flushall()
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+@pytest.fixture
+def plans(db):
+    basic = Plan(name="Basic", description="Basic plan", price=9.99, duration_days=30)
+    premium = Plan(name="Premium", description="Premium plan", price=19.99, duration_days=365)
+    db.add_all([basic, premium])
+    db.commit()
+    return basic, premium
+
+@pytest.fixture
+def active_subscription(db, plans):
+    now = datetime.utcnow()
+    subscription = Subscription(
+        user_id=1,
+        plan_id=plans[0].id,
+        status=SubscriptionStatus.ACTIVE,
+        start_date=now,
+        end_date=now + timedelta(days=30)
+    )
+    db.add(subscription)
+    db.commit()
+    db.expunge_all()
+    return subscription
+
+class QueryCounter:
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+@pytest.fixture
+def count_queries():
+    """Context manager factory counting SQL statements sent to the database"""
+    class _Counting:
+        def __enter__(self):
+            self.counter = QueryCounter()
+            event.listen(get_engine(), "before_cursor_execute", self.counter)
+            return self.counter
+
+        def __exit__(self, *exc):
+            event.remove(get_engine(), "before_cursor_execute", self.counter)
+
+    return _Counting
@@ -0,0 +1,30 @@
+from app.core.cache import BATCH_SIZE, Cache, get_redis
+
+def test_many_operations_round_trip():
+    cache = Cache()
+    cache.set_many({"a": {"n": 1}, "b": [2]}, timeout=60)
+
+    assert cache.get_many(["a", "b", "missing"]) == {"a": {"n": 1}, "b": [2]}
+    assert 0 < get_redis().ttl("a") <= 60
+    assert cache.delete_many(["a", "missing"]) == 1
+    assert cache.get_many(["a", "b"]) == {"b": [2]}
+    assert cache.get_many([]) == {}
+
+def test_invalidate_tags_drops_only_tagged_keys():
+    cache = Cache()
+    cache.set_many({"plan:1": 1, "plan:2": 2}, timeout=60, tags=["plans"])
+    cache.set("user:1", 1, timeout=600, tags=["users", "plans"])
+    cache.set("other", 0)
+
+    assert get_redis().ttl("cache-tag:plans") > 60
+    assert cache.invalidate_tags(["plans"]) == 3
+    assert cache.get_many(["plan:1", "plan:2", "user:1", "other"]) == {"other": 0}
+    assert not get_redis().exists("cache-tag:plans")
+
+def test_clear_pattern_deletes_across_scan_batches():
+    cache = Cache()
+    cache.set_many({f"bulk:{i}": i for i in range(BATCH_SIZE + 5)}, timeout=60)
+    cache.set("keep", 1)
+
+    assert cache.clear_pattern("bulk:*") == BATCH_SIZE + 5
+    assert get_redis().dbsize() == 1
@@ -0,0 +1,96 @@
+import gzip
+import json
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from app.core.compression import CompressionMiddleware, Compressor, negotiate
+
+BIG = {"plans": [{"id": n, "name": f"Plan {n}", "description": "x" * 40} for n in range(50)]}
+
+def _app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/big")
+    def big():
+        return BIG
+
+    @app.get("/small")
+    def small():
+        return {"plan_id": 1, "status": "ACTIVE"}
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse((json.dumps(BIG) for _ in range(3)), media_type="application/json")
+
+    @app.get("/events")
+    def events():
+        return StreamingResponse(iter(["data: 1\n\n" * 200]), media_type="text/event-stream")
+
+    app.add_middleware(CompressionMiddleware, minimum_size=500)
+    return app
+
+@pytest.fixture
+def client():
+    return TestClient(_app())
+
+def _raw(client, path, encoding):
+    with client.stream("GET", path, headers={"Accept-Encoding": encoding}) as response:
+        return response, b"".join(response.iter_raw())
+
+def test_negotiation_prefers_our_order_and_honours_q():
+    offered = ["zstd", "br", "gzip"]
+    assert negotiate("gzip, br", offered) == "br"
+    assert negotiate("gzip;q=1.0, br;q=0.5", offered) == "gzip"
+    assert negotiate("*;q=0.1, zstd;q=0", offered) == "br"
+    assert negotiate("identity", offered) is None
+    assert negotiate("", offered) is None
+
+def test_compressor_must_implement_every_method():
+    class StreamOnly(Compressor):
+        def compress(self, data):
+            return data
+
+        def finish(self):
+            return b""
+
+    with pytest.raises(TypeError):
+        StreamOnly()
+
+def test_gzip_complete_body(client):
+    response, body = _raw(client, "/big", "gzip")
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) == len(body)
+    assert json.loads(gzip.decompress(body)) == BIG
+
+def test_small_and_event_stream_bodies_are_not_compressed(client):
+    response, body = _raw(client, "/small", "gzip")
+    assert "content-encoding" not in response.headers
+    assert json.loads(body)["status"] == "ACTIVE"
+
+    response, body = _raw(client, "/events", "gzip")
+    assert "content-encoding" not in response.headers
+    assert body.startswith(b"data: 1")
+
+def test_streamed_body_is_compressed_per_chunk(client):
+    response, body = _raw(client, "/stream", "gzip")
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert gzip.decompress(body) == json.dumps(BIG).encode() * 3
+
+@pytest.mark.parametrize("encoding,module", [("br", "brotli"), ("zstd", "zstandard")])
+def test_optional_encodings(client, encoding, module):
+    codec = pytest.importorskip(module)
+    def decompress(body):
+        if encoding == "br":
+            return codec.decompress(body)
+        return codec.ZstdDecompressor().decompressobj().decompress(body)
+
+    response, body = _raw(client, "/big", encoding)
+    assert response.headers["content-encoding"] == encoding
+    assert json.loads(decompress(body)) == BIG
+
+    response, body = _raw(client, "/stream", encoding)
+    assert response.headers["content-encoding"] == encoding
+    assert decompress(body) == json.dumps(BIG).encode() * 3
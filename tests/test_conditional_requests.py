@@ -0,0 +1,60 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.api import deps
+from app.core.config import settings
+from app.crud import plan as crud_plan
+from app.crud import subscription as crud_subscription
+from app.main import app
+from app.schemas.subscription import PlanUpdate, SubscriptionUpdate
+
+@pytest.fixture
+def client():
+    app.dependency_overrides[deps.get_current_user] = lambda: {"id": 1, "is_admin": False}
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
+
+def test_plans_revalidate_without_querying(db, plans, client, count_queries):
+    url = f"{settings.API_V1_PREFIX}/plans/"
+    first = client.get(url)
+    assert first.status_code == 200
+    assert "stale-while-revalidate=" in first.headers["cache-control"]
+    tag = first.headers["etag"]
+
+    with count_queries() as counter:
+        again = client.get(url, headers={"If-None-Match": tag})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["etag"] == tag
+    assert counter.count == 0
+
+    # Other pages have their own tags
+    assert client.get(url, params={"limit": 1}).headers["etag"] != tag
+
+    crud_plan.update(db, id=plans[0].id, obj_in=PlanUpdate(price=12.5))
+    changed = client.get(url, headers={"If-None-Match": tag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != tag
+
+def test_subscription_etag_follows_writes_and_plan_changes(db, plans, active_subscription, client, count_queries):
+    url = f"{settings.API_V1_PREFIX}/subscriptions/1"
+    first = client.get(url)
+    assert first.status_code == 200
+    assert first.headers["cache-control"] == "private, no-cache"
+    tag = first.headers["etag"]
+
+    with count_queries() as counter:
+        assert client.get(url, headers={"If-None-Match": f'"other", {tag}'}).status_code == 304
+    assert counter.count == 0
+
+    crud_subscription.update_subscription(db, user_id=1, obj_in=SubscriptionUpdate(plan_id=plans[1].id))
+    response = client.get(url, headers={"If-None-Match": tag})
+    assert response.status_code == 200
+    assert response.json()["plan_id"] == plans[1].id
+    tag = response.headers["etag"]
+
+    crud_plan.update(db, id=plans[1].id, obj_in=PlanUpdate(description="Now with more"))
+    response = client.get(url, headers={"If-None-Match": tag})
+    assert response.status_code == 200
+    assert response.json()["plan"]["description"] == "Now with more"
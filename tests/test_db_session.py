@@ -0,0 +1,139 @@
+import pytest
+from sqlalchemy import create_engine, insert, select, text, update
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import NullPool
+from app.core.config import settings
+from app.db import session
+from app.db.base_class import Base
+from app.db.session import get_engine
+from app.models.subscription import Plan
+
+POSTGRES_URL = "postgresql+psycopg://app:secret@db/subscriptions"
+
+def test_engine_options_configure_the_instrumented_pool(monkeypatch):
+    monkeypatch.setattr(settings, "DB_STATEMENT_TIMEOUT_MS", 5000)
+    options = session._engine_options(POSTGRES_URL)
+
+    assert options["poolclass"] is session.InstrumentedQueuePool
+    assert options["pool_size"] == settings.DB_POOL_SIZE
+    assert options["pool_use_lifo"] is True
+    assert options["connect_args"] == {"options": "-c statement_timeout=5000"}
+
+def test_engine_options_behind_pgbouncer(monkeypatch):
+    monkeypatch.setattr(settings, "DB_PGBOUNCER_MODE", True)
+    monkeypatch.setattr(settings, "DB_USE_NULLPOOL", True)
+    monkeypatch.setattr(settings, "DB_STATEMENT_TIMEOUT_MS", 5000)
+    options = session._engine_options(POSTGRES_URL)
+
+    assert options["poolclass"] is NullPool
+    assert "pool_size" not in options
+    # No session-level statement_timeout: it is set per transaction instead
+    assert options["connect_args"] == {"prepare_threshold": None}
+
+def test_engine_options_leave_sqlite_pooling_alone(monkeypatch):
+    monkeypatch.setattr(settings, "DB_STATEMENT_TIMEOUT_MS", 5000)
+    assert session._engine_options("sqlite:///test.db") == {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+
+def test_pool_status_reports_occupancy_and_timeouts(tmp_path, monkeypatch):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=session.InstrumentedQueuePool, pool_size=2, max_overflow=0, pool_timeout=0.05,
+    )
+    monkeypatch.setattr(session, "get_engine", lambda: engine)
+    monkeypatch.setattr(session, "pool_stats", session.PoolStats())
+
+    first, second = engine.connect(), engine.connect()
+    status = session.pool_status()
+    assert status["pool"] == "InstrumentedQueuePool"
+    assert status["size"] == 2 and status["checked_out"] == 2
+    assert status["checkouts"] == 2 and status["timeouts"] == 0
+
+    with pytest.raises(PoolTimeoutError):
+        engine.connect()
+    first.close()
+    second.close()
+    engine.dispose()
+
+    status = session.pool_status()
+    assert status["checked_out"] == 0
+    assert status["checkouts"] == 3 and status["timeouts"] == 1
+    assert status["max_wait_ms"] >= 50
+
+@pytest.fixture
+def replica(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    Base.metadata.create_all(bind=engine)
+    monkeypatch.setattr(session, "get_replica_engine", lambda: engine)
+    monkeypatch.setattr(session, "replica_monitor", session.ReplicaLagMonitor())
+    monkeypatch.setattr(session, "REPLICA_LAG_QUERY", text("SELECT 0"))
+    yield engine
+    engine.dispose()
+
+def test_reads_go_to_the_replica_until_the_session_writes(db, replica):
+    with replica.begin() as conn:
+        conn.execute(insert(Plan).values(name="Replica", price=1, duration_days=30))
+
+    assert db.get_bind(clause=select(Plan)) is replica
+    assert [plan.name for plan in db.scalars(select(Plan))] == ["Replica"]
+
+    db.add(Plan(name="Primary", price=2, duration_days=30))
+    db.commit()
+    # Pinned to the primary so the session reads its own write
+    assert db.info["use_primary"] is True
+    assert db.get_bind(clause=select(Plan)) is get_engine()
+    assert [plan.name for plan in db.scalars(select(Plan))] == ["Primary"]
+
+def test_write_statements_pin_the_session_to_the_primary(db, replica):
+    assert db.get_bind(clause=select(Plan).with_for_update()) is get_engine()
+    assert db.info["use_primary"] is True
+
+    other = session.SessionLocal()
+    try:
+        assert other.get_bind(clause=update(Plan).values(price=3)) is get_engine()
+        assert other.get_bind(clause=select(Plan)) is get_engine()
+    finally:
+        other.close()
+
+def test_recent_write_routes_that_user_to_the_primary(db, replica):
+    session.mark_recent_write(1)
+
+    session.use_primary_after_recent_write(db, 2)
+    assert db.get_bind(clause=select(Plan)) is replica
+    session.use_primary_after_recent_writes(db, [2, 3])
+    assert db.get_bind(clause=select(Plan)) is replica
+
+    session.use_primary_after_recent_writes(db, [2, 1])
+    assert db.get_bind(clause=select(Plan)) is get_engine()
+
+    other = session.SessionLocal()
+    try:
+        session.use_primary_after_recent_write(other, 1)
+        assert other.info["use_primary"] is True
+    finally:
+        other.close()
+
+def test_lagging_or_unreachable_replica_sends_reads_to_the_primary(db, replica, monkeypatch):
+    monkeypatch.setattr(settings, "REPLICA_LAG_CHECK_INTERVAL", 0)
+    assert session.replica_monitor.replica_usable() is True
+    assert session.replica_monitor.lag == 0
+
+    monkeypatch.setattr(session, "REPLICA_LAG_QUERY", text("SELECT 60"))
+    assert db.get_bind(clause=select(Plan)) is get_engine()
+    assert session.replica_monitor.lag == 60
+
+    monkeypatch.setattr(session, "REPLICA_LAG_QUERY", text("SELECT * FROM no_such_table"))
+    assert session.replica_monitor.replica_usable() is False
+    assert session.replica_monitor.lag is None
+    # A failed check only routes reads; the session is not pinned
+    assert "use_primary" not in db.info
+
+def test_lag_check_result_is_cached(replica, monkeypatch):
+    monkeypatch.setattr(settings, "REPLICA_LAG_CHECK_INTERVAL", 60)
+    assert session.replica_monitor.replica_usable() is True
+
+    monkeypatch.setattr(session, "REPLICA_LAG_QUERY", text("SELECT 60"))
+    assert session.replica_monitor.replica_usable() is True
+
+def test_unsupported_databases_are_rejected():
+    with pytest.raises(ValueError, match="mysql"):
+        session.create_db_engine("mysql+pymysql://app:secret@db/subscriptions")
@@ -0,0 +1,104 @@
+import json
+from datetime import datetime, timedelta
+import pytest
+from app.core import notifications
+from app.core.config import settings
+from app.crud import subscription as crud_subscription
+from app.models.subscription import Subscription, SubscriptionStatus
+from app.models.user import User
+from app.tasks import subscription as subscription_tasks
+
+@pytest.fixture
+def notice_file(tmp_path, monkeypatch):
+    path = tmp_path / "notifications.log"
+    monkeypatch.setattr(settings, "NOTIFICATION_TRANSPORT", "file")
+    monkeypatch.setattr(settings, "NOTIFICATION_FILE_PATH", str(path))
+    return path
+
+@pytest.fixture
+def ending_soon(db, plans):
+    """Users 1-5 end within the notice window, user 6 much later, user 7 is cancelled"""
+    now = datetime.utcnow()
+    db.add_all([User(id=i, email=f"user{i}@example.com", hashed_password="x") for i in range(1, 8)])
+    subscriptions = [
+        Subscription(user_id=i, plan_id=plans[0].id, status=SubscriptionStatus.ACTIVE,
+                     start_date=now, end_date=now + timedelta(days=1, hours=i))
+        for i in range(1, 6)
+    ]
+    subscriptions.append(Subscription(user_id=6, plan_id=plans[0].id, status=SubscriptionStatus.ACTIVE,
+                                      start_date=now, end_date=now + timedelta(days=30)))
+    subscriptions.append(Subscription(user_id=7, plan_id=plans[0].id, status=SubscriptionStatus.CANCELLED,
+                                      start_date=now, end_date=now + timedelta(days=1)))
+    db.add_all(subscriptions)
+    db.commit()
+    return [s.id for s in subscriptions[:5]]
+
+def _notices(db, subscription_ids):
+    return [
+        notifications.ExpiryNotice(s.id, s.user_id, email, plan_name, s.end_date)
+        for s, email, plan_name in crud_subscription.get_notification_rows(db, subscription_ids)
+    ]
+
+def _sent(path):
+    return [json.loads(line) for line in path.read_text().splitlines()] if path.exists() else []
+
+def test_scan_fans_out_batches(db, ending_soon, monkeypatch):
+    batches = []
+    monkeypatch.setattr(settings, "NOTIFICATION_BATCH_SIZE", 2)
+    monkeypatch.setattr(subscription_tasks.send_subscription_expiry_notification, "delay", batches.append)
+
+    assert subscription_tasks.schedule_expiry_notifications() == 3
+    assert batches == [ending_soon[0:2], ending_soon[2:4], ending_soon[4:5]]
+
+def test_scan_skips_subscriptions_already_notified(db, ending_soon, notice_file, monkeypatch):
+    batches = []
+    monkeypatch.setattr(subscription_tasks.send_subscription_expiry_notification, "delay", batches.append)
+    notifications.send_notices(_notices(db, ending_soon[:3]))
+
+    assert subscription_tasks.schedule_expiry_notifications() == 1
+    assert batches == [ending_soon[3:5]]
+
+    # A renewed subscription has a new end date, so it is notified again
+    db.query(Subscription).filter(Subscription.id == ending_soon[0]).update(
+        {"end_date": datetime.utcnow() + timedelta(days=2)}
+    )
+    db.commit()
+    batches.clear()
+    notifications.send_notices(_notices(db, ending_soon[3:5]))
+    assert subscription_tasks.schedule_expiry_notifications() == 1
+    assert batches == [ending_soon[:1]]
+
+def test_batch_is_sent_once_per_window(db, ending_soon, notice_file):
+    assert subscription_tasks.send_subscription_expiry_notification(ending_soon) == 5
+    assert subscription_tasks.send_subscription_expiry_notification(ending_soon) == 0
+
+    sent = _sent(notice_file)
+    assert sorted(n["email"] for n in sent) == [f"user{i}@example.com" for i in range(1, 6)]
+    assert all(n["plan_name"] == "Basic" for n in sent)
+
+class FailingTransport(notifications.Transport):
+    name = "failing"
+
+    def send_batch(self, notices):
+        raise ConnectionError("transport down")
+
+def test_transport_must_implement_send_batch():
+    class Incomplete(notifications.Transport):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+def test_failed_send_is_released_for_retry(db, ending_soon, notice_file):
+    with pytest.raises(ConnectionError):
+        notifications.send_notices(_notices(db, ending_soon), transport=FailingTransport())
+
+    assert notifications.send_notices(_notices(db, ending_soon)) == 5
+
+def test_rate_limit_splits_sends_across_windows(db, ending_soon, notice_file, monkeypatch):
+    windows = []
+    monkeypatch.setattr(settings, "NOTIFICATION_RATE_LIMIT", 2)
+    monkeypatch.setattr(notifications.FileTransport, "send_batch", lambda self, notices: windows.append(len(notices)))
+
+    assert notifications.send_notices(_notices(db, ending_soon)) == 5
+    assert windows == [2, 2, 1]
@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta
+from app.core.expiry import expiry_schedule
+from app.crud import subscription as crud_subscription
+from app.models.subscription import Subscription, SubscriptionStatus
+from app.schemas.subscription import SubscriptionCreate, SubscriptionUpdate
+from app.tasks.subscription import check_expired_subscriptions, expire_due_subscriptions
+
+def _scheduled_at(subscription_id: int):
+    from app.core.cache import get_redis
+    score = get_redis().zscore(expiry_schedule.key, subscription_id)
+    return None if score is None else datetime.utcfromtimestamp(score)
+
+def _create(db, user_id: int, plan_id: int) -> Subscription:
+    return crud_subscription.create_subscription(
+        db, obj_in=SubscriptionCreate(user_id=user_id, plan_id=plan_id)
+    )
+
+def _set_end_date(db, subscription: Subscription, end_date: datetime) -> None:
+    db.query(Subscription).filter(Subscription.id == subscription.id).update({"end_date": end_date})
+    db.commit()
+
+def test_create_schedules_expiry_at_end_date(db, plans):
+    subscription = _create(db, 1, plans[0].id)
+    assert abs(_scheduled_at(subscription.id) - subscription.end_date) < timedelta(seconds=1)
+
+def test_plan_change_reschedules_and_cancel_unschedules(db, plans):
+    subscription = _create(db, 1, plans[0].id)
+    updated = crud_subscription.update_subscription(
+        db, user_id=1, obj_in=SubscriptionUpdate(plan_id=plans[1].id)
+    )
+    assert abs(_scheduled_at(subscription.id) - updated.end_date) < timedelta(seconds=1)
+
+    crud_subscription.cancel_subscription(db, user_id=1)
+    assert _scheduled_at(subscription.id) is None
+
+def test_due_subscriptions_expire_in_batches(db, plans):
+    past = datetime.utcnow() - timedelta(seconds=1)
+    due = []
+    for user_id in range(1, 6):
+        subscription = _create(db, user_id, plans[0].id)
+        _set_end_date(db, subscription, past)
+        expiry_schedule.schedule(subscription.id, past)
+        due.append(subscription.id)
+    not_due = _create(db, 6, plans[0].id)
+
+    assert expire_due_subscriptions() == 5
+    statuses = dict(db.query(Subscription.id, Subscription.status).all())
+    assert all(statuses[i] == SubscriptionStatus.EXPIRED for i in due)
+    assert statuses[not_due.id] == SubscriptionStatus.ACTIVE
+    assert expiry_schedule.pending() == 1
+
+def test_stale_schedule_entry_does_not_expire_extended_subscription(db, plans):
+    subscription = _create(db, 1, plans[0].id)
+    # Entry claimed after the subscription was extended past its old end date
+    expiry_schedule.schedule(subscription.id, datetime.utcnow() - timedelta(seconds=1))
+
+    assert expire_due_subscriptions() == 0
+    db.expire_all()
+    assert db.get(Subscription, subscription.id).status == SubscriptionStatus.ACTIVE
+    # Rescheduled at the real end date, not dropped from the schedule
+    assert abs(_scheduled_at(subscription.id) - subscription.end_date) < timedelta(seconds=1)
+
+def test_claim_pops_only_due_entries(db):
+    now = datetime.utcnow()
+    expiry_schedule.schedule(1, now - timedelta(minutes=1))
+    expiry_schedule.schedule(2, now + timedelta(minutes=1))
+    expiry_schedule.schedule(3, now + timedelta(days=1))
+
+    assert expiry_schedule.claim_due(10, now=now) == [1]
+    assert expiry_schedule.pending() == 2
+    assert expiry_schedule.claim_due(10, now=now) == []
+    assert expiry_schedule.claim_due(1, now=now + timedelta(minutes=2)) == [2]
+    assert _scheduled_at(3) is not None
+
+def test_reconciliation_expires_unscheduled_subscriptions(db, plans):
+    subscription = _create(db, 1, plans[0].id)
+    _set_end_date(db, subscription, datetime.utcnow() - timedelta(hours=1))
+    expiry_schedule.unschedule(subscription.id)
+
+    assert expire_due_subscriptions() == 0
+    assert check_expired_subscriptions() == 1
+    db.expire_all()
+    assert db.get(Subscription, subscription.id).status == SubscriptionStatus.EXPIRED
+
+def test_entry_removed_by_another_poller_is_not_claimed(db, monkeypatch):
+    from app.core.cache import get_redis
+    now = datetime.utcnow()
+    expiry_schedule.schedule(1, now - timedelta(minutes=1))
+    expiry_schedule.schedule(2, now - timedelta(minutes=1))
+    redis_client = get_redis()
+    zrangebyscore = redis_client.zrangebyscore
+
+    def racing_zrangebyscore(*args, **kwargs):
+        due = zrangebyscore(*args, **kwargs)
+        redis_client.zrem(expiry_schedule.key, 1)
+        return due
+
+    monkeypatch.setattr(redis_client, "zrangebyscore", racing_zrangebyscore)
+    assert expiry_schedule.claim_due(10, now=now) == [2]
@@ -0,0 +1,98 @@
+import asyncio
+import time
+import pytest
+from fastapi.testclient import TestClient
+from app.core import health
+from app.core.cache import get_redis
+from app.core.config import settings
+from app.core.heartbeat import WorkerHeartbeat
+from app.db import session
+from app.main import app
+
+@pytest.fixture
+def uncached(monkeypatch):
+    monkeypatch.setattr(settings, "HEALTH_CACHE_SECONDS", 0)
+
+def test_ready_probes_each_dependency(uncached):
+    client = TestClient(app)
+    report = client.get("/health/ready").json()
+    # No worker has sent a heartbeat: degraded, but still serving
+    assert report["status"] == "degraded"
+    assert report["dependencies"]["database"]["status"] == "up"
+    assert "checked_out" in report["dependencies"]["database"]["pool"]
+    assert report["dependencies"]["redis"]["pool"]["in_use"] == 0
+    assert report["dependencies"]["celery"] == {
+        "status": "down", "error": "No worker heartbeat",
+        "latency_ms": report["dependencies"]["celery"]["latency_ms"],
+    }
+
+    heartbeat = WorkerHeartbeat()
+    heartbeat.beat()
+    response = client.get("/health")
+    assert response.status_code == 200
+    assert response.json()["status"] == "healthy"
+    assert response.json()["dependencies"]["celery"]["workers"] == 1
+
+    heartbeat.stop()
+    assert client.get("/health/ready").json()["status"] == "degraded"
+
+def test_critical_dependency_down_or_slow_fails_readiness(uncached, monkeypatch):
+    monkeypatch.setattr(settings, "HEALTH_PROBE_TIMEOUT_SECONDS", 0.05)
+    checker = health.HealthChecker({
+        "database": lambda: time.sleep(1) or {},
+        "redis": lambda: {},
+    })
+    monkeypatch.setattr(health, "health_checker", checker)
+    monkeypatch.setattr("app.main.health_checker", checker)
+
+    started = time.perf_counter()
+    response = TestClient(app).get("/health/ready")
+    assert time.perf_counter() - started < 0.5
+    assert response.status_code == 503
+    assert response.json()["dependencies"]["database"]["error"] == "timed out after 0.05s"
+
+def test_reports_are_cached_and_probes_shared():
+    calls = []
+
+    def probe():
+        calls.append(1)
+        time.sleep(0.01)
+        return {}
+
+    checker = health.HealthChecker({"redis": probe})
+
+    async def burst():
+        return await asyncio.gather(*(checker.check() for _ in range(20)))
+
+    reports = asyncio.run(burst())
+    assert all(report is reports[0] for report in reports)
+    assert asyncio.run(checker.check()) is reports[0]
+    assert len(calls) == 1
+
+def test_probes_are_not_rate_limited(monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_REQUESTS", 1)
+    client = TestClient(app)
+    assert all(client.get("/health/live").status_code == 200 for _ in range(5))
+    assert not get_redis().keys("rate_limit:*")
+
+def test_database_probe_has_its_own_bounded_pool(monkeypatch):
+    monkeypatch.setattr(settings, "DATABASE_URL", "postgresql://app:secret@db/subscriptions")
+    monkeypatch.setattr(session, "create_engine", lambda url, **options: options)
+    session.get_probe_engine.cache_clear()
+    try:
+        options = session.get_probe_engine()
+    finally:
+        session.get_probe_engine.cache_clear()
+
+    assert options["pool_size"] == 1 and options["max_overflow"] == 0
+    assert options["pool_timeout"] == settings.HEALTH_PROBE_IO_TIMEOUT_SECONDS
+    assert options["connect_args"]["connect_timeout"] == 1
+    assert settings.HEALTH_PROBE_IO_TIMEOUT_SECONDS < settings.HEALTH_PROBE_TIMEOUT_SECONDS
+
+def test_redis_pool_counts_are_omitted_for_other_pool_types():
+    class OtherPool:
+        max_connections = 50
+
+    assert health._redis_pool_stats(OtherPool()) == {"max_connections": 50}
+    stats = health._redis_pool_stats(get_redis().connection_pool)
+    assert set(stats) == {"max_connections", "in_use", "idle"}
@@ -0,0 +1,72 @@
+import json
+from datetime import datetime, timedelta
+from app.core.cache import get_redis
+from app.core.celery_app import celery_app
+from app.core.config import settings
+from app.crud import subscription as crud_subscription
+from app.models.outbox import OutboxEvent
+from app.models.subscription import Subscription
+from app.schemas.subscription import SubscriptionCreate, SubscriptionUpdate
+from app.tasks.outbox import relay_outbox_events
+
+def _events(db):
+    return [(e.event_type, e.user_id) for e in db.query(OutboxEvent).order_by(OutboxEvent.id)]
+
+def _stream():
+    return [
+        {key.decode(): value.decode() for key, value in fields.items()}
+        for _, fields in get_redis().xrange(settings.OUTBOX_STREAM)
+    ]
+
+def test_lifecycle_writes_record_events(db, plans):
+    crud_subscription.create_subscription(db, obj_in=SubscriptionCreate(user_id=1, plan_id=plans[0].id))
+    crud_subscription.update_subscription(db, user_id=1, obj_in=SubscriptionUpdate(plan_id=plans[1].id))
+    crud_subscription.cancel_subscription(db, user_id=1)
+
+    assert _events(db) == [
+        ("subscription.created", 1),
+        ("subscription.updated", 1),
+        ("subscription.cancelled", 1),
+    ]
+
+def test_writes_that_change_nothing_record_no_event(db, active_subscription):
+    assert crud_subscription.create_subscription(
+        db, obj_in=SubscriptionCreate(user_id=1, plan_id=active_subscription.plan_id)
+    ) is None
+    assert crud_subscription.cancel_subscription(db, user_id=2) is None
+    assert _events(db) == []
+
+def test_batch_expiry_records_one_event_per_subscription(db, plans):
+    for user_id in (1, 2, 3):
+        crud_subscription.create_subscription(db, obj_in=SubscriptionCreate(user_id=user_id, plan_id=plans[0].id))
+    db.query(Subscription).update({"end_date": datetime.utcnow() - timedelta(seconds=1)})
+    db.commit()
+    db.query(OutboxEvent).delete()
+    db.commit()
+
+    ids = [s.id for s in db.query(Subscription)]
+    assert len(crud_subscription.expire_subscriptions(db, ids)) == 3
+    assert _events(db) == [("subscription.expired", u) for u in (1, 2, 3)]
+
+def test_relay_publishes_in_order_and_drains(db, plans, monkeypatch):
+    monkeypatch.setattr(settings, "OUTBOX_RELAY_BATCH_SIZE", 2)
+    for user_id in range(1, 6):
+        crud_subscription.create_subscription(db, obj_in=SubscriptionCreate(user_id=user_id, plan_id=plans[0].id))
+
+    assert relay_outbox_events() == 5
+    assert relay_outbox_events() == 0
+    assert db.query(OutboxEvent).count() == 0
+
+    stream = _stream()
+    assert [int(e["user_id"]) for e in stream] == [1, 2, 3, 4, 5]
+    assert stream[0]["type"] == "subscription.created"
+    assert json.loads(stream[0]["payload"])["status"] == "ACTIVE"
+
+def test_event_delivery_has_its_own_queue():
+    def queue(task_name):
+        return celery_app.amqp.router.route({}, task_name)["queue"].name
+
+    assert queue("app.tasks.outbox.relay_outbox_events") == settings.CELERY_WEBHOOK_QUEUE
+    assert queue("app.tasks.webhook.dispatch_webhook_events") == settings.CELERY_WEBHOOK_QUEUE
+    assert queue("app.tasks.subscription.send_subscription_expiry_notification") == settings.CELERY_NOTIFY_QUEUE
+    assert "app.tasks.benchmark" not in celery_app.conf.include
@@ -0,0 +1,101 @@
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+from app.api import deps
+from app.core.config import settings
+from app.crud import feature as crud_feature
+from app.crud import plan as crud_plan
+from app.crud import subscription as crud_subscription
+from app.main import app
+from app.models.subscription import Plan
+from app.schemas.subscription import PlanCreate, PlanInDB, PlanUpdate, SubscriptionCreate
+
+def _plan(db, name, features):
+    return crud_plan.create(db, obj_in=PlanCreate(
+        name=name, price=10, duration_days=30, features=features
+    ))
+
+def test_plans_share_a_feature_registry(db):
+    pro = _plan(db, "Pro", '["api", "sso"]')
+    team = _plan(db, "Team", '{"sso": true, "audit_log": true, "api": false}')
+    ids = {feature.key: feature.id for feature in crud_feature.get_multi(db)}
+
+    assert set(ids) == {"api", "sso", "audit_log"}
+    assert pro.feature_bits == 1 << ids["api"] | 1 << ids["sso"]
+    assert team.feature_bits == 1 << ids["sso"] | 1 << ids["audit_log"]
+    assert _plan(db, "Free", None).feature_bits == 0
+
+def test_features_must_be_a_list_or_object_of_keys():
+    with pytest.raises(ValidationError):
+        PlanCreate(name="Bad", price=10, duration_days=30, features='"api"')
+    with pytest.raises(ValidationError):
+        PlanCreate(name="Bad", price=10, duration_days=30, features="not json")
+
+def test_plans_with_legacy_free_text_features_still_load(db, active_subscription):
+    # Written before features had to be JSON
+    plan = db.get(Plan, active_subscription.plan_id)
+    plan.features = "premium support, api"
+    db.commit()
+
+    app.dependency_overrides[deps.get_current_user] = lambda: {"id": 1, "is_admin": False}
+    try:
+        client = TestClient(app)
+        listed = client.get(f"{settings.API_V1_PREFIX}/plans/")
+        assert listed.status_code == 200
+        assert listed.json()[0]["features"] == "premium support, api"
+        subscription = client.get(f"{settings.API_V1_PREFIX}/subscriptions/1")
+        assert subscription.status_code == 200
+        assert subscription.json()["plan"]["features"] == "premium support, api"
+    finally:
+        app.dependency_overrides.clear()
+    assert PlanInDB.model_validate(plan).features == "premium support, api"
+
+    with pytest.raises(ValidationError):
+        PlanUpdate(features="premium support, api")
+
+def test_entitlement_carries_feature_bits_and_follows_plan_changes(db):
+    plan = _plan(db, "Pro", '["api"]')
+    crud_subscription.create_subscription(db, obj_in=SubscriptionCreate(user_id=1, plan_id=plan.id))
+    before = plan.feature_bits
+    assert crud_subscription.get_entitlements(db, [1])[1]["feature_bits"] == before
+
+    updated = crud_plan.update(db, id=plan.id, obj_in=PlanUpdate(features='["api", "sso"]'))
+    assert updated.feature_bits != before
+    assert crud_subscription.get_entitlements(db, [1])[1]["feature_bits"] == updated.feature_bits
+
+def test_feature_registered_concurrently_is_reused(db):
+    from sqlalchemy import event
+    from app.db.session import get_engine
+    from app.models.feature import Feature
+
+    def register_first(orm_execute_state):
+        # Another plan write commits "sso" between the lookup and the insert
+        if orm_execute_state.is_insert:
+            with get_engine().begin() as conn:
+                conn.execute(Feature.__table__.insert().values(key="sso"))
+
+    event.listen(db, "do_orm_execute", register_first)
+    try:
+        ids = crud_feature.get_or_create_ids(db, ["api", "sso"])
+    finally:
+        event.remove(db, "do_orm_execute", register_first)
+    db.commit()
+
+    assert ids == {feature.key: feature.id for feature in crud_feature.get_multi(db)}
+
+def test_full_feature_registry_is_a_client_error(db):
+    crud_feature.get_or_create_ids(db, [f"f{i}" for i in range(crud_feature.MAX_FEATURE_ID)])
+    db.commit()
+    plan = _plan(db, "Pro", '["f0"]')
+
+    app.dependency_overrides[deps.get_current_user] = lambda: {"id": 1, "is_admin": True}
+    try:
+        client = TestClient(app)
+        body = {"name": "Team", "price": 10, "duration_days": 30, "features": '["one_too_many"]'}
+        created = client.post(f"{settings.API_V1_PREFIX}/plans/", json=body)
+        assert created.status_code == 400
+        assert "full" in created.json()["detail"]
+        updated = client.put(f"{settings.API_V1_PREFIX}/plans/{plan.id}", json={"features": '["one_too_many"]'})
+        assert updated.status_code == 400
+    finally:
+        app.dependency_overrides.clear()
@@ -0,0 +1,83 @@
+import threading
+import time
+import pytest
+from fastapi.testclient import TestClient
+from app.api import deps
+from app.core.config import settings
+from app.core.profiling import (
+    PROFILE_HEADER,
+    PROFILE_ID_HEADER,
+    ProfilerBusyError,
+    SamplingProfiler,
+    _sampling_lock,
+    create_profile_token,
+    format_collapsed,
+    verify_profile_token,
+)
+from app.main import app
+
+PROFILING = f"{settings.API_V1_PREFIX}/profiling"
+
+@pytest.fixture
+def admin_client(monkeypatch):
+    monkeypatch.setattr(settings, "PROFILING_ENABLED", True)
+    app.dependency_overrides[deps.get_current_admin_user] = lambda: {"id": 1, "is_admin": True}
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+def test_profile_token_is_bound_to_method_path_and_expiry():
+    token = create_profile_token("GET", "/api/v1/plans/")
+
+    assert verify_profile_token(token, "get", "/api/v1/plans/")
+    assert not verify_profile_token(token, "POST", "/api/v1/plans/")
+    assert not verify_profile_token(token, "GET", "/api/v1/plans/1")
+    assert not verify_profile_token(create_profile_token("GET", "/", expires_in=-1), "GET", "/")
+    assert not verify_profile_token("not-a-token", "GET", "/")
+    expires_at, signature = token.split(".")
+    assert not verify_profile_token(f"{int(expires_at) + 60}.{signature}", "GET", "/api/v1/plans/")
+
+def test_sampling_profiler_collapses_other_threads_stacks():
+    stop = threading.Event()
+
+    def busy_waiting_worker():
+        while not stop.is_set():
+            time.sleep(0.001)
+
+    thread = threading.Thread(target=busy_waiting_worker, name="sampled")
+    thread.start()
+    try:
+        samples = SamplingProfiler(interval=0.001).run(0.05)
+    finally:
+        stop.set()
+        thread.join()
+
+    sampled = [stack for stack in samples if stack.startswith("sampled;")]
+    assert sampled and all("busy_waiting_worker" in stack for stack in sampled)
+    assert format_collapsed(samples).splitlines()[0].endswith(f" {samples.most_common(1)[0][1]}")
+
+def test_only_one_sampling_run_per_worker():
+    with _sampling_lock:
+        with pytest.raises(ProfilerBusyError):
+            SamplingProfiler().run(0.01)
+
+def test_endpoints_are_hidden_when_disabled(admin_client, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILING_ENABLED", False)
+    assert admin_client.post(f"{PROFILING}/token", params={"method": "GET", "path": "/"}).status_code == 404
+    assert admin_client.get(f"{PROFILING}/requests/abc").status_code == 404
+
+def test_request_profile_round_trip(admin_client, plans):
+    path = f"{settings.API_V1_PREFIX}/plans/"
+    app.dependency_overrides[deps.get_current_user] = lambda: {"id": 1, "is_admin": True}
+    token = admin_client.post(f"{PROFILING}/token", params={"method": "GET", "path": path}).json()
+
+    response = admin_client.get(path, headers={token["header"]: token["token"]})
+    assert token["header"] == PROFILE_HEADER
+    profile = admin_client.get(f"{PROFILING}/requests/{response.headers[PROFILE_ID_HEADER]}")
+    assert profile.status_code == 200
+    assert "get_plans" in profile.text
+    assert admin_client.get(f"{PROFILING}/requests/unknown").status_code == 404
+
+def test_sample_endpoint_returns_collapsed_stacks(admin_client):
+    response = admin_client.post(f"{PROFILING}/sample", params={"seconds": 0.05, "interval_ms": 1})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
@@ -0,0 +1,91 @@
+import asyncio
+import pytest
+import redis
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.core.cache import get_redis
+from app.core.config import settings
+from app.core.middleware import PROCESS_TIME_HEADER, RequestMetrics, RequestPipelineMiddleware
+from app.core.profiling import (
+    PROFILE_HEADER,
+    PROFILE_ID_HEADER,
+    ProfiledRoute,
+    create_profile_token,
+    get_request_profile,
+)
+from app.core.rate_limit import RateLimiter
+
+@pytest.fixture
+def metrics():
+    return RequestMetrics()
+
+@pytest.fixture
+def client(metrics):
+    app = FastAPI()
+    app.router.route_class = ProfiledRoute
+
+    @app.get("/items/{item_id}")
+    def read_item(item_id: int):
+        return {"id": item_id}
+
+    @app.get("/boom")
+    def boom():
+        raise RuntimeError("boom")
+
+    app.add_middleware(RequestPipelineMiddleware, limiter=RateLimiter(requests_per_minute=3), metrics=metrics)
+    return TestClient(app, raise_server_exceptions=False)
+
+def test_rate_limit_is_a_json_429(client):
+    responses = [client.get(f"/items/{n}") for n in range(4)]
+
+    assert [r.status_code for r in responses] == [200, 200, 200, 429]
+    assert responses[-1].json() == {"detail": "Too many requests. Please try again later."}
+    assert all(PROCESS_TIME_HEADER in r.headers for r in responses)
+
+def test_rate_limiter_allows_requests_when_redis_is_down():
+    class Unavailable:
+        def pipeline(self, *args, **kwargs):
+            raise redis.ConnectionError("down")
+
+    limiter = RateLimiter(requests_per_minute=1, client_factory=Unavailable)
+    assert asyncio.run(limiter.allow("10.0.0.1"))
+    assert asyncio.run(limiter.allow("10.0.0.1"))
+
+def test_rate_limit_window_always_has_a_ttl():
+    async def window():
+        limiter = RateLimiter(requests_per_minute=2)
+        allowed = [await limiter.allow("10.0.0.1") for _ in range(3)]
+        return allowed, await limiter._redis().ttl("rate_limit:10.0.0.1")
+
+    allowed, ttl = asyncio.run(window())
+    assert allowed == [True, True, False]
+    assert 0 < ttl <= 60
+
+    # A counter that lost its TTL (as the old SET NX + INCR could leave it)
+    # gets one on the next request instead of blocking the client forever
+    get_redis().set("rate_limit:10.0.0.2", 5)
+    assert asyncio.run(RateLimiter(requests_per_minute=10).allow("10.0.0.2"))
+    assert 0 < get_redis().ttl("rate_limit:10.0.0.2") <= 60
+
+def test_errors_are_mapped_and_metrics_use_route_templates(client, metrics):
+    client.get("/items/1")
+    client.get("/items/2")
+    response = client.get("/boom")
+    client.get("/missing")
+
+    assert response.status_code == 500
+    assert response.json() == {"detail": "Internal server error"}
+    by_route = {(m["method"], m["route"]): m for m in metrics.snapshot()}
+    assert by_route[("GET", "/items/{item_id}")]["count"] == 2
+    assert by_route[("GET", "/boom")]["server_errors"] == 1
+    assert by_route[("GET", "unmatched")]["client_errors"] == 1
+
+def test_profile_token_profiles_the_endpoint(client, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILING_ENABLED", True)
+    token = create_profile_token("GET", "/items/7")
+
+    response = client.get("/items/7", headers={PROFILE_HEADER: token})
+    unprofiled = client.get("/items/8", headers={PROFILE_HEADER: token})
+
+    assert "read_item" in get_request_profile(response.headers[PROFILE_ID_HEADER])
+    assert PROFILE_ID_HEADER not in unprofiled.headers
@@ -0,0 +1,64 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy.exc import IntegrityError
+from app.crud import subscription as crud_subscription
+from app.db.session import SessionLocal
+from app.models.subscription import Subscription, SubscriptionStatus
+from app.schemas.subscription import SubscriptionCreate
+
+CONCURRENT_CREATES = 1000
+
+def _create(plan_id: int):
+    db = SessionLocal()
+    try:
+        return crud_subscription.create_subscription(
+            db, obj_in=SubscriptionCreate(user_id=1, plan_id=plan_id)
+        )
+    finally:
+        db.close()
+
+def test_concurrent_creates_leave_one_active_subscription(db, plans):
+    with ThreadPoolExecutor(max_workers=32) as pool:
+        results = list(pool.map(_create, [plans[0].id] * CONCURRENT_CREATES))
+
+    assert sum(result is not None for result in results) == 1
+    active = db.query(Subscription).filter(
+        Subscription.user_id == 1,
+        Subscription.status == SubscriptionStatus.ACTIVE
+    ).count()
+    assert active == 1
+
+def test_create_with_active_subscription_returns_none(db, active_subscription, count_queries):
+    with count_queries() as queries:
+        assert crud_subscription.create_subscription(
+            db, obj_in=SubscriptionCreate(user_id=1, plan_id=active_subscription.plan_id)
+        ) is None
+    # Plan lookup plus the conditional insert; no separate existence check
+    assert queries.count == 2, queries.statements
+
+def test_create_after_cancel_succeeds(db, active_subscription):
+    crud_subscription.cancel_subscription(db, user_id=1)
+    subscription = crud_subscription.create_subscription(
+        db, obj_in=SubscriptionCreate(user_id=1, plan_id=active_subscription.plan_id)
+    )
+    assert subscription.status == SubscriptionStatus.ACTIVE
+    assert (subscription.end_date - subscription.start_date).days == 30
+
+def _subscription(plan_id: int, status: SubscriptionStatus) -> Subscription:
+    now = datetime.utcnow()
+    return Subscription(
+        user_id=1, plan_id=plan_id, status=status, start_date=now, end_date=now + timedelta(days=30)
+    )
+
+def test_database_rejects_a_second_active_subscription(db, plans):
+    db.add_all([
+        _subscription(plans[0].id, SubscriptionStatus.CANCELLED),
+        _subscription(plans[0].id, SubscriptionStatus.EXPIRED),
+        _subscription(plans[0].id, SubscriptionStatus.ACTIVE),
+    ])
+    db.commit()
+
+    db.add(_subscription(plans[1].id, SubscriptionStatus.ACTIVE))
+    with pytest.raises(IntegrityError):
+        db.commit()
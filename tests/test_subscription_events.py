@@ -0,0 +1,73 @@
+import json
+import socket
+import threading
+import time
+import httpx
+import pytest
+import uvicorn
+from app.api import deps
+from app.core.broadcast import broadcaster
+from app.core.config import settings
+from app.crud import subscription as crud_subscription
+from app.main import app
+from app.schemas.subscription import SubscriptionCreate, SubscriptionUpdate
+
+@pytest.fixture
+def server():
+    """The app on a real uvicorn server: SSE needs a streaming transport"""
+    app.dependency_overrides[deps.get_current_user] = lambda: {"id": 1, "is_admin": False}
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    server = uvicorn.Server(uvicorn.Config(app, log_level="warning", lifespan="off"))
+    thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    yield f"http://127.0.0.1:{sock.getsockname()[1]}{settings.API_V1_PREFIX}"
+    server.should_exit = True
+    thread.join(5)
+    app.dependency_overrides.clear()
+
+def _events(response):
+    """Yield (event, data) pairs from an SSE response"""
+    event = None
+    for line in response.iter_lines():
+        if line.startswith("event: "):
+            event = line[len("event: "):]
+        elif line.startswith("data: "):
+            yield event, json.loads(line[len("data: "):])
+
+def test_stream_pushes_changes_for_its_user(db, plans, server):
+    with httpx.stream("GET", f"{server}/subscriptions/1/events", timeout=10) as response:
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = _events(response)
+        assert next(events) == ("snapshot", None)
+
+        crud_subscription.create_subscription(db, obj_in=SubscriptionCreate(user_id=2, plan_id=plans[0].id))
+        crud_subscription.create_subscription(db, obj_in=SubscriptionCreate(user_id=1, plan_id=plans[0].id))
+        event, data = next(events)
+        assert event == "subscription.created"
+        assert data["user_id"] == 1
+        assert data["plan"]["name"] == "Basic"
+
+        crud_subscription.update_subscription(db, user_id=1, obj_in=SubscriptionUpdate(plan_id=plans[1].id))
+        event, data = next(events)
+        assert event == "subscription.updated"
+        assert data["plan"]["name"] == "Premium"
+
+        crud_subscription.cancel_subscription(db, user_id=1)
+        event, data = next(events)
+        assert (event, data["status"]) == ("subscription.cancelled", "CANCELLED")
+
+def test_snapshot_and_disconnect_cleanup(db, active_subscription, server):
+    with httpx.stream("GET", f"{server}/subscriptions/1/events", timeout=10) as response:
+        events = _events(response)
+        event, data = next(events)
+        assert event == "snapshot"
+        assert data["id"] == active_subscription.id
+        assert broadcaster.connections == 1
+
+    deadline = time.monotonic() + 5
+    while broadcaster.connections and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert broadcaster.connections == 0
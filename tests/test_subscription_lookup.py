@@ -0,0 +1,97 @@
+import json
+import time
+from fastapi.testclient import TestClient
+from app.api import deps
+from app.core import entitlements
+from app.core.cache import get_redis
+from app.core.config import settings
+from app.crud import subscription as crud_subscription
+from app.main import app
+from app.schemas.subscription import SubscriptionCreate, SubscriptionUpdate
+
+def test_lookup_is_one_query_then_served_from_cache(db, plans, count_queries):
+    for user_id in (1, 2, 3):
+        crud_subscription.create_subscription(db, obj_in=SubscriptionCreate(user_id=user_id, plan_id=plans[0].id))
+    crud_subscription.cancel_subscription(db, user_id=3)
+
+    with count_queries() as counter:
+        entitlements = crud_subscription.get_entitlements(db, [1, 2, 3, 4, 1])
+    # The subscriptions, plus the plan feature map on a cold cache
+    assert counter.count == 2
+    assert list(entitlements) == [1, 2, 3, 4]
+    assert entitlements[1]["plan_id"] == plans[0].id
+    assert entitlements[1]["status"] == "ACTIVE"
+    assert entitlements[3] is None and entitlements[4] is None
+
+    # Users without a subscription are cached too
+    with count_queries() as counter:
+        assert crud_subscription.get_entitlements(db, [1, 2, 3, 4]) == entitlements
+    assert counter.count == 0
+
+def test_writes_invalidate_cached_entitlements(db, plans):
+    crud_subscription.create_subscription(db, obj_in=SubscriptionCreate(user_id=1, plan_id=plans[0].id))
+    assert crud_subscription.get_entitlements(db, [1, 2])[2] is None
+
+    crud_subscription.update_subscription(db, user_id=1, obj_in=SubscriptionUpdate(plan_id=plans[1].id))
+    crud_subscription.create_subscription(db, obj_in=SubscriptionCreate(user_id=2, plan_id=plans[0].id))
+    entitlements = crud_subscription.get_entitlements(db, [1, 2])
+    assert entitlements[1]["plan_id"] == plans[1].id
+    assert entitlements[2]["plan_id"] == plans[0].id
+
+    crud_subscription.cancel_subscription(db, user_id=1)
+    assert crud_subscription.get_entitlements(db, [1])[1] is None
+
+def _expire_soon(key: str, seconds: float) -> None:
+    # The expiry time stored in the value drives refresh-ahead, not the TTL
+    expires_at, entitlement = json.loads(get_redis().get(key))
+    get_redis().set(key, json.dumps([time.time() + seconds, entitlement]), keepttl=True)
+
+def test_entitlements_near_expiry_are_refreshed_once(db, plans, count_queries):
+    crud_subscription.create_subscription(db, obj_in=SubscriptionCreate(user_id=1, plan_id=plans[0].id))
+    crud_subscription.get_entitlements(db, [1])
+    key = "entitlement:1"
+    _expire_soon(key, settings.ENTITLEMENT_REFRESH_AHEAD_SECONDS - 0.5)
+
+    # The first reader claims the refresh and reloads; the expiry is reset
+    with count_queries() as counter:
+        crud_subscription.get_entitlements(db, [1])
+    assert counter.count == 1
+    assert json.loads(get_redis().get(key))[0] > time.time() + settings.ENTITLEMENT_REFRESH_AHEAD_SECONDS
+    assert get_redis().ttl(key) > settings.ENTITLEMENT_REFRESH_AHEAD_SECONDS
+
+    # Others still near expiry keep being served from the cache
+    _expire_soon(key, 1)
+    with count_queries() as counter:
+        assert crud_subscription.get_entitlements(db, [1])[1]["plan_id"] == plans[0].id
+    assert counter.count == 0
+
+def test_lookup_endpoint(db, plans):
+    crud_subscription.create_subscription(db, obj_in=SubscriptionCreate(user_id=1, plan_id=plans[1].id))
+    app.dependency_overrides[deps.get_current_user] = lambda: {"id": 1, "is_admin": False}
+    try:
+        client = TestClient(app)
+        response = client.post(f"{settings.API_V1_PREFIX}/subscriptions/lookup", json={"user_ids": [1, 2]})
+        assert response.status_code == 200
+        body = response.json()
+        assert body["1"]["plan_id"] == plans[1].id
+        assert body["2"] is None
+
+        too_many = list(range(settings.ENTITLEMENT_LOOKUP_MAX_USERS + 1))
+        response = client.post(f"{settings.API_V1_PREFIX}/subscriptions/lookup", json={"user_ids": too_many})
+        assert response.status_code == 422
+    finally:
+        app.dependency_overrides.clear()
+
+def test_hits_record_recency_only_when_sampled(db, plans, monkeypatch):
+    crud_subscription.create_subscription(db, obj_in=SubscriptionCreate(user_id=1, plan_id=plans[0].id))
+    monkeypatch.setattr(settings, "ENTITLEMENT_RECENT_SAMPLE_RATE", 0)
+    crud_subscription.get_entitlements(db, [1, 2])
+    assert entitlements.recent_user_ids(10) == [2, 1]
+
+    get_redis().delete(entitlements.RECENT_USERS_KEY)
+    crud_subscription.get_entitlements(db, [1, 2])
+    assert entitlements.recent_user_ids(10) == []
+
+    monkeypatch.setattr(settings, "ENTITLEMENT_RECENT_SAMPLE_RATE", 1)
+    crud_subscription.get_entitlements(db, [1])
+    assert entitlements.recent_user_ids(10) == [1]
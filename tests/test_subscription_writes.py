@@ -0,0 +1,92 @@
+from datetime import datetime
+import pytest
+from app.crud import plan as crud_plan
+from app.crud import subscription as crud_subscription
+from app.models.subscription import Plan, SubscriptionStatus
+from app.schemas.subscription import PlanCreate, PlanUpdate, SubscriptionCreate, SubscriptionUpdate
+
+def assert_single_write_with_event(queries):
+    """The RETURNING write plus its outbox INSERT, nothing else"""
+    assert queries.count == 2, queries.statements
+    assert "RETURNING" in queries.statements[0]
+    assert queries.statements[1].startswith("INSERT INTO outbox_events")
+
+def test_cancel_subscription_is_one_write(db, active_subscription, count_queries):
+    with count_queries() as queries:
+        subscription = crud_subscription.cancel_subscription(db, user_id=1)
+
+    assert_single_write_with_event(queries)
+    assert subscription.status == SubscriptionStatus.CANCELLED
+    assert subscription.cancelled_at is not None
+
+def test_cancel_subscription_without_active_returns_none(db, plans, count_queries):
+    with count_queries() as queries:
+        assert crud_subscription.cancel_subscription(db, user_id=1) is None
+    assert queries.count == 1
+
+def test_update_subscription_status_is_one_write(db, active_subscription, count_queries):
+    with count_queries() as queries:
+        subscription = crud_subscription.update_subscription(
+            db, user_id=1, obj_in=SubscriptionUpdate(status=SubscriptionStatus.INACTIVE)
+        )
+
+    assert_single_write_with_event(queries)
+    assert subscription.status == SubscriptionStatus.INACTIVE
+
+def test_expire_subscription_is_one_write(db, active_subscription, count_queries):
+    with count_queries() as queries:
+        subscription = crud_subscription.expire_subscription(db, active_subscription.id)
+
+    assert_single_write_with_event(queries)
+    assert subscription.status == SubscriptionStatus.EXPIRED
+
+def test_returned_objects_usable_after_commit(db, active_subscription, count_queries):
+    subscription = crud_subscription.cancel_subscription(db, user_id=1)
+    with count_queries() as queries:
+        assert subscription.user_id == 1
+        assert subscription.updated_at is not None
+    assert queries.count == 0
+
+def test_plan_writes_are_one_statement(db, count_queries):
+    with count_queries() as queries:
+        plan = crud_plan.create(db, obj_in=PlanCreate(name="Pro", price=5, duration_days=30))
+    assert queries.count == 1, queries.statements
+    assert plan.id is not None
+
+    with count_queries() as queries:
+        plan = crud_plan.update(db, id=plan.id, obj_in=PlanUpdate(price=7))
+    assert queries.count == 1, queries.statements
+    assert plan.price == 7
+
+    with count_queries() as queries:
+        assert crud_plan.remove(db, id=plan.id).name == "Pro"
+    assert queries.count == 1, queries.statements
+    assert crud_plan.update(db, id=plan.id, obj_in=PlanUpdate(price=8)) is None
+
+def test_plan_change_to_plan_without_subscribers(db, active_subscription, count_queries):
+    _, premium = db.query(Plan).order_by(Plan.id).all()
+    with count_queries() as queries:
+        subscription = crud_subscription.update_subscription(
+            db, user_id=1, obj_in=SubscriptionUpdate(plan_id=premium.id)
+        )
+
+    # Plan already in the identity map: just the UPDATE and its event
+    assert_single_write_with_event(queries)
+    assert subscription.plan_id == premium.id
+    assert (subscription.end_date - datetime.utcnow()).days >= 364
+
+def test_plan_lookup_uses_plans_primary_key(db, plans, count_queries):
+    plan = crud_plan.create(db, obj_in=PlanCreate(name="Fresh", price=1, duration_days=7))
+    db.expunge_all()
+    with count_queries() as queries:
+        subscription = crud_subscription.create_subscription(
+            db, obj_in=SubscriptionCreate(user_id=2, plan_id=plan.id)
+        )
+
+    assert subscription.plan_id == plan.id
+    assert "FROM plans" in queries.statements[0]
+    assert "subscriptions" not in queries.statements[0]
+
+def test_plan_change_to_missing_plan_raises(db, active_subscription):
+    with pytest.raises(ValueError):
+        crud_subscription.update_subscription(db, user_id=1, obj_in=SubscriptionUpdate(plan_id=999))
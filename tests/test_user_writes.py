@@ -0,0 +1,23 @@
+from app.core.security import verify_password
+from app.crud import user as crud_user
+from app.schemas.user import UserCreate, UserUpdate
+
+def test_user_writes_are_one_statement(db, count_queries):
+    with count_queries() as queries:
+        user = crud_user.create(db, obj_in=UserCreate(email="ann@example.com", password="first-pass"))
+    assert queries.count == 1, queries.statements
+    assert user.id is not None
+
+    changes = {"password": "second-pass"}
+    with count_queries() as queries:
+        user = crud_user.update(db, db_obj=user, obj_in=changes)
+    assert queries.count == 1, queries.statements
+    assert verify_password("second-pass", user.hashed_password)
+    assert changes == {"password": "second-pass"}
+
+def test_user_update_with_nothing_to_change_is_a_no_op(db, count_queries):
+    user = crud_user.create(db, obj_in=UserCreate(email="ann@example.com", password="first-pass"))
+    for obj_in in ({}, UserUpdate(), {"password": None}):
+        with count_queries() as queries:
+            assert crud_user.update(db, db_obj=user, obj_in=obj_in) is user
+        assert queries.count == 0, queries.statements
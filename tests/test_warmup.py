@@ -0,0 +1,53 @@
+import redis
+from app.core import entitlements, etag, warmup
+from app.core.cache import get_redis
+from app.core.config import settings
+from app.crud import subscription as crud_subscription
+from app.schemas.subscription import SubscriptionCreate
+from app.server import server_options
+
+def test_warm_worker_loads_the_plan_catalog(plans):
+    warmup.warm_worker()
+
+    bits = get_redis().hgetall(entitlements.PLAN_FEATURES_KEY)
+    assert bits.pop(entitlements.EXPIRES_AT_FIELD.encode())
+    assert {int(plan_id) for plan_id in bits} == {plan.id for plan in plans}
+    assert get_redis().exists(etag.CATALOG_KEY)
+
+def test_warm_worker_survives_a_failing_dependency(plans, monkeypatch):
+    def down(connections):
+        raise redis.ConnectionError("down")
+
+    monkeypatch.setattr(warmup, "warm_redis_pool", down)
+    warmup.warm_worker()
+    assert get_redis().exists(etag.CATALOG_KEY)
+
+def test_shared_cache_is_warmed_once_per_empty_redis(db, plans, count_queries, monkeypatch):
+    monkeypatch.setattr(settings, "ENTITLEMENT_RECENT_SAMPLE_RATE", 0)
+    for user_id in (1, 2, 3):
+        crud_subscription.create_subscription(db, obj_in=SubscriptionCreate(user_id=user_id, plan_id=plans[0].id))
+    crud_subscription.get_entitlements(db, [2])
+    get_redis().flushall()
+
+    # Recency was flushed too: falls back to the newest subscriptions
+    assert warmup.warm_shared_cache() == {"plans": 2, "entitlements": 3}
+    assert warmup.warm_shared_cache() == {}
+    with count_queries() as counter:
+        crud_subscription.get_entitlements(db, [1, 2, 3])
+    assert counter.count == 0
+
+    # Only lookup misses record recency (hits are sampled, off here)
+    entitlements.invalidate([1, 2, 3])
+    crud_subscription.get_entitlements(db, [1, 3])
+    assert entitlements.recent_user_ids(10) == [3, 1]
+    assert warmup.warm_shared_cache(force=True)["entitlements"] == 2
+
+def test_server_preloads_the_app_and_resets_clients_after_fork():
+    options = server_options(workers=3, bind="127.0.0.1:9000")
+    assert options["workers"] == 3
+    assert options["preload_app"] is True
+    assert options["worker_class"] == "uvicorn.workers.UvicornWorker"
+
+    client = get_redis()
+    options["post_fork"](None, None)
+    assert get_redis() is not client
@@ -0,0 +1,204 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from app.core import webhooks
+from app.core.cache import get_redis
+from app.core.config import settings
+from app.crud import subscription as crud_subscription
+from app.crud import webhook as crud_webhook
+from app.schemas.subscription import SubscriptionCreate
+from app.schemas.webhook import WebhookEndpointCreate
+from app.tasks import webhook as webhook_tasks
+from app.tasks.outbox import relay_outbox_events
+
+class Receiver:
+    """Local HTTP stand-in for a webhook consumer"""
+
+    def __init__(self):
+        self.requests = []
+        self.status = 200
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                with receiver.lock:
+                    receiver.in_flight += 1
+                    receiver.max_in_flight = max(receiver.max_in_flight, receiver.in_flight)
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                threading.Event().wait(0.02)
+                with receiver.lock:
+                    receiver.in_flight -= 1
+                    receiver.requests.append((dict(self.headers), body))
+                self.send_response(receiver.status)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/hook"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def events(self):
+        return [event for _, body in self.requests for event in json.loads(body)["events"]]
+
+@pytest.fixture
+def receiver():
+    receiver = Receiver()
+    yield receiver
+    receiver.server.shutdown()
+
+@pytest.fixture
+def retries(monkeypatch):
+    scheduled = []
+    monkeypatch.setattr(
+        webhook_tasks.deliver_webhook_batch, "apply_async",
+        lambda args, countdown: scheduled.append((args, countdown))
+    )
+    return scheduled
+
+def _subscribe(db, plans, users):
+    for user_id in users:
+        crud_subscription.create_subscription(db, obj_in=SubscriptionCreate(user_id=user_id, plan_id=plans[0].id))
+    relay_outbox_events()
+
+def test_events_are_signed_and_batched(db, plans, receiver, monkeypatch):
+    monkeypatch.setattr(settings, "WEBHOOK_BATCH_SIZE", 2)
+    endpoint = crud_webhook.create(db, obj_in=WebhookEndpointCreate(url=receiver.url))
+    _subscribe(db, plans, range(1, 6))
+
+    assert webhook_tasks.dispatch_webhook_events() == 3
+    assert sorted(event["data"]["user_id"] for event in receiver.events()) == [1, 2, 3, 4, 5]
+    assert {event["type"] for event in receiver.events()} == {"subscription.created"}
+    for headers, body in receiver.requests:
+        assert webhooks.verify(endpoint.secret, body, headers[webhooks.SIGNATURE_HEADER])
+        assert not webhooks.verify("wrong-secret", body, headers[webhooks.SIGNATURE_HEADER])
+
+    # Acknowledged: nothing is delivered twice
+    assert webhook_tasks.dispatch_webhook_events() == 0
+
+def test_endpoints_only_receive_subscribed_event_types(db, plans, receiver):
+    crud_webhook.create(db, obj_in=WebhookEndpointCreate(
+        url=receiver.url, event_types=["subscription.cancelled"]
+    ))
+    _subscribe(db, plans, [1, 2])
+    crud_subscription.cancel_subscription(db, user_id=2)
+    relay_outbox_events()
+
+    webhook_tasks.dispatch_webhook_events()
+    assert [(e["type"], e["data"]["user_id"]) for e in receiver.events()] == [("subscription.cancelled", 2)]
+
+def test_per_endpoint_concurrency_cap(db, plans, receiver, monkeypatch):
+    monkeypatch.setattr(settings, "WEBHOOK_BATCH_SIZE", 1)
+    crud_webhook.create(db, obj_in=WebhookEndpointCreate(url=receiver.url, max_concurrency=2))
+    _subscribe(db, plans, range(1, 9))
+
+    assert webhook_tasks.dispatch_webhook_events() == 8
+    assert receiver.max_in_flight <= 2
+
+def test_concurrency_cap_is_shared_between_workers(db, receiver):
+    endpoint = crud_webhook.create(db, obj_in=WebhookEndpointCreate(url=receiver.url, max_concurrency=2))
+    target = webhook_tasks._target(endpoint)
+    jobs = [(target, [{"id": i, "type": "subscription.created", "data": {}}]) for i in range(4)]
+
+    # Each thread has its own event loop and clients, like separate workers
+    def worker():
+        try:
+            assert webhooks.deliver_batches(jobs) == [None] * 4
+        finally:
+            webhooks.close_clients()
+
+    threads = [threading.Thread(target=worker) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(receiver.requests) == 12
+    assert receiver.max_in_flight <= 2
+    assert get_redis().exists(*webhooks._slot_keys(target)) == 0
+
+def test_delivery_client_is_reused_across_tasks(db, receiver):
+    endpoint = crud_webhook.create(db, obj_in=WebhookEndpointCreate(url=receiver.url))
+    job = (webhook_tasks._target(endpoint), [{"id": 1, "type": "subscription.created", "data": {}}])
+
+    webhooks.deliver_batches([job])
+    client = webhooks._local.http
+    webhooks.deliver_batches([job])
+    assert webhooks._local.http is client
+
+    webhooks.close_clients()
+    assert getattr(webhooks._local, "http", None) is None
+
+def test_idle_stream_consumer_is_released(db, plans, receiver):
+    crud_webhook.create(db, obj_in=WebhookEndpointCreate(url=receiver.url))
+    _subscribe(db, plans, [1])
+    webhook_tasks.dispatch_webhook_events()
+    consumer = webhook_tasks._consumer_name()
+
+    # Entries read but not acknowledged stay with their consumer
+    _subscribe(db, plans, [2])
+    entries = webhooks.read_events(consumer, 10)
+    assert webhooks.release_consumer(consumer) is False
+
+    webhooks.ack_events([entry_id for entry_id, _ in entries])
+    assert webhooks.release_consumer(consumer) is True
+    assert get_redis().xinfo_consumers(settings.OUTBOX_STREAM, webhooks.CONSUMER_GROUP) == []
+
+def test_failed_batches_retry_with_backoff_then_dead_letter(db, plans, receiver, retries):
+    receiver.status = 503
+    endpoint = crud_webhook.create(db, obj_in=WebhookEndpointCreate(url=receiver.url))
+    _subscribe(db, plans, [1])
+
+    webhook_tasks.dispatch_webhook_events()
+    (args, countdown), = retries
+    assert args[0] == endpoint.id and args[2] == 2
+    assert countdown == settings.WEBHOOK_RETRY_BASE_SECONDS
+
+    for attempt in range(2, settings.WEBHOOK_MAX_ATTEMPTS + 1):
+        assert webhook_tasks.deliver_webhook_batch(endpoint.id, args[1], attempt) is False
+    assert retries[-1][1] == webhooks.retry_delay(settings.WEBHOOK_MAX_ATTEMPTS - 1)
+
+    dead, = webhooks.get_dead_letters()
+    assert dead["endpoint_id"] == endpoint.id
+    assert dead["attempts"] == settings.WEBHOOK_MAX_ATTEMPTS
+    assert dead["error"] == "HTTP 503"
+
+def test_retry_succeeds_once_endpoint_recovers(db, plans, receiver, retries):
+    receiver.status = 500
+    crud_webhook.create(db, obj_in=WebhookEndpointCreate(url=receiver.url))
+    _subscribe(db, plans, [1])
+    webhook_tasks.dispatch_webhook_events()
+
+    receiver.status = 200
+    (args, _), = retries
+    assert webhook_tasks.deliver_webhook_batch(*args) is True
+    assert webhooks.get_dead_letters() == []
+
+def test_admin_endpoints_register_and_list(db):
+    from fastapi.testclient import TestClient
+    from app.api import deps
+    from app.main import app
+
+    app.dependency_overrides[deps.get_current_admin_user] = lambda: {"id": 1, "is_admin": True}
+    try:
+        client = TestClient(app)
+        created = client.post(f"{settings.API_V1_PREFIX}/webhooks/", json={
+            "url": "https://example.com/hooks", "event_types": ["subscription.updated"]
+        })
+        assert created.status_code == 201
+        assert len(created.json()["secret"]) == 64
+
+        listed = client.get(f"{settings.API_V1_PREFIX}/webhooks/").json()
+        assert listed == [{k: v for k, v in created.json().items() if k != "secret"}]
+
+        invalid = client.post(f"{settings.API_V1_PREFIX}/webhooks/", json={
+            "url": "https://example.com/hooks", "event_types": ["plan.deleted"]
+        })
+        assert invalid.status_code == 422
+        assert client.delete(f"{settings.API_V1_PREFIX}/webhooks/{created.json()['id']}").status_code == 200
+    finally:
+        app.dependency_overrides.clear()